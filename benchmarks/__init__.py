@@ -0,0 +1 @@
+# Archivo de inicialización del paquete de benchmarks
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Cambios de estado de factura y de stock: lectura + UPDATE completo frente a UPDATE parcial.
+
+"Antes" reproduce el camino anterior: get_by_id y un UPDATE de todas las
+columnas (que además dispara los triggers FTS de Observaciones y NombrePro).
+"Después" usa FacturaController.cambiar_estado_factura y
+ProductoController.update_stock, que escriben una sola columna sin leer.
+Cada operación se confirma por separado, como en la interfaz.
+
+Uso: python -m benchmarks.bench_actualizaciones [operaciones]   (por defecto 5.000)
+"""
+import random
+import sys
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from controllers.factura_controller import FacturaController
+from controllers.producto_controller import ProductoController
+from database.models import Factura, Producto
+
+ESTADOS = ['Pendiente', 'Pagada', 'Cancelada', 'Vencida']
+
+
+def estado_antes(db, id_factura, estado):
+    row = db.fetch_one('factura.get_by_id', (id_factura,))
+    factura = Factura.from_row(row)
+    factura.estado = estado
+    db.execute_query('factura.update', factura._values() + (factura.id,))
+
+
+def stock_antes(db, id_producto, cantidad):
+    row = db.fetch_one('producto.get_by_id', (id_producto,))
+    producto = Producto.from_row(row)
+    producto.stock += cantidad
+    db.execute_query('producto.update', producto._values() + (producto.id,))
+
+
+def por_operacion(db, operaciones):
+    """(ms por operación, sentencias por operación)"""
+    db.reset_statement_stats()
+    segundos = cronometrar(lambda: [operacion() for operacion in operaciones])
+    sentencias = sum(s['calls'] for s in db.statement_stats().values())
+    return segundos / len(operaciones) * 1000, sentencias / len(operaciones)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rnd = random.Random(11)
+    with base_temporal() as db:
+        poblar_historial(db, 50000)
+        facturas = db.fetch_one("SELECT COUNT(*) FROM Factura")[0]
+        db.execute_query("UPDATE Factura SET Observaciones = 'Entrega a domicilio, pago a 30 días'")
+        db.connect()
+        factura_controller = FacturaController()
+        producto_controller = ProductoController()
+        
+        cambios_estado = [(rnd.randint(1, facturas), rnd.choice(ESTADOS)) for _ in range(n)]
+        cambios_stock = [(rnd.randint(1, 500), rnd.randint(-3, 3)) for _ in range(n)]
+        casos = []
+        for nombre, antes, despues in (
+            ("Estado de factura",
+             [lambda i=i, e=e: estado_antes(db, i, e) for i, e in cambios_estado],
+             [lambda i=i, e=e: factura_controller.cambiar_estado_factura(i, e) for i, e in cambios_estado]),
+            ("Stock de producto",
+             [lambda i=i, c=c: stock_antes(db, i, c) for i, c in cambios_stock],
+             [lambda i=i, c=c: producto_controller.update_stock(i, c) for i, c in cambios_stock]),
+        ):
+            ms_antes, sent_antes = por_operacion(db, antes)
+            ms_despues, sent_despues = por_operacion(db, despues)
+            casos.append((nombre, f"{sent_antes:.0f}", f"{sent_despues:.0f}",
+                          f"{ms_antes:.3f}", f"{ms_despues:.3f}", f"x{ms_antes / ms_despues:.1f}"))
+        db.close()
+    
+    imprimir_tabla(f"{n} operaciones, una confirmación por operación", casos,
+                   ["Operación", "Sentencias antes", "Sentencias después", "Antes ms", "Después ms", "Mejora"])
+
+
+if __name__ == "__main__":
+    main()
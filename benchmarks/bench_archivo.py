@@ -0,0 +1,121 @@
+"""Operaciones diarias con 10 años de historial: todo en la base activa frente a años archivados.
+
+Se genera un historial de 10 años y se miden las operaciones de cada día
+(registrar ventas, listados, estadísticas, reporte del mes, búsqueda de una
+venta reciente) antes y después de archivar los años cerrados con
+database.archive (quedan KeepYears años en la base activa). También se miden
+las consultas que sí necesitan el archivo: un reporte de un mes de hace
+cinco años y la búsqueda de una venta archivada por id.
+
+"Fría" es la primera llamada tras reabrir el pool (caché de páginas vacía;
+la del sistema operativo sigue caliente); "caliente", la media de las
+siguientes.
+
+Uso: python -m benchmarks.bench_archivo [ventas del historial]   (por defecto 500.000)
+"""
+import datetime
+import os
+import random
+import sys
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from controllers.cliente_controller import ClienteController
+from controllers.factura_controller import FacturaController
+from controllers.reporte_controller import ReporteController
+from controllers.venta_controller import VentaController
+
+REPETICIONES = 5
+VENTAS_NUEVAS = 200
+
+
+def operaciones(db, id_reciente, id_archivado):
+    ventas = VentaController()
+    facturas = FacturaController()
+    clientes = ClienteController()
+    reportes = ReporteController()
+    hoy = datetime.date.today()
+    mes = (hoy.replace(day=1).isoformat(), hoy.isoformat())
+    antiguo = hoy.replace(year=hoy.year - 5, day=1)
+    mes_antiguo = (antiguo.isoformat(), (antiguo + datetime.timedelta(days=27)).isoformat())
+    rnd = random.Random(3)
+    
+    def registrar():
+        for _ in range(VENTAS_NUEVAS):
+            precio = rnd.randint(100, 5000)
+            ventas.crear_venta(rnd.randint(1, 1000), 1, [{'cantidad': 1, 'precio_uni': precio, 'subtotal': precio,
+                                                          'id_producto': rnd.randint(1, 500)}])
+    
+    return [
+        (f"Registrar {VENTAS_NUEVAS} ventas", registrar),
+        ("Listado de ventas", ventas.get_all_ventas),
+        ("Estadísticas de facturas", facturas.obtener_estadisticas_facturas),
+        ("Clientes frecuentes", clientes.get_clientes_frecuentes),
+        ("Reporte del mes actual", lambda: reportes.generar_reporte_ventas(*mes)),
+        ("Venta reciente por id", lambda: ventas.get_venta_by_id(id_reciente)),
+        ("Reporte de un mes de hace 5 años", lambda: reportes.generar_reporte_ventas(*mes_antiguo)),
+        ("Venta archivada por id", lambda: ventas.get_venta_by_id(id_archivado)),
+    ]
+
+
+def medir(db, id_reciente, id_archivado):
+    """{operación: (fría ms, caliente ms)}"""
+    resultados = {}
+    for nombre, funcion in operaciones(db, id_reciente, id_archivado):
+        # Pool nuevo: conexiones sin páginas en caché ni años adjuntos
+        directorio = db.archive.directory
+        db.set_database_path(db.db_path)
+        db.archive.directory = directorio
+        fria = cronometrar(funcion)
+        caliente = cronometrar(funcion, REPETICIONES)
+        resultados[nombre] = (fria * 1000, caliente * 1000)
+    return resultados
+
+
+def tamanos(db):
+    """(MB de la base activa, MB de los archivos, MB de caché de páginas por conexión)"""
+    base = os.path.getsize(db.db_path)
+    archivos = sum(os.path.getsize(db.archive.path(fila['Archivo'])) for fila in db.archive.catalog(refresh=True).values())
+    cache = db.fetch_one("PRAGMA cache_size")[0]
+    pagina = db.fetch_one("PRAGMA page_size")[0]
+    cache = -cache * 1024 if cache < 0 else cache * pagina
+    return base / 2 ** 20, archivos / 2 ** 20, cache / 2 ** 20
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with base_temporal() as db:
+        poblar_historial(db, ventas, dias=10 * 365, proporcion_facturas=0.3)
+        db.execute_query("VACUUM")
+        db.archive.directory = os.path.join(os.path.dirname(db.db_path), 'archive')
+        anio_archivado = db.archive.last_closed_year() - 2
+        id_reciente = db.fetch_one("SELECT MAX(idVenta) FROM Venta WHERE Fecha >= ?",
+                                   (datetime.date.today().replace(day=1).isoformat(),))[0]
+        id_archivado = db.fetch_one("SELECT MIN(idVenta) FROM Venta WHERE Fecha LIKE ?", (f"{anio_archivado}-%",))[0]
+        
+        ultima = db.fetch_one("SELECT MAX(idVenta) FROM Venta")[0]
+        antes = medir(db, id_reciente, id_archivado)
+        tamano_antes = tamanos(db)
+        # Las dos mediciones parten del mismo historial (sin las ventas registradas en la primera)
+        db.execute_query("DELETE FROM DetalleVenta WHERE idVenta > ?", (ultima,))
+        db.execute_query("DELETE FROM Venta WHERE idVenta > ?", (ultima,))
+        registros = db.archive.archive_closed_years()
+        despues = medir(db, id_reciente, id_archivado)
+        tamano_despues = tamanos(db)
+        db.close_all()
+    
+    filas = [(nombre, f"{antes[nombre][0]:.2f}", f"{antes[nombre][1]:.2f}",
+              f"{despues[nombre][0]:.2f}", f"{despues[nombre][1]:.2f}", f"x{antes[nombre][1] / despues[nombre][1]:.1f}")
+             for nombre in antes]
+    imprimir_tabla(f"{ventas:,} ventas en 10 años, {len(registros)} años archivados (ms)", filas,
+                   ["Operación", "Sin archivar fría", "Sin archivar", "Archivado fría", "Archivado", "Mejora"])
+    imprimir_tabla("Tamaño (MB)", [
+        ("Sin archivar", f"{tamano_antes[0]:.1f}", "-", f"{tamano_antes[2]:.1f}"),
+        ("Archivado", f"{tamano_despues[0]:.1f}", f"{tamano_despues[1]:.1f}", f"{tamano_despues[2]:.1f}"),
+    ], ["", "Base activa", "Archivos", "Caché por conexión"])
+    for registro in registros:
+        print(f"Año {registro['year']}: {registro['ventas']:,} ventas, {registro['facturas']:,} facturas, "
+              f"{registro['bytes'] / 2 ** 20:.1f} MB en {registro['seconds']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
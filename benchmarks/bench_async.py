@@ -0,0 +1,86 @@
+"""Consultas independientes en serie frente a solapadas con database.aio.
+
+- Combos de VentaView: clientes, empleados y productos uno tras otro (como
+  hacía load_combos) y a la vez con asyncio.gather sobre aio.wrap.
+- Búsquedas sueltas: muchos Producto.get_by_id (sin sesión de identidad)
+  en serie y con asyncio.gather sobre AsyncDatabase.run; el executor tiene
+  tantos hilos como conexiones el pool.
+- Cancelación: una consulta lenta cortada por asyncio.wait_for; se mide
+  cuánto tarda en volver y que la conexión sigue sirviendo.
+
+Uso: python -m benchmarks.bench_async [clientes] [búsquedas]   (por defecto 50.000 y 2.000)
+"""
+import asyncio
+import sys
+import time
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from controllers.cliente_controller import ClienteController
+from controllers.empleado_controller import EmpleadoController
+from controllers.producto_controller import ProductoController
+from database import aio
+from database.models import Producto
+
+CONSULTA_LENTA = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000)
+    SELECT count(*) FROM n
+"""
+LIMITE = 0.2
+
+
+def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    busquedas = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    filas = []
+    with base_temporal() as db:
+        poblar_historial(db, 1000, productos=clientes // 2, clientes=clientes, empleados=200)
+        adb = aio.AsyncDatabase(db)
+        controladores = (ClienteController(), EmpleadoController(), ProductoController())
+        
+        def combos_en_serie():
+            return (controladores[0].get_all_clientes(), controladores[1].get_all_empleados(),
+                    controladores[2].get_all_productos())
+        
+        async def combos_a_la_vez():
+            return await asyncio.gather(
+                aio.wrap(controladores[0], adb).get_all_clientes(),
+                aio.wrap(controladores[1], adb).get_all_empleados(),
+                aio.wrap(controladores[2], adb).get_all_productos())
+        
+        ids = [(i % (clientes // 2)) + 1 for i in range(busquedas)]
+        
+        def busquedas_en_serie():
+            return [Producto.get_by_id(id_producto) for id_producto in ids]
+        
+        async def busquedas_a_la_vez():
+            return await asyncio.gather(*(adb.run(Producto.get_by_id, id_producto) for id_producto in ids))
+        
+        for nombre, antes, despues in (
+            ("Combos de VentaView", combos_en_serie, lambda: asyncio.run(combos_a_la_vez())),
+            (f"{busquedas:,} Producto.get_by_id", busquedas_en_serie, lambda: asyncio.run(busquedas_a_la_vez())),
+        ):
+            t_antes = cronometrar(antes, repeticiones=3)
+            t_despues = cronometrar(despues, repeticiones=3)
+            filas.append((nombre, f"{t_antes * 1000:.0f}", f"{t_despues * 1000:.0f}", f"x{t_antes / t_despues:.1f}"))
+        
+        async def cancelar():
+            inicio = time.perf_counter()
+            try:
+                await asyncio.wait_for(adb.fetch_one(CONSULTA_LENTA), LIMITE)
+            except asyncio.TimeoutError:
+                pass
+            segundos = time.perf_counter() - inicio
+            # Las conexiones interrumpidas siguen sirviendo
+            await asyncio.gather(*(adb.fetch_one('SELECT 1') for _ in range(adb.max_workers)))
+            return segundos
+        
+        segundos = asyncio.run(cancelar())
+        adb.shutdown()
+    
+    imprimir_tabla(f"{clientes:,} clientes, {clientes // 2:,} productos, executor de {adb.max_workers} hilos (ms)",
+                   filas, ["Operación", "En serie", "asyncio.gather", "Mejora"])
+    print(f"\nwait_for({LIMITE}s) sobre una consulta lenta: volvió en {segundos:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
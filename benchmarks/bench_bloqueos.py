@@ -0,0 +1,115 @@
+"""Ventas perdidas por "database is locked": sin reintentos frente a RetryPolicy.
+
+Varias terminales registran ventas con VentaController.crear_venta (sin
+hilo escritor: cada una compite por el bloqueo) mientras otra conexión,
+como un proceso externo o un informe que escribe, retiene el bloqueo de
+escritura a intervalos. busy_timeout se baja para que los choques se vean
+en poco tiempo.
+
+"Antes" no reintenta (retries=0): cada SQLITE_BUSY es una venta perdida.
+"Después" usa la política por defecto (reintentos con espera aleatoria).
+Se muestra el histograma de espera por el bloqueo de cada caso.
+
+Uso: python -m benchmarks.bench_bloqueos [terminales] [ventas por terminal]   (por defecto 8 y 150)
+"""
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla, poblar_historial
+from config.config_manager import config_manager
+from controllers.venta_controller import VentaController
+from database.busy import DatabaseBusyError, RetryPolicy
+
+BUSY_TIMEOUT_MS = 50
+RETENCION = 0.12
+INTERVALO = 0.3
+
+
+def retener_bloqueo(ruta, parar):
+    """Toma el bloqueo de escritura RETENCION segundos cada INTERVALO segundos"""
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 5000")
+    while not parar.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        time.sleep(RETENCION)
+        conn.execute("COMMIT")
+        parar.wait(INTERVALO - RETENCION)
+    conn.close()
+
+
+def registrar(terminales, ventas):
+    """(segundos, creadas, perdidas por bloqueo)"""
+    controller = VentaController()
+    resultados = []
+    
+    def terminal(numero):
+        rnd = random.Random(numero)
+        creadas = perdidas = 0
+        for _ in range(ventas):
+            precio = rnd.randint(100, 5000)
+            detalles = [{'cantidad': 1, 'precio_uni': precio, 'subtotal': precio,
+                         'id_producto': rnd.randint(1, 50)}]
+            try:
+                if controller.crear_venta(rnd.randint(1, 50), 1, detalles):
+                    creadas += 1
+            except DatabaseBusyError:
+                perdidas += 1
+        resultados.append((creadas, perdidas))
+    
+    hilos = [threading.Thread(target=terminal, args=(i,)) for i in range(terminales)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return time.perf_counter() - inicio, sum(r[0] for r in resultados), sum(r[1] for r in resultados)
+
+
+def main():
+    terminales = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    ventas = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    filas = []
+    histogramas = []
+    # Solo en memoria: no se guarda en settings.ini
+    config_manager.config.set('Database', 'BusyTimeoutMs', str(BUSY_TIMEOUT_MS))
+    try:
+        with base_temporal() as db:
+            poblar_historial(db, 0, productos=50, clientes=50, empleados=1)
+            db.set_database_path(db.db_path)
+            for nombre, politica in (
+                ("Sin reintentos (antes)", RetryPolicy(retries=0)),
+                ("RetryPolicy por defecto", db.retry_policy),
+            ):
+                db.retry_policy = politica
+                escritor, db.writer = db.writer, None
+                db.reset_statement_stats()
+                parar = threading.Event()
+                retenedor = threading.Thread(target=retener_bloqueo, args=(db.db_path, parar))
+                retenedor.start()
+                try:
+                    segundos, creadas, perdidas = registrar(terminales, ventas)
+                finally:
+                    parar.set()
+                    retenedor.join()
+                    db.writer = escritor
+                esperas = db.lock_wait_stats()
+                reintentos = sum(entrada['retries'] for entrada in esperas.values())
+                filas.append((nombre, creadas, perdidas, reintentos, f"{creadas / segundos:,.0f}"))
+                histogramas.append((nombre, esperas))
+    finally:
+        config_manager.config.remove_option('Database', 'BusyTimeoutMs')
+    
+    imprimir_tabla(f"{terminales} terminales x {ventas} ventas, bloqueo externo de {RETENCION * 1000:.0f} ms "
+                   f"cada {INTERVALO * 1000:.0f} ms, busy_timeout={BUSY_TIMEOUT_MS} ms", filas,
+                   ["Política", "Creadas", "Perdidas", "Reintentos", "Ventas/s"])
+    for nombre, esperas in histogramas:
+        for sentencia, entrada in esperas.items():
+            tramos = ", ".join(f"{tramo}: {n}" for tramo, n in entrada['histogram'].items() if n)
+            print(f"\n{nombre} - espera por el bloqueo en {sentencia} (max {entrada['max_ms']:.0f} ms)\n  {tramos}")
+
+
+if __name__ == "__main__":
+    main()
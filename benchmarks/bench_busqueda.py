@@ -0,0 +1,66 @@
+"""Búsqueda de productos y clientes con LIKE '%término%' frente a FTS5.
+
+Uso: python -m benchmarks.bench_busqueda [productos] [clientes]
+     (por defecto 500.000 productos y 1.000.000 de clientes)
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla
+from database.search import search
+
+MARCAS = ["Samsung", "Gloria", "Nestlé", "Bimbo", "Sony", "Lenovo", "Faber", "Pilsen", "Inca", "Sapolio"]
+ARTICULOS = ["Leche", "Café", "Galletas", "Televisor", "Laptop", "Cuaderno", "Cerveza", "Gaseosa",
+             "Detergente", "Audífonos", "Chocolate", "Arroz", "Aceite", "Lapicero", "Yogurt"]
+NOMBRES = ["María", "José", "Juan", "Rosa", "Luis", "Carmen", "Jorge", "Ana", "Carlos", "Lucía",
+           "Pedro", "Elena", "Miguel", "Sofía", "Víctor", "Julia"]
+APELLIDOS = ["Quispe", "Flores", "Sánchez", "Rodríguez", "García", "Huamán", "Mamani", "Ramírez",
+             "Torres", "Chávez", "Vargas", "Castillo", "Mendoza", "Rojas", "Gutiérrez", "Ríos"]
+
+# Consultas anteriores de los controladores
+LIKE_PRODUCTOS = "SELECT * FROM Producto WHERE NombrePro LIKE ? OR idProducto LIKE ?"
+LIKE_CLIENTES = "SELECT * FROM Cliente WHERE NombreCli LIKE ? OR Dni LIKE ? OR TelefonoCli LIKE ?"
+
+
+def poblar(db, productos, clientes, semilla=7):
+    rnd = random.Random(semilla)
+    with db.use_profile('bulk-load'), db.transaction():
+        db.execute_many("INSERT INTO Producto (NombrePro, Precio, Stock, idCategoria) VALUES (?, ?, ?, NULL)",
+                        ((f"{rnd.choice(ARTICULOS)} {rnd.choice(MARCAS)} {rnd.randint(1, 9999)}",
+                          rnd.randint(100, 50000), 100) for _ in range(productos)))
+        db.execute_many("INSERT INTO Cliente (NombreCli, TelefonoCli, Dni, DireccionClie) VALUES (?, ?, ?, ?)",
+                        ((f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+                          f"9{i:08d}", f"{10000000 + i:08d}", None) for i in range(clientes)))
+
+
+def main():
+    productos = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    clientes = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    
+    casos = [
+        ("Producto", "Televisor Sony", LIKE_PRODUCTOS, 2),
+        ("Producto", "audif", LIKE_PRODUCTOS, 2),
+        ("Cliente", "Lucía Huamán Ríos", LIKE_CLIENTES, 3),
+        ("Cliente", "1054321", LIKE_CLIENTES, 3),
+    ]
+    
+    filas = []
+    with base_temporal() as db:
+        inicio = time.perf_counter()
+        poblar(db, productos, clientes)
+        print(f"{productos} productos y {clientes} clientes generados en {time.perf_counter() - inicio:.1f} s")
+        
+        for tabla, termino, consulta_like, parametros in casos:
+            like = cronometrar(lambda: db.fetch_all(consulta_like, (f"%{termino}%",) * parametros), 3)
+            fts = cronometrar(lambda: search(db, tabla, termino), 20)
+            encontrados = len(search(db, tabla, termino))
+            filas.append((tabla, termino, f"{like * 1000:.1f}", f"{fts * 1000:.2f}",
+                          f"x{like / fts:.0f}", encontrados))
+    
+    imprimir_tabla("Tiempo por búsqueda (ms)", filas,
+                   ["Tabla", "Término", "LIKE", "FTS5", "Mejora", "Resultados FTS5"])
+
+
+if __name__ == "__main__":
+    main()
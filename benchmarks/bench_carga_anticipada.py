@@ -0,0 +1,66 @@
+"""Carga de las líneas de una factura con sus productos: N+1 frente a include.
+
+Abre facturas de distinto tamaño como lo hacía FacturaView (las líneas y
+luego un Producto.get_by_id por línea) y con
+DetalleFactura.get_by_factura(id, include=['producto']), y cuenta las
+consultas con las estadísticas por sentencia.
+
+Uso: python -m benchmarks.bench_carga_anticipada [repeticiones]   (por defecto 20)
+"""
+import random
+import sys
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from database.models import DetalleFactura, Factura, Producto
+
+TAMANOS = (10, 100, 500)
+
+
+def n_mas_uno(id_factura):
+    return [(detalle, Producto.get_by_id(detalle.id_producto))
+            for detalle in DetalleFactura.get_by_factura(id_factura)]
+
+
+def anticipada(id_factura):
+    return [(detalle, detalle.producto)
+            for detalle in DetalleFactura.get_by_factura(id_factura, include=['producto'])]
+
+
+def consultas(db, funcion):
+    """Número de sentencias que ejecuta una llamada"""
+    db.reset_statement_stats()
+    funcion()
+    return sum(s['calls'] for s in db.statement_stats().values())
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rnd = random.Random(5)
+    filas = []
+    with base_temporal() as db:
+        poblar_historial(db, 1000, proporcion_facturas=0)
+        db.connect()
+        for tamano in TAMANOS:
+            id_factura = Factura(fecha='2024-01-01', subtotal=0, impuesto=0, total=0).save()
+            for _ in range(tamano):
+                precio = rnd.randint(100, 50000)
+                DetalleFactura(cantidad=1, precio_unitario=precio, subtotal=precio,
+                               id_producto=rnd.randint(1, 500), id_factura=id_factura).save()
+            
+            antes = [(d.id, p.nombre) for d, p in n_mas_uno(id_factura)]
+            despues = [(d.id, p.nombre) for d, p in anticipada(id_factura)]
+            assert antes == despues
+            
+            t_antes = cronometrar(lambda: n_mas_uno(id_factura), repeticiones)
+            t_despues = cronometrar(lambda: anticipada(id_factura), repeticiones)
+            filas.append((tamano, consultas(db, lambda: n_mas_uno(id_factura)),
+                          consultas(db, lambda: anticipada(id_factura)),
+                          f"{t_antes * 1000:.2f}", f"{t_despues * 1000:.2f}", f"x{t_antes / t_despues:.1f}"))
+        db.close()
+    
+    imprimir_tabla("Abrir una factura con sus productos", filas,
+                   ["Líneas", "Consultas N+1", "Consultas include", "N+1 ms", "include ms", "Mejora"])
+
+
+if __name__ == "__main__":
+    main()
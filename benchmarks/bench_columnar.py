@@ -0,0 +1,86 @@
+"""Resumen mensual de ventas: filas y diccionarios frente a columnas (fetch_frame).
+
+"Antes" hace lo que hacían los reportes: fetch_all, un diccionario por venta
+(como generar_reporte_ventas) y la agregación por mes en Python. "Después"
+es ReporteController.resumen_ventas_por_periodo, que lee el resultado por
+columnas con fetch_frame y agrega con pandas. También se mide la lectura
+sola con fetch_all y con fetch_columns.
+
+Uso: python -m benchmarks.bench_columnar [ventas]   (por defecto 500.000)
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import base_temporal, imprimir_tabla, poblar_historial
+from controllers.reporte_controller import ReporteController
+from utils.helpers import format_date
+
+DESDE, HASTA = '0000-01-01', '9999-12-31'
+
+
+def resumen_por_filas(db):
+    rows = db.fetch_all('reporte.ventas', (DESDE, HASTA))
+    ventas = [{
+        'id': row['idVenta'],
+        'fecha': format_date(row['Fecha']),
+        'total': row['Total'],
+        'cliente': row['NombreCli'],
+        'empleado': row['NombreEmp']
+    } for row in rows]
+    meses = {}
+    for venta in ventas:
+        dia, mes, anio = venta['fecha'].split('/')
+        acumulado = meses.setdefault(f"{anio}-{mes}", [0, 0])
+        acumulado[0] += 1
+        acumulado[1] += venta['total']
+    return {mes: (n, total, round(total / n)) for mes, (n, total) in sorted(meses.items())}
+
+
+def resumen_por_columnas(reportes):
+    resumen = reportes.resumen_ventas_por_periodo(DESDE, HASTA, 'M')
+    return {str(periodo): (n, total, media) for periodo, n, total, media in resumen.itertuples()}
+
+
+def medir(funcion):
+    """(segundos, pico de memoria en MB, resultado)"""
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    del resultado
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / 2 ** 20, resultado
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    filas = []
+    with base_temporal() as db:
+        poblar_historial(db, ventas, proporcion_facturas=0)
+        reportes = ReporteController()
+        
+        casos = [
+            ("Lectura", lambda: db.fetch_all('reporte.ventas', (DESDE, HASTA)),
+             lambda: db.fetch_columns('reporte.ventas', (DESDE, HASTA))),
+            ("Resumen mensual", lambda: resumen_por_filas(db), lambda: resumen_por_columnas(reportes)),
+        ]
+        for nombre, antes, despues in casos:
+            t_antes, mem_antes, r_antes = medir(antes)
+            t_despues, mem_despues, r_despues = medir(despues)
+            if nombre == "Resumen mensual":
+                assert r_antes == r_despues
+            filas.append((nombre, f"{t_antes:.2f}", f"{t_despues:.2f}", f"x{t_antes / t_despues:.1f}",
+                          f"{mem_antes:.0f}", f"{mem_despues:.0f}"))
+    
+    imprimir_tabla(f"{ventas:,} ventas (segundos, pico de memoria en MB)", filas,
+                   ["Operación", "Filas s", "Columnas s", "Mejora", "Filas MB", "Columnas MB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Actualizaciones perdidas con varias terminales: escritura sin versión frente a concurrencia optimista.
+
+Varios hilos, cada uno con su conexión del pool (como terminales que
+comparten el archivo de la base de datos), modifican los mismos registros:
+
+- Stock: leen el producto, esperan un momento (el tiempo de un formulario)
+  y escriben el stock sumado. "Antes" escribe el valor absoluto con
+  'producto.update'; "Después" usa Producto.modify, que comprueba la versión
+  y reintenta. También se mide Producto.add_stock (UPDATE relativo).
+- Totales de factura: agregan una línea a una factura y recalculan sus
+  totales. "Antes" lee las líneas y escribe los totales sin versión;
+  "Después" usa FacturaController.recalcular_totales_factura. La lectura de
+  las líneas se hace más lenta en ambos casos para ensanchar la ventana.
+
+Al final se cuentan las escrituras perdidas comparando con lo esperado.
+
+Uso: python -m benchmarks.bench_concurrencia [terminales] [operaciones por terminal]
+     (por defecto 4 terminales y 200 operaciones)
+"""
+import random
+import sys
+import threading
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla, poblar_historial
+from controllers.factura_controller import FacturaController
+from database.models import ConflictError, DetalleFactura, Factura, Producto
+
+PRODUCTOS = 5
+FACTURAS = 5
+PAUSA = 0.001
+
+
+def en_paralelo(db, terminales, operacion, operaciones, semilla):
+    """Ejecuta `operacion(rnd)` desde varios hilos; devuelve (segundos, correctas, agotadas)"""
+    resultados = []
+    
+    def terminal(numero):
+        rnd = random.Random(semilla + numero)
+        db.connect()
+        correctas = agotadas = 0
+        try:
+            for _ in range(operaciones):
+                if operacion(rnd):
+                    correctas += 1
+                else:
+                    agotadas += 1
+        finally:
+            db.close()
+        resultados.append((correctas, agotadas))
+    
+    hilos = [threading.Thread(target=terminal, args=(i,)) for i in range(terminales)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    return segundos, sum(r[0] for r in resultados), sum(r[1] for r in resultados)
+
+
+class Contador:
+    """Cuenta por clave, thread-safe (lo que cada terminal cree haber escrito)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.valores = {}
+    
+    def sumar(self, clave, cantidad=1):
+        with self._lock:
+            self.valores[clave] = self.valores.get(clave, 0) + cantidad
+
+
+def stock_antes(db, sumas):
+    def operacion(rnd):
+        id_producto = rnd.randint(1, PRODUCTOS)
+        producto = Producto.from_row(db.fetch_one('producto.get_by_id', (id_producto,)))
+        time.sleep(PAUSA)
+        producto.stock += 1
+        db.execute_query('producto.update', producto._values() + (producto.id,))
+        sumas.sumar(id_producto)
+        return True
+    return operacion
+
+
+def stock_version(sumas):
+    def sumar_uno(producto):
+        time.sleep(PAUSA)
+        producto.stock += 1
+    
+    def operacion(rnd):
+        id_producto = rnd.randint(1, PRODUCTOS)
+        try:
+            Producto.modify(id_producto, sumar_uno)
+        except ConflictError:
+            return False
+        sumas.sumar(id_producto)
+        return True
+    return operacion
+
+
+def stock_relativo(sumas):
+    def operacion(rnd):
+        id_producto = rnd.randint(1, PRODUCTOS)
+        time.sleep(PAUSA)
+        Producto.add_stock(id_producto, 1)
+        sumas.sumar(id_producto)
+        return True
+    return operacion
+
+
+def agregar_linea(rnd, ids_factura):
+    id_factura = rnd.choice(ids_factura)
+    precio = rnd.randint(100, 5000)
+    DetalleFactura(cantidad=1, precio_unitario=precio, subtotal=precio,
+                   id_producto=rnd.randint(1, PRODUCTOS), id_factura=id_factura).save()
+    return id_factura
+
+
+def totales_antes(ids_factura):
+    def operacion(rnd):
+        id_factura = agregar_linea(rnd, ids_factura)
+        subtotal = sum(detalle.subtotal for detalle in DetalleFactura.get_by_factura(id_factura))
+        Factura.update_fields(id_factura, subtotal=subtotal, impuesto=0, total=subtotal)
+        return True
+    return operacion
+
+
+def totales_version(ids_factura):
+    controller = FacturaController()
+    
+    def operacion(rnd):
+        id_factura = agregar_linea(rnd, ids_factura)
+        return bool(controller.recalcular_totales_factura(id_factura))
+    return operacion
+
+
+def lectura_lenta():
+    """Hace más lenta la lectura de las líneas de factura (ventana entre lectura y escritura)"""
+    original = DetalleFactura.__dict__['get_by_factura']
+    
+    def get_by_factura(cls, id_factura, include=None):
+        detalles = original.__func__(cls, id_factura, include)
+        time.sleep(PAUSA)
+        return detalles
+    DetalleFactura.get_by_factura = classmethod(get_by_factura)
+    return lambda: setattr(DetalleFactura, 'get_by_factura', original)
+
+
+def stock_perdido(db, iniciales, sumas):
+    """Unidades sumadas por las terminales que no están en la base"""
+    perdidas = 0
+    for id_producto, inicial in iniciales.items():
+        actual = db.fetch_one('producto.get_by_id', (id_producto,))['Stock']
+        perdidas += inicial + sumas.valores.get(id_producto, 0) - actual
+    return perdidas
+
+
+def totales_erroneos(db, ids_factura):
+    """Facturas cuyo total no coincide con la suma de sus líneas"""
+    erroneos = 0
+    for id_factura in ids_factura:
+        lineas = sum(detalle.subtotal for detalle in DetalleFactura.get_by_factura(id_factura))
+        if db.fetch_one('factura.get_by_id', (id_factura,))['Total'] != lineas:
+            erroneos += 1
+    return erroneos
+
+
+def main():
+    terminales = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    operaciones = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    filas = []
+    with base_temporal() as db:
+        poblar_historial(db, 100, productos=PRODUCTOS, proporcion_facturas=0)
+        
+        for nombre, crear in (
+            ("Stock: lectura + escritura absoluta (antes)", lambda sumas: stock_antes(db, sumas)),
+            ("Stock: Producto.modify con versión", stock_version),
+            ("Stock: Producto.add_stock relativo", stock_relativo),
+        ):
+            iniciales = {row['idProducto']: row['Stock'] for row in db.fetch_all('producto.get_all')}
+            sumas = Contador()
+            db.reset_statement_stats()
+            segundos, correctas, agotadas = en_paralelo(db, terminales, crear(sumas), operaciones, semilla=1)
+            intentos = db.statement_stats().get('producto.get_by_id', {}).get('calls', 0)
+            reintentos = max(intentos - correctas - agotadas, 0) if 'modify' in nombre else 0
+            filas.append((nombre, correctas, reintentos, agotadas, f"{stock_perdido(db, iniciales, sumas)} uds.",
+                          f"{(correctas + agotadas) / segundos:,.0f}"))
+        
+        restaurar = lectura_lenta()
+        try:
+            for nombre, crear in (
+                ("Totales de factura sin versión (antes)", totales_antes),
+                ("Totales de factura con versión", totales_version),
+            ):
+                ids_factura = [Factura(fecha='2024-01-01', subtotal=0, impuesto=0, total=0).save()
+                               for _ in range(FACTURAS)]
+                db.reset_statement_stats()
+                segundos, correctas, agotadas = en_paralelo(db, terminales, crear(ids_factura), operaciones,
+                                                            semilla=2)
+                lecturas = db.statement_stats().get('factura.get_by_id', {}).get('calls', 0)
+                reintentos = max(lecturas - correctas - agotadas, 0)
+                filas.append((nombre, correctas, reintentos, agotadas,
+                              f"{totales_erroneos(db, ids_factura)}/{FACTURAS} facturas",
+                              f"{(correctas + agotadas) / segundos:,.0f}"))
+        finally:
+            restaurar()
+    
+    imprimir_tabla(f"{terminales} terminales x {operaciones} operaciones sobre {PRODUCTOS} productos "
+                   f"y {FACTURAS} facturas", filas,
+                   ["Escenario", "Correctas", "Reintentos", "Agotadas", "Perdido", "Ops/s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Latencia de las ventas mientras se hace una copia de seguridad.
+
+Una terminal registra ventas sin parar (VentaController.crear_venta)
+mientras otra hace la copia de la base de datos:
+
+- sin copia (referencia),
+- copia en un solo paso (Connection.backup con pages=-1, como un volcado
+  sin más),
+- BackupService (pasos de PagesPerStep páginas con pausa entre pasos,
+  quick_check y rotación).
+
+Se mide con los perfiles 'balanced' (WAL) y 'durable' (journal clásico,
+donde la lectura de la copia sí bloquea los COMMIT).
+
+Uso: python -m benchmarks.bench_copias [ventas del historial]   (por defecto 300.000)
+"""
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla, poblar_historial
+from controllers.venta_controller import VentaController
+from database.backup import BackupService
+
+
+def copia_un_paso(db, directorio):
+    origen = sqlite3.connect(db.db_path)
+    destino = sqlite3.connect(f"{directorio}/un_paso.db")
+    try:
+        origen.backup(destino, pages=-1)
+    finally:
+        destino.close()
+        origen.close()
+    return {}
+
+
+def latencias_durante(copia):
+    """Latencias (s) de las ventas registradas mientras dura copia(); devuelve (latencias, segundos, registro)"""
+    parar = threading.Event()
+    latencias = []
+    
+    def terminal():
+        controller = VentaController()
+        rnd = random.Random(7)
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            controller.crear_venta(rnd.randint(1, 100), 1, [{'cantidad': 1, 'precio_uni': 100, 'subtotal': 100,
+                                                             'id_producto': rnd.randint(1, 500)}])
+            latencias.append(time.perf_counter() - inicio)
+    
+    hilo = threading.Thread(target=terminal)
+    hilo.start()
+    time.sleep(0.2)
+    inicio = time.perf_counter()
+    try:
+        registro = copia()
+    finally:
+        segundos = time.perf_counter() - inicio
+        parar.set()
+        hilo.join()
+    return sorted(latencias), segundos, registro
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    filas = []
+    directorio = tempfile.mkdtemp(prefix='dcorelp_copias_')
+    try:
+        with base_temporal() as db:
+            poblar_historial(db, ventas, proporcion_facturas=0.3)
+            perfil_original = db.profile
+            servicio = BackupService(db, {'auto_backup': True, 'path': directorio, 'interval_days': 7, 'keep': 2,
+                                          'pages_per_step': 256, 'step_pause_ms': 20})
+            for perfil in ('balanced', 'durable'):
+                db.set_profile(perfil)
+                for nombre, copia in (
+                    ("Sin copia", lambda: time.sleep(1) or {}),
+                    ("Un solo paso (pages=-1)", lambda: copia_un_paso(db, directorio)),
+                    ("BackupService", servicio.backup),
+                ):
+                    latencias, segundos, registro = latencias_durante(copia)
+                    p99 = latencias[int(len(latencias) * 0.99)] if latencias else 0
+                    detalle = ""
+                    if registro:
+                        detalle = (f"{registro['bytes'] / 2 ** 20:.0f} MB, {registro['steps']} pasos, "
+                                   f"{registro['restarts']} reinicios{', final en un paso' if registro['single_step'] else ''}")
+                    filas.append((perfil, nombre, f"{segundos:.2f}", len(latencias), f"{p99 * 1000:.1f}",
+                                  f"{latencias[-1] * 1000:.1f}" if latencias else "-", detalle))
+            db.set_profile(perfil_original)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    
+    imprimir_tabla(f"Ventas durante la copia de un historial de {ventas:,} ventas (ms)", filas,
+                   ["Perfil", "Copia", "Copia s", "Ventas", "p99", "Máx", "Detalle"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Ventas por segundo con varias terminales: transacción por venta frente a hilo escritor con group commit.
+
+Cada productor es un hilo que llama a VentaController.crear_venta con 3
+líneas. "Antes" cada venta abre su transacción (BEGIN IMMEDIATE) y compite
+por el bloqueo de escritura; "Después" las ventas pasan por el hilo escritor,
+que confirma juntas las que llegan a la vez. Se mide con los perfiles
+'balanced' (WAL, synchronous=NORMAL) y 'durable' (fsync en cada COMMIT).
+
+Uso: python -m benchmarks.bench_escritor [ventas por productor]   (por defecto 300)
+"""
+import random
+import sys
+import threading
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla, poblar_historial
+from controllers.venta_controller import VentaController
+
+PRODUCTORES = (1, 4, 16)
+PRODUCTOS = 500
+
+
+def producir(db, productores, ventas):
+    """Ventas desde varios hilos a la vez; devuelve (segundos, creadas, fallidas)"""
+    controller = VentaController()
+    resultados = []
+    salida = threading.Barrier(productores + 1)
+    
+    def productor(numero):
+        rnd = random.Random(numero)
+        creadas = fallidas = 0
+        salida.wait()
+        for _ in range(ventas):
+            detalles = []
+            for _ in range(3):
+                precio = rnd.randint(100, 5000)
+                detalles.append({'cantidad': 1, 'precio_uni': precio, 'subtotal': precio,
+                                 'id_producto': rnd.randint(1, PRODUCTOS)})
+            if controller.crear_venta(rnd.randint(1, 100), rnd.randint(1, 5), detalles):
+                creadas += 1
+            else:
+                fallidas += 1
+        resultados.append((creadas, fallidas))
+    
+    hilos = [threading.Thread(target=productor, args=(i,)) for i in range(productores)]
+    for hilo in hilos:
+        hilo.start()
+    salida.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    return segundos, sum(r[0] for r in resultados), sum(r[1] for r in resultados)
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    filas = []
+    with base_temporal() as db:
+        poblar_historial(db, 0, productos=PRODUCTOS, clientes=100, empleados=5)
+        perfil_original = db.profile
+        for perfil in ('balanced', 'durable'):
+            db.set_profile(perfil)
+            escritor = db.writer
+            for productores in PRODUCTORES:
+                # Antes: sin hilo escritor, cada venta con su transacción
+                db.writer = None
+                t_antes, ok_antes, error_antes = producir(db, productores, ventas)
+                db.writer = escritor
+                lotes_antes = escritor.stats()
+                t_despues, ok_despues, error_despues = producir(db, productores, ventas)
+                lotes = escritor.stats()
+                media = (lotes['jobs'] - lotes_antes['jobs']) / max(lotes['batches'] - lotes_antes['batches'], 1)
+                filas.append((perfil, productores, f"{ok_antes / t_antes:,.0f}", error_antes,
+                              f"{ok_despues / t_despues:,.0f}", error_despues, f"{media:.1f}",
+                              f"x{(ok_despues / t_despues) / (ok_antes / t_antes):.1f}"))
+        db.set_profile(perfil_original)
+    
+    imprimir_tabla(f"{ventas} ventas por productor (ventas/s)", filas,
+                   ["Perfil", "Productores", "Por venta", "Fallidas", "Group commit", "Fallidas",
+                    "Ventas/lote", "Mejora"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Alta de productos y clientes en bloque: save() por fila frente a save_all / upsert_many.
+
+Inserta N productos y N clientes con save() fila a fila (una confirmación por
+fila, como antes), con save() dentro de una transacción y con save_all(), y
+actualiza los clientes con upsert_many(conflict_key='dni'). save() por fila
+se mide sobre una muestra y se extrapola, porque con una confirmación por
+fila tardaría minutos.
+
+Uso: python -m benchmarks.bench_escritura_bloque [filas]   (por defecto 100.000)
+"""
+import sys
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla
+from database.models import Categoria, Cliente, Producto
+
+MUESTRA_POR_FILA = 2000
+
+
+def productos(n, desde=0):
+    return [Producto(nombre=f"Producto {i}", precio=100 + i % 5000, stock=i % 300, id_categoria=1 + i % 5)
+            for i in range(desde, desde + n)]
+
+
+def clientes(n, desde=0):
+    return [Cliente(nombre=f"Cliente {i}", telefono=f"9{i:08d}", dni=f"{i:08d}", direccion=f"Calle {i}")
+            for i in range(desde, desde + n)]
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    resultados = []
+    with base_temporal() as db:
+        Categoria.save_all(Categoria(nombre=f"Categoría {i}") for i in range(5))
+        db.connect()
+        for nombre, generar, modelo in (("Producto", productos, Producto), ("Cliente", clientes, Cliente)):
+            # save() por fila, cada una confirmada por separado (muestra extrapolada)
+            muestra = generar(MUESTRA_POR_FILA, desde=10 * filas)
+            por_fila = medir(lambda: [obj.save() for obj in muestra]) / MUESTRA_POR_FILA * filas
+            
+            # save() por fila dentro de una única transacción
+            lote = generar(filas, desde=20 * filas)
+            def en_transaccion():
+                with db.transaction():
+                    for obj in lote:
+                        obj.save()
+            transaccion = medir(en_transaccion)
+            
+            # save_all: un executemany en una transacción, con IDs asignados
+            bloque = generar(filas)
+            save_all = medir(lambda: modelo.save_all(bloque))
+            assert modelo.get_by_id(bloque[-1].id).nombre == bloque[-1].nombre
+            
+            resultados.append((nombre, f"{por_fila:.1f} (estimado)", f"{transaccion:.2f}", f"{save_all:.2f}",
+                               f"x{por_fila / save_all:.0f}", f"{filas / save_all:,.0f}"))
+        
+        # upsert_many por DNI sobre los mismos clientes: todas las filas chocan y se actualizan
+        existentes = clientes(filas)
+        for cliente in existentes:
+            cliente.telefono = '000000000'
+        upsert = medir(lambda: Cliente.upsert_many(existentes, conflict_key='dni'))
+        actualizado = Cliente.get_by_id(existentes[-1].id)
+        assert actualizado.telefono == '000000000' and actualizado.dni == existentes[-1].dni
+        db.close()
+    
+    imprimir_tabla(f"Alta de {filas:,} registros (segundos)", resultados,
+                   ["Modelo", "save() por fila", "save() en transacción", "save_all()", "Mejora", "Filas/s"])
+    print(f"\nupsert_many(conflict_key='dni') de {filas:,} clientes existentes: {upsert:.2f} s "
+          f"({filas / upsert:,.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Consultas que ahorra el mapa de identidad al editar facturas.
+
+Reproduce lo que hace FacturaView al editar una factura: cargarla con sus
+productos, agregar productos (algunos ya presentes) y guardar la factura
+sustituyendo sus líneas. Se ejecuta con un mapa de tamaño 0 (cada búsqueda
+por ID va a la base, como antes) y con el mapa de la sesión de edición, y
+se cuentan las consultas con las estadísticas por sentencia.
+
+Uso: python -m benchmarks.bench_identidad [ediciones] [productos por factura]
+     (por defecto 200 ediciones de facturas con 10 productos)
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla, poblar_historial
+from controllers.factura_controller import FacturaController
+from controllers.producto_controller import ProductoController
+from database import identity
+
+
+def crear_facturas(facturas, productos, cantidad, rnd):
+    """Crea facturas con `productos` líneas cada una y devuelve sus IDs"""
+    ids = []
+    for _ in range(cantidad):
+        lineas = [{'id_producto': rnd.randint(1, 500), 'cantidad': rnd.randint(1, 5)}
+                  for _ in range(productos)]
+        ids.append(facturas.crear_factura_con_productos(None, lineas, 18, id_cliente=rnd.randint(1, 100),
+                                                        id_empleado=1))
+    return ids
+
+
+def editar(facturas, productos, id_factura, mapa, rnd):
+    """Una edición completa de factura con el mapa de identidad `mapa`"""
+    with identity.session(mapa):
+        factura = facturas.obtener_factura(id_factura)
+    lineas = []
+    for detalle in facturas.obtener_detalles_factura(id_factura):
+        with identity.session(mapa):
+            productos.obtener_producto(detalle.id_producto)
+        lineas.append({'id_producto': detalle.id_producto, 'cantidad': detalle.cantidad})
+    
+    # El usuario agrega tres productos que ya estaban y dos nuevos
+    nuevos = [linea['id_producto'] for linea in rnd.sample(lineas, 3)] + [rnd.randint(1, 500) for _ in range(2)]
+    for id_producto in nuevos:
+        with identity.session(mapa):
+            productos.obtener_producto(id_producto)
+        lineas.append({'id_producto': id_producto, 'cantidad': 1})
+    
+    with identity.session(mapa):
+        facturas.actualizar_factura(id_factura, estado='Pagada', observaciones=factura.observaciones)
+        facturas.reemplazar_productos_factura(id_factura, lineas, 18)
+
+
+def medir(db, facturas, productos, ids, tamano_mapa):
+    """Consultas por edición, segundos y estadísticas agregadas del mapa"""
+    rnd = random.Random(7)
+    totales = {'hits': 0, 'misses': 0}
+    db.reset_statement_stats()
+    inicio = time.perf_counter()
+    for id_factura in ids:
+        mapa = identity.IdentityMap(max_size=tamano_mapa)
+        editar(facturas, productos, id_factura, mapa, rnd)
+        for clave in totales:
+            totales[clave] += mapa.stats()[clave]
+    segundos = time.perf_counter() - inicio
+    llamadas = db.statement_stats()
+    lecturas_id = sum(s['calls'] for nombre, s in llamadas.items() if nombre.endswith('.get_by_id'))
+    consultas = sum(s['calls'] for s in llamadas.values())
+    return consultas / len(ids), lecturas_id / len(ids), segundos / len(ids) * 1000, totales
+
+
+def main():
+    ediciones = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lineas = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with base_temporal() as db:
+        poblar_historial(db, 1000, productos=500, clientes=100, proporcion_facturas=0)
+        db.connect()
+        facturas = FacturaController()
+        productos = ProductoController()
+        
+        filas = []
+        for nombre, tamano in (("Sin mapa (tamaño 0)", 0), ("Sesión de edición", identity.DEFAULT_MAX_SIZE)):
+            # Las mismas facturas de partida en ambos casos (la edición las modifica)
+            ids = crear_facturas(facturas, productos=lineas, cantidad=ediciones, rnd=random.Random(3))
+            consultas, por_id, ms, totales = medir(db, facturas, productos, ids, tamano)
+            filas.append((nombre, f"{consultas:.1f}", f"{por_id:.1f}", totales['hits'] // ediciones,
+                          totales['misses'] // ediciones, f"{ms:.2f}"))
+        db.close()
+    
+    imprimir_tabla(f"Edición de una factura de {lineas} productos (+5 agregados), media de {ediciones}",
+                   filas, ["Configuración", "Consultas", "get_by_id", "Aciertos", "Fallos", "ms"])
+
+
+if __name__ == "__main__":
+    main()
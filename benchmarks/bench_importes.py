@@ -0,0 +1,114 @@
+"""Reportes agregados y totales de carrito con importes REAL frente a céntimos INTEGER.
+
+"Antes" replica el esquema con columnas REAL (importes / 100.0) y el formateo
+anterior (float y limpieza de texto); "después" usa las columnas en céntimos
+y utils.money. También cuenta cuántos totales agregados difieren del valor
+exacto al sumar en coma flotante.
+
+Uso: python -m benchmarks.bench_importes [ventas]   (por defecto 200.000)
+"""
+import re
+import sys
+import time
+from decimal import Decimal
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from utils.money import cents_to_str, format_cents, to_cents
+
+# Agregados de ReporteController sobre la tabla indicada
+CONSULTAS = [
+    ("Total vendido por producto",
+     "SELECT idProducto, SUM(SubTotal) AS total FROM {detalle} GROUP BY idProducto"),
+    ("Total gastado por cliente",
+     "SELECT idCliente, SUM(Total) AS total FROM {venta} GROUP BY idCliente"),
+    ("Total vendido por día",
+     "SELECT Fecha, SUM(Total) AS total FROM {venta} GROUP BY Fecha"),
+]
+
+
+def format_currency_anterior(amount):
+    """Réplica del formateo anterior: todo pasa por float"""
+    if isinstance(amount, str):
+        amount = amount.replace('$', '').replace('S/', '').replace(',', '').strip()
+    return f"S/ {float(amount or 0):,.2f}"
+
+
+def crear_tablas_real(db):
+    """Copia de Venta y DetalleVenta con los importes como REAL en soles"""
+    with db.transaction():
+        db.execute_query("""CREATE TABLE VentaReal AS
+                            SELECT idVenta, Fecha, CAST(Total AS REAL) / 100 AS Total, idCliente
+                            FROM Venta""")
+        db.execute_query("""CREATE TABLE DetalleVentaReal AS
+                            SELECT idDetalleVenta, Cantidad, CAST(PrecioUni AS REAL) / 100 AS PrecioUni,
+                                   CAST(SubTotal AS REAL) / 100 AS SubTotal, idProducto, idVenta
+                            FROM DetalleVenta""")
+
+
+def reporte(db, consulta, formatear):
+    return [formatear(row['total']) for row in db.fetch_all(consulta)]
+
+
+def carrito_anterior(lineas):
+    """Réplica de VentaView.actualizar_tabla/actualizar_total con floats"""
+    filas = [(format_currency_anterior(precio), format_currency_anterior(precio * cantidad))
+             for precio, cantidad in lineas]
+    total = sum(precio * cantidad for precio, cantidad in lineas)
+    return filas, f"{total:.2f}"
+
+
+def carrito_centimos(lineas):
+    """Lo mismo con precios en céntimos"""
+    filas = [(format_cents(precio), format_cents(precio * cantidad)) for precio, cantidad in lineas]
+    total = sum(precio * cantidad for precio, cantidad in lineas)
+    return filas, cents_to_str(total)
+
+
+def diferencias(db, consulta):
+    """Grupos cuyo SUM en coma flotante no es exactamente el total en céntimos (hay que redondear)"""
+    exactos = {row[0]: row['total'] for row in db.fetch_all(consulta.format(detalle='DetalleVenta', venta='Venta'))}
+    flotantes = db.fetch_all(consulta.format(detalle='DetalleVentaReal', venta='VentaReal'))
+    return sum(1 for row in flotantes if Decimal(row['total']) * 100 != exactos[row[0]])
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    filas = []
+    with base_temporal() as db:
+        inicio = time.perf_counter()
+        poblar_historial(db, ventas)
+        crear_tablas_real(db)
+        print(f"Historial de {ventas} ventas generado en {time.perf_counter() - inicio:.1f} s")
+        
+        for nombre, consulta in CONSULTAS:
+            real = consulta.format(detalle='DetalleVentaReal', venta='VentaReal')
+            centimos = consulta.format(detalle='DetalleVenta', venta='Venta')
+            antes = cronometrar(lambda: reporte(db, real, format_currency_anterior), 3)
+            despues = cronometrar(lambda: reporte(db, centimos, format_cents), 3)
+            filas.append((nombre, f"{antes * 1000:.1f}", f"{despues * 1000:.1f}",
+                          f"x{antes / despues:.2f}", diferencias(db, consulta)))
+        
+        precios = [row['PrecioUni'] for row in db.fetch_all("SELECT PrecioUni FROM DetalleVenta LIMIT 100")]
+    
+    imprimir_tabla(f"Reportes agregados con {ventas} ventas (ms)", filas,
+                   ["Reporte", "REAL", "Céntimos", "Mejora", "Grupos a redondear (REAL)"])
+    
+    filas = []
+    for tamaño in (10, 100):
+        lineas_float = [(precio / 100, 3) for precio in precios[:tamaño]]
+        lineas_centimos = [(precio, 3) for precio in precios[:tamaño]]
+        repeticiones = 20000 // tamaño
+        antes = cronometrar(lambda: carrito_anterior(lineas_float), repeticiones)
+        despues = cronometrar(lambda: carrito_centimos(lineas_centimos), repeticiones)
+        filas.append((tamaño, f"{antes * 1e6:.1f}", f"{despues * 1e6:.1f}", f"x{antes / despues:.2f}"))
+    
+    textos = [cents_to_str(precio) for precio in precios]
+    antes_float = cronometrar(lambda: [float(re.sub(r'[^\d.]', '', t.replace(",", ".")) or "0") for t in textos], 200)
+    antes_centimos = cronometrar(lambda: [to_cents(t) for t in textos], 200)
+    filas.append((f"lectura de {len(textos)} precios", f"{antes_float * 1e6:.1f}",
+                  f"{antes_centimos * 1e6:.1f}", f"x{antes_float / antes_centimos:.2f}"))
+    imprimir_tabla("Total de carrito (µs por carrito)", filas, ["Líneas", "float", "Céntimos", "Mejora"])
+
+
+if __name__ == "__main__":
+    main()
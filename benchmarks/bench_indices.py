@@ -0,0 +1,62 @@
+"""Consultas de ReporteController y FacturaController con y sin índices secundarios.
+
+Uso: python -m benchmarks.bench_indices [ventas]   (por defecto 1.000.000)
+"""
+import datetime
+import sys
+import time
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from controllers.factura_controller import FacturaController
+from controllers.reporte_controller import ReporteController
+from controllers.venta_controller import VentaController
+from database.migrations import MIGRATIONS
+
+
+def consultas():
+    """Consultas a medir: (descripción, función)"""
+    hoy = datetime.date.today()
+    semana = ((hoy - datetime.timedelta(days=7)).isoformat(), hoy.isoformat())
+    mes = ((hoy - datetime.timedelta(days=30)).isoformat(), hoy.isoformat())
+    reportes = ReporteController()
+    facturas = FacturaController()
+    ventas = VentaController()
+    return [
+        ("Reporte de ventas (7 días)", lambda: reportes.generar_reporte_ventas(*semana)),
+        ("Productos más vendidos (30 días)", lambda: reportes.generar_reporte_productos_vendidos(*mes)),
+        ("Detalle de una venta", lambda: ventas.get_detalles_venta(12345)),
+        ("Ventas de un cliente", lambda: ventas.buscar_ventas_por_cliente(42)),
+        ("Facturas por fecha (30 días)", lambda: facturas.generar_reporte_facturas(*mes)),
+        ("Facturas por estado", lambda: facturas.generar_reporte_facturas(estado='Vencida')),
+        ("Facturas por fecha y estado", lambda: facturas.generar_reporte_facturas(*mes, estado='Pagada')),
+    ]
+
+
+def indices():
+    """Nombres de los índices creados por la primera migración"""
+    return [paso.split()[5] for paso in MIGRATIONS[0][2]]
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with base_temporal() as db:
+        inicio = time.perf_counter()
+        poblar_historial(db, ventas)
+        print(f"Historial de {ventas} ventas generado en {time.perf_counter() - inicio:.1f} s")
+
+        for nombre in indices():
+            db.execute_query(f"DROP INDEX IF EXISTS {nombre}")
+        sin_indices = [(nombre, cronometrar(funcion, 3)) for nombre, funcion in consultas()]
+
+        for paso in MIGRATIONS[0][2]:
+            db.execute_query(paso)
+        con_indices = [(nombre, cronometrar(funcion, 3)) for nombre, funcion in consultas()]
+
+    filas = [(nombre, f"{antes * 1000:.1f}", f"{despues * 1000:.1f}", f"x{antes / despues:.0f}")
+             for (nombre, antes), (_, despues) in zip(sin_indices, con_indices)]
+    imprimir_tabla(f"Tiempo por consulta con {ventas} ventas (ms)", filas,
+                   ["Consulta", "Sin índices", "Con índices", "Mejora"])
+
+
+if __name__ == "__main__":
+    main()
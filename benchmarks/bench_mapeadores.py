@@ -0,0 +1,73 @@
+"""Filas hidratadas por segundo: constructor con columnas por nombre frente a mapeador compilado.
+
+"Antes" reproduce el código anterior de los buscadores y de VentaController:
+Model(id=row['idX'], ...) por fila, y en las ventas con nombres dos
+asignaciones más. "Después" es Model.from_rows, que desempaqueta cada fila
+por posición con la función compilada una vez para esas columnas. Las filas
+se leen una sola vez; se mide solo la construcción de los objetos.
+
+Uso: python -m benchmarks.bench_mapeadores [filas]   (por defecto 300.000)
+"""
+import sys
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from database.models import Factura, Producto, Venta
+
+
+def ventas_antes(rows):
+    return [Venta(id=row['idVenta'], fecha=row['Fecha'], total=row['Total'],
+                  id_cliente=row['idCliente'], id_empleado=row['idEmpleado']) for row in rows]
+
+
+def ventas_con_nombres_antes(rows):
+    ventas = []
+    for row in rows:
+        venta = Venta(id=row['idVenta'], fecha=row['Fecha'], total=row['Total'],
+                      id_cliente=row['idCliente'], id_empleado=row['idEmpleado'])
+        venta.cliente_nombre = row['NombreCli']
+        venta.empleado_nombre = row['NombreEmp']
+        ventas.append(venta)
+    return ventas
+
+
+def facturas_antes(rows):
+    return [Factura(id=row['idFactura'], numero_factura=row['NumeroFactura'],
+                    fecha=row['Fecha'], subtotal=row['SubTotal'],
+                    impuesto=row['Impuesto'], total=row['Total'],
+                    estado=row['Estado'], observaciones=row['Observaciones'],
+                    id_venta=row['idVenta'], id_cliente=row['idCliente'],
+                    id_empleado=row['idEmpleado']) for row in rows]
+
+
+def productos_antes(rows):
+    return [Producto(id=row['idProducto'], nombre=row['NombrePro'], precio=row['Precio'],
+                     stock=row['Stock'], id_categoria=row['idCategoria']) for row in rows]
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    resultados = []
+    with base_temporal() as db:
+        poblar_historial(db, filas, productos=filas // 10, proporcion_facturas=1.0)
+        casos = [
+            ("Venta", db.fetch_all('venta.get_all'), ventas_antes, Venta),
+            ("Venta con nombres", db.fetch_all('venta.all_with_names'), ventas_con_nombres_antes, Venta),
+            ("Factura", db.fetch_all('factura.get_all'), facturas_antes, Factura),
+            ("Producto", db.fetch_all('producto.get_all'), productos_antes, Producto),
+        ]
+        for nombre, rows, antes, modelo in casos:
+            # Mismos valores por los dos caminos
+            primero, segundo = antes(rows[:1])[0], modelo.from_rows(rows[:1])[0]
+            assert primero._values() == segundo._values() and primero.id == segundo.id
+            
+            t_antes = cronometrar(lambda: antes(rows), 3)
+            t_despues = cronometrar(lambda: modelo.from_rows(rows), 3)
+            resultados.append((nombre, len(rows), f"{len(rows) / t_antes:,.0f}", f"{len(rows) / t_despues:,.0f}",
+                               f"x{t_antes / t_despues:.1f}"))
+    
+    imprimir_tabla("Hidratación de modelos (filas por segundo)", resultados,
+                   ["Consulta", "Filas", "Por nombre", "Compilado", "Mejora"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Memoria y tiempo de hidratación de modelos Venta y Factura.
+
+"Antes" reproduce los modelos anteriores: instancias con __dict__ y una
+llamada a DatabaseConnection() en cada __init__. "Después" son los modelos
+actuales con __slots__ y la conexión como atributo de clase. Las filas se
+leen una sola vez; se mide solo la construcción de los objetos.
+
+Uso: python -m benchmarks.bench_modelos [filas]   (por defecto 1.000.000)
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import base_temporal, imprimir_tabla, poblar_historial
+from database.connection import DatabaseConnection
+from database.models import Factura, Venta
+
+
+class VentaAnterior:
+    def __init__(self, id=None, fecha=None, total=None, id_cliente=None, id_empleado=None):
+        self.db = DatabaseConnection()
+        self.id = id
+        self.fecha = fecha
+        self.total = total
+        self.id_cliente = id_cliente
+        self.id_empleado = id_empleado
+
+
+class FacturaAnterior:
+    def __init__(self, id=None, numero_factura=None, fecha=None, subtotal=None,
+                 impuesto=None, total=None, estado='Pendiente', observaciones=None,
+                 id_venta=None, id_cliente=None, id_empleado=None):
+        self.db = DatabaseConnection()
+        self.id = id
+        self.numero_factura = numero_factura
+        self.fecha = fecha
+        self.subtotal = subtotal
+        self.impuesto = impuesto
+        self.total = total
+        self.estado = estado
+        self.observaciones = observaciones
+        self.id_venta = id_venta
+        self.id_cliente = id_cliente
+        self.id_empleado = id_empleado
+
+
+def hidratar_ventas(cls, rows):
+    return [cls(id=row['idVenta'], fecha=row['Fecha'], total=row['Total'],
+                id_cliente=row['idCliente'], id_empleado=row['idEmpleado']) for row in rows]
+
+
+def hidratar_facturas(cls, rows):
+    return [cls(id=row['idFactura'], numero_factura=row['NumeroFactura'],
+                fecha=row['Fecha'], subtotal=row['SubTotal'],
+                impuesto=row['Impuesto'], total=row['Total'],
+                estado=row['Estado'], observaciones=row['Observaciones'],
+                id_venta=row['idVenta'], id_cliente=row['idCliente'],
+                id_empleado=row['idEmpleado']) for row in rows]
+
+
+def medir(hidratar, cls, rows):
+    """Devuelve (segundos, pico de memoria en MB) de hidratar todas las filas"""
+    gc.collect()
+    inicio = time.perf_counter()
+    objetos = hidratar(cls, rows)
+    segundos = time.perf_counter() - inicio
+    del objetos
+    gc.collect()
+    
+    tracemalloc.start()
+    objetos = hidratar(cls, rows)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objetos
+    return segundos, pico / 2 ** 20
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    resultados = []
+    with base_temporal() as db:
+        inicio = time.perf_counter()
+        poblar_historial(db, filas, proporcion_facturas=1.0)
+        print(f"{filas} ventas y facturas generadas en {time.perf_counter() - inicio:.1f} s")
+        
+        casos = [
+            ("Venta", db.fetch_all('venta.get_all'), hidratar_ventas, VentaAnterior, Venta),
+            ("Factura", db.fetch_all('factura.get_all'), hidratar_facturas, FacturaAnterior, Factura),
+        ]
+        for nombre, rows, hidratar, anterior, actual in casos:
+            t_antes, mem_antes = medir(hidratar, anterior, rows)
+            t_despues, mem_despues = medir(hidratar, actual, rows)
+            resultados.append((nombre, len(rows), f"{t_antes:.2f}", f"{t_despues:.2f}",
+                               f"{mem_antes:.0f}", f"{mem_despues:.0f}",
+                               f"-{(1 - mem_despues / mem_antes) * 100:.0f}%"))
+            del rows
+    
+    imprimir_tabla("Hidratación de modelos (segundos, pico de memoria en MB)", resultados,
+                   ["Modelo", "Filas", "Antes s", "Después s", "Antes MB", "Después MB", "Memoria"])
+
+
+if __name__ == "__main__":
+    main()
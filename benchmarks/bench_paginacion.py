@@ -0,0 +1,80 @@
+"""Paginación por clave frente a OFFSET, y iter_all frente a get_all.
+
+Con un historial de 5 años mide el tiempo de páginas tempranas y tardías de
+facturas con LIMIT/OFFSET y con Factura.page(after=...), y el pico de
+memoria (tracemalloc) de recorrer todas las facturas con get_all() y con
+iter_all().
+
+Uso: python -m benchmarks.bench_paginacion [ventas]   (por defecto 500.000)
+"""
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from database.models import Factura
+
+TAMANO_PAGINA = 100
+OFFSET = "SELECT * FROM Factura ORDER BY Fecha DESC, idFactura DESC LIMIT ? OFFSET ?"
+
+
+def recorrer(objetos):
+    """Consume los objetos como lo haría un exportador; devuelve la suma de totales"""
+    total = 0
+    for factura in objetos:
+        total += factura.total
+    return total
+
+
+def pico_memoria(funcion):
+    """Devuelve (segundos, pico de memoria en MB) de ejecutar la función"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, segundos, pico / 2 ** 20
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with base_temporal() as db:
+        poblar_historial(db, ventas)
+        facturas = db.fetch_one("SELECT COUNT(*) FROM Factura")[0]
+        print(f"{facturas} facturas en 5 años")
+        
+        # Recorrer todas las páginas por clave y guardar la clave de inicio de cada una
+        claves = [None]
+        vistos = 0
+        inicio = time.perf_counter()
+        while True:
+            pagina = Factura.page(after=claves[-1], limit=TAMANO_PAGINA)
+            vistos += len(pagina)
+            if len(pagina) < TAMANO_PAGINA:
+                break
+            claves.append(pagina[-1].page_key())
+        recorrido = time.perf_counter() - inicio
+        print(f"{len(claves)} páginas por clave recorridas en {recorrido:.1f} s "
+              f"({vistos} facturas, {'completo' if vistos == facturas else 'INCOMPLETO'})")
+        
+        filas = []
+        for fraccion in (0.0, 0.25, 0.5, 0.9, 0.999):
+            numero = int((len(claves) - 1) * fraccion)
+            offset = cronometrar(lambda: db.fetch_all(OFFSET, (TAMANO_PAGINA, numero * TAMANO_PAGINA)), 5)
+            clave = cronometrar(lambda: Factura.page(after=claves[numero], limit=TAMANO_PAGINA), 5)
+            filas.append((numero + 1, f"{offset * 1000:.2f}", f"{clave * 1000:.2f}", f"x{offset / clave:.0f}"))
+        imprimir_tabla(f"Tiempo por página de {TAMANO_PAGINA} facturas (ms)", filas,
+                       ["Página", "LIMIT/OFFSET", "page(after=...)", "Mejora"])
+        
+        suma_lista, t_lista, mem_lista = pico_memoria(lambda: recorrer(Factura.get_all()))
+        suma_iter, t_iter, mem_iter = pico_memoria(lambda: recorrer(Factura.iter_all()))
+        assert suma_lista == suma_iter
+        imprimir_tabla("Recorrer todas las facturas", [
+            ("get_all()", f"{t_lista:.1f}", f"{mem_lista:.0f}"),
+            ("iter_all()", f"{t_iter:.1f}", f"{mem_iter:.1f}"),
+        ], ["Método", "Segundos", "Pico MB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Reportes por rango de fechas sobre Venta/DetalleVenta frente al resumen diario.
+
+"Antes" es la consulta anterior de generar_reporte_productos_vendidos (y su
+equivalente por día) agregando las líneas de venta; "después" lee
+ResumenVentaDiaria. También mide cuánto añaden los triggers a crear_venta.
+
+Uso: python -m benchmarks.bench_resumen [ventas]   (por defecto 500.000)
+"""
+import datetime
+import sys
+import time
+
+from benchmarks.bench_ventas import generar_detalles
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from controllers.reporte_controller import ReporteController
+from controllers.venta_controller import VentaController
+
+PRODUCTOS_ANTERIOR = """SELECT p.idProducto, p.NombrePro, c.NombreCat,
+                           SUM(d.Cantidad) as cantidad_vendida,
+                           SUM(d.SubTotal) as total_vendido
+                      FROM DetalleVenta d
+                      JOIN Producto p ON d.idProducto = p.idProducto
+                      JOIN Venta v ON d.idVenta = v.idVenta
+                      LEFT JOIN Categoria c ON p.idCategoria = c.idCategoria
+                      WHERE v.Fecha BETWEEN ? AND ?
+                      GROUP BY p.idProducto
+                      ORDER BY cantidad_vendida DESC
+                      LIMIT ?"""
+
+DIARIO_ANTERIOR = """SELECT v.Fecha, SUM(d.Cantidad) as unidades, SUM(d.SubTotal) as ingresos
+                    FROM DetalleVenta d
+                    JOIN Venta v ON d.idVenta = v.idVenta
+                    WHERE v.Fecha BETWEEN ? AND ?
+                    GROUP BY v.Fecha
+                    ORDER BY v.Fecha DESC"""
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    hoy = datetime.date.today()
+    filas = []
+    with base_temporal() as db:
+        inicio = time.perf_counter()
+        poblar_historial(db, ventas)
+        print(f"Historial de {ventas} ventas generado en {time.perf_counter() - inicio:.1f} s")
+        
+        reportes = ReporteController()
+        for dias in (7, 30, 365, 5 * 365):
+            rango = ((hoy - datetime.timedelta(days=dias)).isoformat(), hoy.isoformat())
+            antes = cronometrar(lambda: db.fetch_all(PRODUCTOS_ANTERIOR, rango + (10,)), 3)
+            despues = cronometrar(lambda: reportes.generar_reporte_productos_vendidos(*rango, 10), 3)
+            filas.append(("Productos más vendidos", dias, f"{antes * 1000:.1f}", f"{despues * 1000:.1f}",
+                          f"x{antes / despues:.1f}"))
+            antes = cronometrar(lambda: db.fetch_all(DIARIO_ANTERIOR, rango), 3)
+            despues = cronometrar(lambda: reportes.generar_reporte_ventas_diarias(*rango), 3)
+            filas.append(("Ventas por día", dias, f"{antes * 1000:.1f}", f"{despues * 1000:.1f}",
+                          f"x{antes / despues:.1f}"))
+        
+        inicio = time.perf_counter()
+        reportes.reconstruir_resumen_ventas()
+        print(f"Reconstrucción completa del resumen: {time.perf_counter() - inicio:.1f} s")
+        
+        controller = VentaController()
+        detalles = generar_detalles(10)
+        for detalle in detalles:
+            detalle['id_producto'] = detalle['id_producto'] * 7
+        repeticiones = 500
+        por_venta = cronometrar(lambda: controller.crear_venta(1, 1, detalles), repeticiones)
+    
+    imprimir_tabla(f"Tiempo por reporte con {ventas} ventas (ms)", filas,
+                   ["Reporte", "Días", "Venta/DetalleVenta", "Resumen", "Mejora"])
+    print(f"\ncrear_venta con 10 líneas (con triggers del resumen): {por_venta * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
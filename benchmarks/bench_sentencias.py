@@ -0,0 +1,106 @@
+"""Caché de sentencias preparadas y coste de las estadísticas por sentencia.
+
+Ejecuta en bucle las consultas de lectura del registro (las que usan las
+pantallas y reportes) con una caché de sentencias más pequeña que el registro
+(se vuelven a preparar continuamente) y con la caché dimensionada según el
+registro, y mide cuánto añade registrar las estadísticas en cada llamada.
+
+Uso: python -m benchmarks.bench_sentencias [rondas] [archivo.json]
+     (por defecto 200 rondas; el JSON recibe las estadísticas por sentencia)
+"""
+import datetime
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import base_temporal, cronometrar, imprimir_tabla, poblar_historial
+from database import statements
+
+
+def carga_de_trabajo():
+    """Sentencias de lectura ligeras del registro con parámetros válidos"""
+    hoy = datetime.date.today()
+    desde = (hoy - datetime.timedelta(days=7)).isoformat()
+    hoy = hoy.isoformat()
+    return [
+        ('producto.get_by_id', (7,)),
+        ('cliente.get_by_id', (11,)),
+        ('empleado.get_by_id', (3,)),
+        ('categoria.get_by_id', (2,)),
+        ('categoria.get_nombre', (2,)),
+        ('venta.get_by_id', (100,)),
+        ('venta.with_names', (100,)),
+        ('detalleventa.get_by_venta', (100,)),
+        ('detalleventa.get_by_venta.producto', (100,)),
+        ('factura.get_by_id', (50,)),
+        ('factura.get_by_numero', ('FAC-000050',)),
+        ('factura.with_names', (50,)),
+        ('factura.secuencia_get', ('FAC-',)),
+        ('detallefactura.get_by_factura', (50,)),
+        ('venta.by_fecha_with_names', (hoy, hoy)),
+        ('reporte.ventas_diarias', (desde, hoy)),
+        ('reporte.productos_vendidos', (desde, hoy, 10)),
+        ('venta.facturacion.where.cliente,desde', {'cliente': 11, 'desde': desde}),
+        ('factura.reporte.where.desde,hasta,estado', {'desde': desde, 'hasta': hoy, 'estado': 'Pagada'}),
+        ('schema.has_table', ('ProductoFts',)),
+    ] + [(f'search.{tabla}', ('"ab"*', 10)) for tabla in ('Producto', 'Cliente', 'Empleado')]
+
+
+def con_cache(ruta, tamano, consultas, rondas):
+    """Tiempo por consulta (ms) en una conexión con la caché del tamaño indicado"""
+    conn = sqlite3.connect(ruta, cached_statements=tamano)
+    try:
+        def ejecutar():
+            for _ in range(rondas):
+                for nombre, parametros in consultas:
+                    conn.execute(statements.STATEMENTS[nombre], parametros).fetchall()
+        return cronometrar(ejecutar) / (rondas * len(consultas)) * 1000
+    finally:
+        conn.close()
+
+
+def main():
+    rondas = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    archivo = sys.argv[2] if len(sys.argv) > 2 else None
+    consultas = carga_de_trabajo()
+    filas = []
+    
+    with base_temporal() as db:
+        poblar_historial(db, 20000)
+        
+        # Caché de solo 8 sentencias frente a la dimensionada según el registro
+        pequena = con_cache(db.db_path, 8, consultas, rondas)
+        registro = con_cache(db.db_path, statements.cache_size(), consultas, rondas)
+        filas.append(("Caché de 8 sentencias", f"{pequena:.3f}", "-"))
+        filas.append((f"Caché del registro ({statements.cache_size()})", f"{registro:.3f}",
+                      f"x{pequena / registro:.2f}"))
+        
+        # La misma carga a través de DatabaseConnection, sin y con estadísticas
+        def por_nombre():
+            for _ in range(rondas):
+                for nombre, parametros in consultas:
+                    db.fetch_all(nombre, parametros)
+        
+        db.connect()
+        statements.stats.enabled = False
+        sin_estadisticas = cronometrar(por_nombre) / (rondas * len(consultas)) * 1000
+        statements.stats.enabled = True
+        db.reset_statement_stats()
+        inicio = time.perf_counter()
+        por_nombre()
+        con_estadisticas = (time.perf_counter() - inicio) / (rondas * len(consultas)) * 1000
+        db.close()
+        filas.append(("DatabaseConnection sin estadísticas", f"{sin_estadisticas:.3f}", "-"))
+        filas.append(("DatabaseConnection con estadísticas", f"{con_estadisticas:.3f}",
+                      f"+{(con_estadisticas - sin_estadisticas) * 1000:.1f} µs"))
+        
+        if archivo:
+            db.dump_statement_stats(archivo)
+            print(f"Estadísticas por sentencia guardadas en {archivo}")
+    
+    imprimir_tabla(f"Tiempo medio por consulta ({len(consultas)} sentencias, {rondas} rondas, ms)",
+                   filas, ["Configuración", "ms/consulta", "Diferencia"])
+
+
+if __name__ == "__main__":
+    main()
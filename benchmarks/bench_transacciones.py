@@ -0,0 +1,46 @@
+"""Latencia de escritura: commit por sentencia (antes) frente a transaction() (después).
+
+Uso: python -m benchmarks.bench_transacciones [filas]
+"""
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla
+
+
+def insertar_commit_por_fila(db_path, filas):
+    """Comportamiento anterior: un commit (y un fsync) por cada INSERT"""
+    conn = sqlite3.connect(db_path)
+    inicio = time.perf_counter()
+    for i in range(filas):
+        conn.execute("INSERT INTO Categoria (NombreCat, Descripcion) VALUES (?, ?)", (f"Cat {i}", None))
+        conn.commit()
+    total = time.perf_counter() - inicio
+    conn.close()
+    return total
+
+
+def insertar_en_transaccion(db, filas):
+    """Comportamiento nuevo: todas las filas en una unidad de trabajo"""
+    inicio = time.perf_counter()
+    with db.transaction():
+        for i in range(filas):
+            db.execute_query("INSERT INTO Categoria (NombreCat, Descripcion) VALUES (?, ?)", (f"Cat {i}", None))
+    return time.perf_counter() - inicio
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with base_temporal() as db:
+        antes = insertar_commit_por_fila(db.db_path, filas)
+        despues = insertar_en_transaccion(db, filas)
+
+    imprimir_tabla(f"Escritura de {filas} filas en base de datos en disco", [
+        ("commit por sentencia", f"{antes * 1000:.1f}", f"{antes / filas * 1e6:.1f}"),
+        ("transaction()", f"{despues * 1000:.1f}", f"{despues / filas * 1e6:.1f}"),
+    ], ["Modo", "Total (ms)", "Por operación (µs)"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Ventas por segundo de VentaController.crear_venta con tickets de 1, 10 y 100 líneas.
+
+Compara la implementación anterior (1 + 2N sentencias, cada una con su commit)
+con la transacción única que usa executemany y un UPDATE de stock por conjunto.
+Ambas se miden con el perfil de conexión configurado.
+
+Uso: python -m benchmarks.bench_ventas [ventas_por_tamaño]
+"""
+import datetime
+import sys
+import time
+
+from benchmarks.common import base_temporal, imprimir_tabla
+from controllers.venta_controller import VentaController
+
+TAMAÑOS_TICKET = (1, 10, 100)
+
+
+def preparar_catalogo(db, productos=200):
+    """Crea un cliente, un empleado y un catálogo de productos con stock suficiente"""
+    with db.transaction():
+        db.execute_query("INSERT INTO Cliente (NombreCli, Dni) VALUES (?, ?)", ("Cliente Bench", "00000001"))
+        db.execute_query("INSERT INTO Empleado (NombreEmp, CorreoEmp) VALUES (?, ?)", ("Empleado Bench", "bench@dcorelp.com"))
+        db.execute_many("INSERT INTO Producto (NombrePro, Precio, Stock, idCategoria) VALUES (?, ?, ?, NULL)",
+                        [(f"Producto {i}", 1050, 10 ** 9) for i in range(productos)])
+
+
+def generar_detalles(lineas):
+    return [{
+        'id_producto': i + 1,
+        'cantidad': 2,
+        'precio_uni': 1050,
+        'subtotal': 2100
+    } for i in range(lineas)]
+
+
+def crear_venta_anterior(db, id_cliente, id_empleado, detalles):
+    """Réplica de la implementación anterior: un commit por sentencia"""
+    total = sum(detalle['subtotal'] for detalle in detalles)
+    fecha = datetime.date.today().isoformat()
+    cursor = db.execute_query("INSERT INTO Venta (Fecha, Total, idEmpleado, idCliente) VALUES (?, ?, ?, ?)",
+                              (fecha, total, id_empleado, id_cliente))
+    id_venta = cursor.lastrowid
+    for detalle in detalles:
+        db.execute_query("INSERT INTO DetalleVenta (Cantidad, PrecioUni, SubTotal, idProducto, idVenta) VALUES (?, ?, ?, ?, ?)",
+                         (detalle['cantidad'], detalle['precio_uni'], detalle['subtotal'], detalle['id_producto'], id_venta))
+        db.execute_query("UPDATE Producto SET Stock = Stock - ? WHERE idProducto = ?",
+                         (detalle['cantidad'], detalle['id_producto']))
+    return id_venta
+
+
+def medir(funcion, ventas):
+    inicio = time.perf_counter()
+    for _ in range(ventas):
+        funcion()
+    return ventas / (time.perf_counter() - inicio)
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    filas = []
+    for lineas in TAMAÑOS_TICKET:
+        detalles = generar_detalles(lineas)
+        with base_temporal() as db:
+            preparar_catalogo(db, max(TAMAÑOS_TICKET))
+            antes = medir(lambda: crear_venta_anterior(db, 1, 1, detalles), ventas)
+        with base_temporal() as db:
+            preparar_catalogo(db, max(TAMAÑOS_TICKET))
+            controller = VentaController()
+            despues = medir(lambda: controller.crear_venta(1, 1, detalles), ventas)
+        filas.append((lineas, f"{antes:.1f}", f"{despues:.1f}", f"x{despues / antes:.1f}"))
+
+    imprimir_tabla(f"Ventas por segundo ({ventas} ventas por tamaño de ticket)", filas,
+                   ["Líneas", "Antes", "Después", "Mejora"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import datetime
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from database.connection import DatabaseConnection
+
+
+@contextmanager
+def base_temporal(nombre='bench.db'):
+    """Apunta DatabaseConnection a una base de datos nueva en un directorio temporal"""
+    db = DatabaseConnection()
+    ruta_original = db.db_path
+    directorio = tempfile.mkdtemp(prefix='dcorelp_bench_')
+    try:
+        db.set_database_path(os.path.join(directorio, nombre))
+        # Las consultas lentas de la prueba no van al registro de la aplicación
+        db.slow_log.path = os.path.join(directorio, 'slow_queries.jsonl')
+        db.create_tables()
+        yield db
+    finally:
+        db.close_all()
+        db.set_database_path(ruta_original)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def poblar_historial(db, ventas, dias=5 * 365, productos=500, clientes=1000, empleados=20,
+                     proporcion_facturas=0.5, semilla=42, lote=50000):
+    """Genera un historial sintético de ventas, detalles y facturas repartido en `dias` días (importes en céntimos)"""
+    rnd = random.Random(semilla)
+    hoy = datetime.date.today()
+    fechas = [(hoy - datetime.timedelta(days=d)).isoformat() for d in range(dias)]
+    estados = ['Pendiente', 'Pagada', 'Cancelada', 'Vencida']
+
+    with db.use_profile('bulk-load'), db.transaction():
+        db.execute_many("INSERT INTO Categoria (NombreCat, Descripcion) VALUES (?, ?)",
+                        [(f"Categoría {i}", None) for i in range(10)])
+        db.execute_many("INSERT INTO Producto (NombrePro, Precio, Stock, idCategoria) VALUES (?, ?, ?, ?)",
+                        [(f"Producto {i}", rnd.randint(100, 50000), 10 ** 6, i % 10 + 1)
+                         for i in range(productos)])
+        db.execute_many("INSERT INTO Cliente (NombreCli, TelefonoCli, Dni, DireccionClie) VALUES (?, ?, ?, ?)",
+                        [(f"Cliente {i}", f"9{i:08d}", f"{i:08d}", f"Calle {i}") for i in range(clientes)])
+        db.execute_many("INSERT INTO Empleado (NombreEmp, CorreoEmp, Telefono, DireccionEmp) VALUES (?, ?, ?, ?)",
+                        [(f"Empleado {i}", f"empleado{i}@dcorelp.com", None, None) for i in range(empleados)])
+
+        id_factura = 0
+        for inicio in range(0, ventas, lote):
+            filas_venta, filas_detalle, filas_factura = [], [], []
+            for id_venta in range(inicio + 1, min(inicio + lote, ventas) + 1):
+                fecha = fechas[rnd.randrange(dias)]
+                id_cliente = rnd.randint(1, clientes)
+                id_empleado = rnd.randint(1, empleados)
+                total = 0
+                for _ in range(rnd.randint(1, 3)):
+                    cantidad = rnd.randint(1, 5)
+                    precio = rnd.randint(100, 50000)
+                    subtotal = precio * cantidad
+                    total += subtotal
+                    filas_detalle.append((cantidad, precio, subtotal, rnd.randint(1, productos), id_venta))
+                filas_venta.append((id_venta, fecha, total, id_empleado, id_cliente))
+                if rnd.random() < proporcion_facturas:
+                    id_factura += 1
+                    filas_factura.append((id_factura, f"FAC-{id_factura:06d}", fecha, total, 0, total,
+                                          rnd.choice(estados), None, id_venta, id_cliente, id_empleado))
+            db.execute_many("INSERT INTO Venta (idVenta, Fecha, Total, idEmpleado, idCliente) VALUES (?, ?, ?, ?, ?)",
+                            filas_venta)
+            db.execute_many("INSERT INTO DetalleVenta (Cantidad, PrecioUni, SubTotal, idProducto, idVenta) VALUES (?, ?, ?, ?, ?)",
+                            filas_detalle)
+            db.execute_many("""INSERT INTO Factura (idFactura, NumeroFactura, Fecha, SubTotal, Impuesto, Total,
+                               Estado, Observaciones, idVenta, idCliente, idEmpleado)
+                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", filas_factura)
+
+
+def cronometrar(funcion, repeticiones=1):
+    """Ejecuta la función y devuelve el tiempo medio por repetición en segundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def imprimir_tabla(titulo, filas, encabezados):
+    """Imprime una tabla simple de resultados"""
+    print(f"\n{titulo}")
+    anchos = [max(len(str(h)), *(len(str(f[i])) for f in filas)) for i, h in enumerate(encabezados)]
+    print("  ".join(str(h).ljust(a) for h, a in zip(encabezados, anchos)))
+    for fila in filas:
+        print("  ".join(str(v).ljust(a) for v, a in zip(fila, anchos)))
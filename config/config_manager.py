@@ -37,7 +37,16 @@ class ConfigManager:
         
         self.config['Database'] = {
             'Type': 'sqlite',
-            'Path': 'data/dcorelp.db'
+            'Path': 'data/dcorelp.db',
+            'Profile': 'balanced',
+            'PoolSize': '5',
+            'PoolTimeout': '30',
+            'GroupCommit': 'true',
+            'GroupCommitMaxBatch': '64',
+            'GroupCommitWindowMs': '0',
+            'BusyRetries': '3',
+            'BusyRetryBaseMs': '20',
+            'BusyRetryMaxMs': '1000'
         }
         
         self.config['Stock'] = {
@@ -54,7 +63,23 @@ class ConfigManager:
         self.config['Backup'] = {
             'AutoBackup': 'true',
             'BackupPath': 'backups/',
-            'BackupInterval': '7'
+            'BackupInterval': '7',
+            'Keep': '5',
+            'PagesPerStep': '256',
+            'StepPauseMs': '20'
+        }
+        
+        self.config['Archive'] = {
+            'Path': 'data/archive/',
+            'KeepYears': '2'
+        }
+        
+        self.config['SlowLog'] = {
+            'Enabled': 'true',
+            'ThresholdMs': '100',
+            'Path': 'logs/slow_queries.jsonl',
+            'MaxKB': '1024',
+            'Backups': '3'
         }
         
         self.save_config()
@@ -103,6 +128,56 @@ class ConfigManager:
             'decimal_places': int(self.get('Currency', 'DecimalPlaces', '2'))
         }
     
+    def get_database_config(self) -> Dict[str, Any]:
+        """Obtiene la configuración de la base de datos, del pool de conexiones, del hilo escritor y de los reintentos"""
+        busy_timeout = self.get('Database', 'BusyTimeoutMs')
+        return {
+            'path': self.get('Database', 'Path', 'data/dcorelp.db'),
+            'profile': self.get('Database', 'Profile', 'balanced'),
+            'pool_size': int(self.get('Database', 'PoolSize', '5')),
+            'pool_timeout': float(self.get('Database', 'PoolTimeout', '30')),
+            'group_commit': self.config.getboolean('Database', 'GroupCommit', fallback=True),
+            'group_commit_max_batch': int(self.get('Database', 'GroupCommitMaxBatch', '64')),
+            'group_commit_window_ms': float(self.get('Database', 'GroupCommitWindowMs', '0')),
+            # Sin BusyTimeoutMs se usa el busy_timeout del perfil de rendimiento
+            'busy_timeout_ms': int(busy_timeout) if busy_timeout else None,
+            'busy_retries': int(self.get('Database', 'BusyRetries', '3')),
+            'busy_retry_base_ms': float(self.get('Database', 'BusyRetryBaseMs', '20')),
+            'busy_retry_max_ms': float(self.get('Database', 'BusyRetryMaxMs', '1000'))
+        }
+    
+    def set_database_profile(self, profile: str):
+        """Establece el perfil de rendimiento de SQLite (durable, balanced, bulk-load)"""
+        self.set('Database', 'Profile', profile)
+    
+    def get_backup_config(self) -> Dict[str, Any]:
+        """Obtiene la configuración de las copias de seguridad (BackupInterval en días)"""
+        return {
+            'auto_backup': self.config.getboolean('Backup', 'AutoBackup', fallback=True),
+            'path': self.get('Backup', 'BackupPath', 'backups/'),
+            'interval_days': float(self.get('Backup', 'BackupInterval', '7')),
+            'keep': int(self.get('Backup', 'Keep', '5')),
+            'pages_per_step': int(self.get('Backup', 'PagesPerStep', '256')),
+            'step_pause_ms': float(self.get('Backup', 'StepPauseMs', '20'))
+        }
+    
+    def get_archive_config(self) -> Dict[str, Any]:
+        """Obtiene la configuración del archivo anual (KeepYears: años que quedan en la base activa)"""
+        return {
+            'path': self.get('Archive', 'Path', 'data/archive/'),
+            'keep_years': int(self.get('Archive', 'KeepYears', '2'))
+        }
+    
+    def get_slowlog_config(self) -> Dict[str, Any]:
+        """Obtiene la configuración del registro de consultas lentas (umbral en milisegundos)"""
+        return {
+            'enabled': self.config.getboolean('SlowLog', 'Enabled', fallback=True),
+            'threshold_ms': float(self.get('SlowLog', 'ThresholdMs', '100')),
+            'path': self.get('SlowLog', 'Path', 'logs/slow_queries.jsonl'),
+            'max_kb': int(self.get('SlowLog', 'MaxKB', '1024')),
+            'backups': int(self.get('SlowLog', 'Backups', '3'))
+        }
+    
     def get_report_encoding(self) -> str:
         """Obtiene la codificación para reportes"""
         return self.get('Reports', 'Encoding', 'utf-8-sig')
@@ -34,11 +34,9 @@ class CategoriaController:
         return False
     
     def search_categorias(self, term):
-        """Busca categorías por término"""
-        # Implementar búsqueda en la base de datos
+        """Busca categorías por nombre o descripción (texto completo, por prefijo)"""
         from database.connection import DatabaseConnection
+        from database.search import search
         db = DatabaseConnection()
-        query = "SELECT * FROM Categoria WHERE NombreCat LIKE ? OR Descripcion LIKE ?"
-        search_term = f"%{term}%"
-        rows = db.fetch_all(query, (search_term, search_term))
-        return [Categoria(id=row['idCategoria'], nombre=row['NombreCat'], descripcion=row['Descripcion']) for row in rows]
\ No newline at end of file
+        rows = search(db, 'Categoria', term)
+        return Categoria.from_rows(rows)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from database.models import Cliente
 from database.connection import DatabaseConnection
+from database.search import search
 
 class ClienteController:
     def __init__(self):
@@ -41,28 +42,13 @@ class ClienteController:
         return False
     
     def search_clientes(self, term):
-        """Busca clientes por término"""
+        """Busca clientes por nombre, DNI o teléfono (texto completo, por prefijo)"""
         db = DatabaseConnection()
-        query = """SELECT * FROM Cliente 
-                 WHERE NombreCli LIKE ? 
-                 OR Dni LIKE ?
-                 OR TelefonoCli LIKE ?"""
-        search_term = f"%{term}%"
-        rows = db.fetch_all(query, (search_term, search_term, search_term))
-        return [Cliente(id=row['idCliente'], nombre=row['NombreCli'], 
-                      telefono=row['TelefonoCli'], dni=row['Dni'], 
-                      direccion=row['DireccionClie']) for row in rows]
+        rows = search(db, 'Cliente', term)
+        return Cliente.from_rows(rows)
     
     def get_clientes_frecuentes(self, limite=10):
         """Obtiene los clientes más frecuentes (con más compras)"""
         db = DatabaseConnection()
-        query = """SELECT c.*, COUNT(v.idVenta) as total_compras 
-                 FROM Cliente c
-                 LEFT JOIN Venta v ON c.idCliente = v.idCliente
-                 GROUP BY c.idCliente
-                 ORDER BY total_compras DESC
-                 LIMIT ?"""
-        rows = db.fetch_all(query, (limite,))
-        return [Cliente(id=row['idCliente'], nombre=row['NombreCli'], 
-                      telefono=row['TelefonoCli'], dni=row['Dni'], 
-                      direccion=row['DireccionClie']) for row in rows]
\ No newline at end of file
+        rows = db.fetch_all('cliente.frecuentes', (limite,))
+        return Cliente.from_rows(rows)
\ No newline at end of file
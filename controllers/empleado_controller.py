@@ -1,5 +1,6 @@
 from database.models import Empleado
 from database.connection import DatabaseConnection
+from database.search import search
 
 class EmpleadoController:
     def __init__(self):
@@ -41,14 +42,7 @@ class EmpleadoController:
         return False
     
     def search_empleados(self, term):
-        """Busca empleados por término"""
+        """Busca empleados por nombre, correo o teléfono (texto completo, por prefijo)"""
         db = DatabaseConnection()
-        query = """SELECT * FROM Empleado 
-                 WHERE NombreEmp LIKE ? 
-                 OR CorreoEmp LIKE ?
-                 OR Telefono LIKE ?"""
-        search_term = f"%{term}%"
-        rows = db.fetch_all(query, (search_term, search_term, search_term))
-        return [Empleado(id=row['idEmpleado'], nombre=row['NombreEmp'], 
-                       correo=row['CorreoEmp'], telefono=row['Telefono'], 
-                       direccion=row['DireccionEmp']) for row in rows]
\ No newline at end of file
+        rows = search(db, 'Empleado', term)
+        return Empleado.from_rows(rows)
\ No newline at end of file
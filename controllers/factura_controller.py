@@ -1,6 +1,10 @@
-from database.models import Factura, Cliente, Empleado, Venta, DetalleFactura, Producto
+from database.models import ConflictError, Factura, Cliente, Empleado, Venta, DetalleFactura, Producto
 from database.connection import DatabaseConnection
+from database.busy import DatabaseBusyError
+from database import identity, statements
+from database.search import search
 from utils.helpers import export_to_csv, export_to_excel, generate_invoice_pdf, format_currency, format_date
+from utils.money import apply_percentage, from_cents
 import datetime
 
 class FacturaController:
@@ -10,7 +14,7 @@ class FacturaController:
     def crear_factura(self, numero_factura, subtotal, impuesto, total, 
                      estado='Pendiente', observaciones=None, id_venta=None, 
                      id_cliente=None, id_empleado=None):
-        """Crea una nueva factura"""
+        """Crea una nueva factura con importes en céntimos (con numero_factura=None se asigna el siguiente de la serie)"""
         try:
             factura = Factura(
                 numero_factura=numero_factura,
@@ -25,38 +29,42 @@ class FacturaController:
                 id_empleado=id_empleado
             )
             return factura.save()
+        except DatabaseBusyError:
+            raise
         except Exception as e:
             print(f"Error al crear factura: {e}")
             return None
     
     def actualizar_factura(self, id_factura, numero_factura=None, subtotal=None, 
                           impuesto=None, total=None, estado=None, observaciones=None,
-                          id_venta=None, id_cliente=None, id_empleado=None):
-        """Actualiza una factura existente"""
+                          id_venta=None, id_cliente=None, id_empleado=None, version=None):
+        """Actualiza una factura existente.
+        
+        Solo se escriben los campos indicados (los distintos de None), con un
+        único UPDATE de esas columnas y sin leer antes la factura. Con `version`
+        (la leída al abrir la factura para editarla) se lanza ConflictError si
+        otra terminal la modificó desde entonces.
+        """
         try:
-            factura = Factura.get_by_id(id_factura)
-            if factura:
-                if numero_factura is not None:
-                    factura.numero_factura = numero_factura
-                if subtotal is not None:
-                    factura.subtotal = subtotal
-                if impuesto is not None:
-                    factura.impuesto = impuesto
-                if total is not None:
-                    factura.total = total
-                if estado is not None:
-                    factura.estado = estado
-                if observaciones is not None:
-                    factura.observaciones = observaciones
-                if id_venta is not None:
-                    factura.id_venta = id_venta
-                if id_cliente is not None:
-                    factura.id_cliente = id_cliente
-                if id_empleado is not None:
-                    factura.id_empleado = id_empleado
-                
-                return factura.save()
+            cambios = {campo: valor for campo, valor in (
+                ('numero_factura', numero_factura),
+                ('subtotal', subtotal),
+                ('impuesto', impuesto),
+                ('total', total),
+                ('estado', estado),
+                ('observaciones', observaciones),
+                ('id_venta', id_venta),
+                ('id_cliente', id_cliente),
+                ('id_empleado', id_empleado)
+            ) if valor is not None}
+            
+            if not cambios:
+                return id_factura if Factura.get_by_id(id_factura) else None
+            if Factura.update_fields(id_factura, version=version, **cambios):
+                return id_factura
             return None
+        except (ConflictError, DatabaseBusyError):
+            raise
         except Exception as e:
             print(f"Error al actualizar factura: {e}")
             return None
@@ -92,19 +100,19 @@ class FacturaController:
         """Lista facturas por estado"""
         return Factura.get_by_estado(estado)
     
+    def buscar_facturas(self, termino):
+        """Busca facturas por el texto de sus observaciones (texto completo, por prefijo)"""
+        try:
+            rows = search(self.db, 'Factura', termino)
+            return Factura.from_rows(rows)
+        except Exception as e:
+            print(f"Error al buscar facturas: {e}")
+            return []
+    
     def generar_numero_factura(self):
-        """Genera un número de factura único"""
+        """Devuelve el próximo número de factura (el definitivo se asigna al guardar)"""
         try:
-            # Obtener el último número de factura
-            query = "SELECT MAX(CAST(SUBSTR(NumeroFactura, 5) AS INTEGER)) as ultimo FROM Factura WHERE NumeroFactura LIKE 'FAC-%'"
-            result = self.db.fetch_one(query)
-            
-            if result and result['ultimo']:
-                siguiente = result['ultimo'] + 1
-            else:
-                siguiente = 1
-            
-            return f"FAC-{siguiente:06d}"
+            return Factura.proximo_numero()
         except Exception as e:
             print(f"Error al generar número de factura: {e}")
             return f"FAC-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
@@ -120,30 +128,15 @@ class FacturaController:
     def generar_reporte_facturas(self, fecha_inicio=None, fecha_fin=None, estado=None):
         """Genera un reporte de facturas con filtros opcionales"""
         try:
-            query_params = []
-            conditions = []
-            
-            if fecha_inicio and fecha_fin:
-                conditions.append("f.Fecha BETWEEN ? AND ?")
-                query_params.extend([fecha_inicio, fecha_fin])
-            
-            if estado:
-                conditions.append("f.Estado = ?")
-                query_params.append(estado)
-            
-            where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
-            
-            query = f"""SELECT f.idFactura, f.NumeroFactura, f.Fecha, f.SubTotal, 
-                           f.Impuesto, f.Total, f.Estado, f.Observaciones,
-                           c.NombreCli, e.NombreEmp, v.idVenta
-                    FROM Factura f
-                    LEFT JOIN Cliente c ON f.idCliente = c.idCliente
-                    LEFT JOIN Empleado e ON f.idEmpleado = e.idEmpleado
-                    LEFT JOIN Venta v ON f.idVenta = v.idVenta
-                    {where_clause}
-                    ORDER BY f.Fecha DESC"""
-            
-            rows = self.db.fetch_all(query, tuple(query_params))
+            # Filtros opcionales: una sentencia por combinación (cada una con su índice)
+            if not (fecha_inicio and fecha_fin):
+                fecha_inicio = fecha_fin = None
+            filtros = {
+                'desde': fecha_inicio,
+                'hasta': fecha_fin,
+                'estado': estado or None
+            }
+            rows = self.db.fetch_all(statements.filtered('factura.reporte', filtros), filtros)
             return [{
                 'id': row['idFactura'],
                 'numero': row['NumeroFactura'],
@@ -176,9 +169,9 @@ class FacturaController:
                     factura['fecha'],
                     factura['cliente'] or 'N/A',
                     factura['empleado'] or 'N/A',
-                    factura['subtotal'],
-                    factura['impuesto'],
-                    factura['total'],
+                    from_cents(factura['subtotal']),
+                    from_cents(factura['impuesto']),
+                    from_cents(factura['total']),
                     factura['estado'],
                     factura['observaciones'] or ''
                 ])
@@ -201,15 +194,7 @@ class FacturaController:
         """Exporta una factura individual en formato PDF"""
         try:
             # Obtener datos completos de la factura
-            query = """
-            SELECT f.*, c.NombreCli as cliente_nombre, e.NombreEmp as empleado_nombre
-            FROM Factura f
-            LEFT JOIN Cliente c ON f.idCliente = c.idCliente
-            LEFT JOIN Empleado e ON f.idEmpleado = e.idEmpleado
-            WHERE f.idFactura = ?
-            """
-            
-            factura_data = self.db.fetch_one(query, (factura_id,))
+            factura_data = self.db.fetch_one('factura.with_names', (factura_id,))
             
             if not factura_data:
                 return None
@@ -241,15 +226,7 @@ class FacturaController:
         """Exporta una factura individual en formato Excel"""
         try:
             # Obtener datos completos de la factura
-            query = """
-            SELECT f.*, c.NombreCli as cliente_nombre, e.NombreEmp as empleado_nombre
-            FROM Factura f
-            LEFT JOIN Cliente c ON f.idCliente = c.idCliente
-            LEFT JOIN Empleado e ON f.idEmpleado = e.idEmpleado
-            WHERE f.idFactura = ?
-            """
-            
-            factura_data = self.db.fetch_one(query, (factura_id,))
+            factura_data = self.db.fetch_one('factura.with_names', (factura_id,))
             
             if not factura_data:
                 return None
@@ -281,17 +258,7 @@ class FacturaController:
     def obtener_estadisticas_facturas(self):
         """Obtiene estadísticas generales de facturas"""
         try:
-            query = """SELECT 
-                        COUNT(*) as total_facturas,
-                        SUM(CASE WHEN Estado = 'Pendiente' THEN 1 ELSE 0 END) as pendientes,
-                        SUM(CASE WHEN Estado = 'Pagada' THEN 1 ELSE 0 END) as pagadas,
-                        SUM(CASE WHEN Estado = 'Cancelada' THEN 1 ELSE 0 END) as canceladas,
-                        SUM(CASE WHEN Estado = 'Vencida' THEN 1 ELSE 0 END) as vencidas,
-                        SUM(Total) as total_monto,
-                        AVG(Total) as promedio_monto
-                    FROM Factura"""
-            
-            result = self.db.fetch_one(query)
+            result = self.db.fetch_one('factura.estadisticas')
             return {
                 'total_facturas': result['total_facturas'] or 0,
                 'pendientes': result['pendientes'] or 0,
@@ -299,7 +266,7 @@ class FacturaController:
                 'canceladas': result['canceladas'] or 0,
                 'vencidas': result['vencidas'] or 0,
                 'total_monto': result['total_monto'] or 0,
-                'promedio_monto': result['promedio_monto'] or 0
+                'promedio_monto': round(result['promedio_monto'] or 0)
             }
         except Exception as e:
             print(f"Error al obtener estadísticas: {e}")
@@ -312,13 +279,12 @@ class FacturaController:
             if not venta:
                 return None
             
-            numero_factura = self.generar_numero_factura()
             subtotal = venta.total
-            impuesto = subtotal * (impuesto_porcentaje / 100)
+            impuesto = apply_percentage(subtotal, impuesto_porcentaje)
             total = subtotal + impuesto
             
             return self.crear_factura(
-                numero_factura=numero_factura,
+                numero_factura=None,
                 subtotal=subtotal,
                 impuesto=impuesto,
                 total=total,
@@ -373,65 +339,126 @@ class FacturaController:
             print(f"Error al eliminar producto de factura: {e}")
             return False
     
-    def obtener_detalles_factura(self, id_factura):
-        """Obtiene todos los detalles de una factura"""
+    def _detalles_factura(self, id_factura, productos_data):
+        """Líneas de factura (sin guardar) con el precio actual de cada producto"""
+        detalles = []
+        for producto_data in productos_data:
+            producto = Producto.get_by_id(producto_data['id_producto'])
+            if not producto:
+                raise ValueError(f"Producto {producto_data['id_producto']} no encontrado")
+            cantidad = producto_data['cantidad']
+            detalles.append(DetalleFactura(
+                cantidad=cantidad,
+                precio_unitario=producto.precio,
+                subtotal=producto.precio * cantidad,
+                id_producto=producto.id,
+                id_factura=id_factura
+            ))
+        return detalles
+    
+    def reemplazar_productos_factura(self, id_factura, productos_data, impuesto_porcentaje=0):
+        """Sustituye los productos de una factura existente y recalcula sus totales"""
+        try:
+            with identity.session(), self.db.transaction():
+                DetalleFactura.delete_by_factura(id_factura)
+                DetalleFactura.save_all(self._detalles_factura(id_factura, productos_data))
+                self._recalcular_totales(id_factura, impuesto_porcentaje)
+                return True
+        except Exception as e:
+            print(f"Error al reemplazar productos de factura: {e}")
+            return False
+    
+    def actualizar_factura_con_productos(self, id_factura, productos_data, impuesto_porcentaje=0,
+                                         version=None, **campos):
+        """Actualiza la cabecera de una factura y sustituye sus productos en una sola transacción.
+        
+        `campos` son los de actualizar_factura (solo se escriben los distintos
+        de None). Si otra terminal modificó la factura desde `version` se lanza
+        ConflictError y no se guarda nada: ni la cabecera ni las líneas.
+        """
+        try:
+            with identity.session(), self.db.transaction():
+                cambios = {campo: valor for campo, valor in campos.items() if valor is not None}
+                if cambios and not Factura.update_fields(id_factura, version=version, **cambios):
+                    return None
+                DetalleFactura.delete_by_factura(id_factura)
+                DetalleFactura.save_all(self._detalles_factura(id_factura, productos_data))
+                self._recalcular_totales(id_factura, impuesto_porcentaje)
+                return id_factura
+        except (ConflictError, DatabaseBusyError):
+            raise
+        except Exception as e:
+            print(f"Error al actualizar factura con productos: {e}")
+            return None
+    
+    def obtener_detalles_factura(self, id_factura, include=None):
+        """Obtiene todos los detalles de una factura (include=['producto'] adjunta cada producto)"""
         try:
-            return DetalleFactura.get_by_factura(id_factura)
+            return DetalleFactura.get_by_factura(id_factura, include)
         except Exception as e:
             print(f"Error al obtener detalles de factura: {e}")
             return []
     
     def recalcular_totales_factura(self, id_factura, impuesto_porcentaje=0):
-        """Recalcula los totales de una factura basado en sus detalles"""
+        """Recalcula los totales de una factura basado en sus detalles.
+        
+        Si otra terminal cambia la factura mientras tanto (p. ej. agregando
+        otra línea), se vuelven a leer los detalles y se recalcula.
+        """
         try:
-            detalles = DetalleFactura.get_by_factura(id_factura)
-            subtotal = sum(detalle.subtotal for detalle in detalles)
-            impuesto = subtotal * (impuesto_porcentaje / 100)
-            total = subtotal + impuesto
-            
-            return self.actualizar_factura(
-                id_factura=id_factura,
-                subtotal=subtotal,
-                impuesto=impuesto,
-                total=total
-            )
+            factura = self._recalcular_totales(id_factura, impuesto_porcentaje)
+            return factura.id if factura else None
         except Exception as e:
             print(f"Error al recalcular totales de factura: {e}")
             return False
     
+    def _recalcular_totales(self, id_factura, impuesto_porcentaje=0):
+        """Recalcula los totales sin capturar errores: dentro de una transacción, un fallo la revierte entera"""
+        def recalcular(factura):
+            detalles = DetalleFactura.get_by_factura(id_factura)
+            factura.subtotal = sum(detalle.subtotal for detalle in detalles)
+            factura.impuesto = apply_percentage(factura.subtotal, impuesto_porcentaje)
+            factura.total = factura.subtotal + factura.impuesto
+        
+        factura = Factura.modify(id_factura, recalcular)
+        if not factura:
+            raise ValueError(f"Factura {id_factura} no encontrada")
+        return factura
+    
     def crear_factura_con_productos(self, numero_factura, productos_data, impuesto_porcentaje=0,
                                    estado='Pendiente', observaciones=None, id_cliente=None, id_empleado=None):
-        """Crea una factura nueva con productos automáticamente"""
+        """Crea una factura nueva con productos automáticamente.
+        
+        La factura y todas sus líneas se guardan en una sola transacción (las
+        líneas con un único executemany); si falta algún producto no se crea nada.
+        Los productos se leen en una sesión del mapa de identidad.
+        """
         try:
-            # Crear factura inicial con totales en 0
-            factura_id = self.crear_factura(
-                numero_factura=numero_factura,
-                subtotal=0,
-                impuesto=0,
-                total=0,
-                estado=estado,
-                observaciones=observaciones,
-                id_cliente=id_cliente,
-                id_empleado=id_empleado
-            )
-            
-            if not factura_id:
-                return None
-            
-            # Agregar productos
-            for producto_data in productos_data:
-                id_producto = producto_data['id_producto']
-                cantidad = producto_data['cantidad']
+            with identity.session(), self.db.transaction():
+                # Crear factura inicial con totales en 0
+                factura_id = self.crear_factura(
+                    numero_factura=numero_factura,
+                    subtotal=0,
+                    impuesto=0,
+                    total=0,
+                    estado=estado,
+                    observaciones=observaciones,
+                    id_cliente=id_cliente,
+                    id_empleado=id_empleado
+                )
                 
-                if not self.agregar_producto_factura(factura_id, id_producto, cantidad):
-                    # Si falla, eliminar la factura creada
-                    self.eliminar_factura(factura_id)
+                if not factura_id:
                     return None
-            
-            # Recalcular totales finales
-            self.recalcular_totales_factura(factura_id, impuesto_porcentaje)
-            
-            return factura_id
+                
+                # Agregar productos en bloque
+                DetalleFactura.save_all(self._detalles_factura(factura_id, productos_data))
+                
+                # Recalcular totales finales (si falla no queda la factura a 0)
+                self._recalcular_totales(factura_id, impuesto_porcentaje)
+                
+                return factura_id
+        except DatabaseBusyError:
+            raise
         except Exception as e:
             print(f"Error al crear factura con productos: {e}")
             return None
\ No newline at end of file
@@ -1,5 +1,6 @@
 from database.models import Producto
 from database.connection import DatabaseConnection
+from database.search import search
 
 class ProductoController:
     def __init__(self):
@@ -18,15 +19,22 @@ class ProductoController:
         producto = Producto(nombre=nombre, precio=precio, stock=stock, id_categoria=id_categoria)
         return producto.save()
     
-    def update_producto(self, id, nombre, precio, stock, id_categoria):
-        """Actualiza un producto existente"""
-        producto = Producto.get_by_id(id)
-        if producto:
+    def update_producto(self, id, nombre, precio, stock, id_categoria, version=None):
+        """Actualiza un producto existente.
+        
+        `version` es la del producto cuando se abrió el formulario: si otra
+        terminal lo modificó desde entonces (también su stock, con una venta)
+        se lanza ConflictError en lugar de sobrescribir sus cambios.
+        """
+        def aplicar(producto):
             producto.nombre = nombre
             producto.precio = precio
             producto.stock = stock
             producto.id_categoria = id_categoria
-            return producto.save()
+        
+        producto = Producto.modify(id, aplicar, version)
+        if producto:
+            return producto.id
         return False
     
     def delete_producto(self, id):
@@ -37,36 +45,31 @@ class ProductoController:
         return False
     
     def update_stock(self, id, cantidad):
-        """Actualiza el stock de un producto"""
-        producto = Producto.get_by_id(id)
-        if producto:
-            return producto.update_stock(cantidad)
-        return False
+        """Suma `cantidad` al stock de un producto con una sola escritura"""
+        return Producto.add_stock(id, cantidad)
     
     def get_productos_by_categoria(self, id_categoria):
         """Obtiene productos por categoría"""
         return Producto.get_by_categoria(id_categoria)
     
     def search_productos(self, term):
-        """Busca productos por término"""
+        """Busca productos por nombre (texto completo) o por ID exacto"""
         db = DatabaseConnection()
-        query = """SELECT * FROM Producto 
-                 WHERE NombrePro LIKE ? 
-                 OR idProducto LIKE ?"""
-        search_term = f"%{term}%"
-        rows = db.fetch_all(query, (search_term, search_term))
-        return [Producto(id=row['idProducto'], nombre=row['NombrePro'], 
-                       precio=row['Precio'], stock=row['Stock'], 
-                       id_categoria=row['idCategoria']) for row in rows]
+        rows = search(db, 'Producto', term)
+        productos = Producto.from_rows(rows)
+        
+        # Un número también puede ser el ID del producto
+        if term.strip().isdigit():
+            producto = Producto.get_by_id(int(term))
+            if producto and all(p.id != producto.id for p in productos):
+                productos.insert(0, producto)
+        return productos
     
     def get_productos_stock_bajo(self, limite=10):
         """Obtiene productos con stock bajo"""
         db = DatabaseConnection()
-        query = "SELECT * FROM Producto WHERE Stock <= ?"
-        rows = db.fetch_all(query, (limite,))
-        return [Producto(id=row['idProducto'], nombre=row['NombrePro'], 
-                       precio=row['Precio'], stock=row['Stock'], 
-                       id_categoria=row['idCategoria']) for row in rows]
+        rows = db.fetch_all('producto.stock_bajo', (limite,))
+        return Producto.from_rows(rows)
     
     def get_categoria_nombre(self, id_categoria):
         """Obtiene el nombre de una categoría por su ID"""
@@ -74,8 +77,7 @@ class ProductoController:
             return "Sin categoría"
         
         db = DatabaseConnection()
-        query = "SELECT NombreCat FROM Categoria WHERE idCategoria = ?"
-        row = db.fetch_one(query, (id_categoria,))
+        row = db.fetch_one('categoria.get_nombre', (id_categoria,))
         if row:
             return row['NombreCat']
         return "Categoría no encontrada"
@@ -1,4 +1,5 @@
 from database.connection import DatabaseConnection
+from database.summary import rebuild_summary
 from utils.helpers import export_to_csv, format_currency, format_date
 import datetime
 
@@ -8,13 +9,7 @@ class ReporteController:
     
     def generar_reporte_ventas(self, fecha_inicio, fecha_fin):
         """Genera un reporte de ventas por período"""
-        query = """SELECT v.idVenta, v.Fecha, v.Total, c.NombreCli, e.NombreEmp 
-                 FROM Venta v
-                 LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-                 LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-                 WHERE v.Fecha BETWEEN ? AND ?
-                 ORDER BY v.Fecha DESC"""
-        rows = self.db.fetch_all(query, (fecha_inicio, fecha_fin))
+        rows = self.db.fetch_all('reporte.ventas', (fecha_inicio, fecha_fin))
         return [{
             'id': row['idVenta'],
             'fecha': format_date(row['Fecha']),
@@ -31,36 +26,50 @@ class ReporteController:
         filename = f"reporte_ventas_{datetime.date.today().strftime('%Y%m%d')}.csv"
         return export_to_csv(data, filename, headers)
     
-    def generar_reporte_productos_vendidos(self, fecha_inicio=None, fecha_fin=None, limite=10):
-        """Genera un reporte de productos más vendidos"""
-        query_params = []
-        fecha_condition = ""
-        
-        if fecha_inicio and fecha_fin:
-            fecha_condition = "WHERE v.Fecha BETWEEN ? AND ?"
-            query_params.extend([fecha_inicio, fecha_fin])
+    def resumen_ventas_por_periodo(self, fecha_inicio, fecha_fin, periodo='M'):
+        """Ventas, importe total y ticket medio por período ('D', 'W' o 'M').
         
-        query = f"""SELECT p.idProducto, p.NombrePro, c.NombreCat, 
-                      SUM(d.Cantidad) as cantidad_vendida, 
-                      SUM(d.SubTotal) as total_vendido
-                 FROM DetalleVenta d
-                 JOIN Producto p ON d.idProducto = p.idProducto
-                 JOIN Venta v ON d.idVenta = v.idVenta
-                 LEFT JOIN Categoria c ON p.idCategoria = c.idCategoria
-                 {fecha_condition}
-                 GROUP BY p.idProducto
-                 ORDER BY cantidad_vendida DESC
-                 LIMIT ?"""
-        
-        query_params.append(limite)
-        rows = self.db.fetch_all(query, tuple(query_params))
+        Devuelve un DataFrame indexado por período, con importes en céntimos;
+        la agregación se hace por columnas, sin un objeto por venta.
+        """
+        ventas = self.db.fetch_frame('reporte.ventas', (fecha_inicio, fecha_fin))
+        resumen = ventas.groupby(ventas['Fecha'].dt.to_period(periodo))['Total'].agg(
+            ventas='count', total='sum', ticket_medio='mean')
+        resumen['ticket_medio'] = resumen['ticket_medio'].round().astype('int64')
+        resumen.index.name = 'periodo'
+        return resumen
+    
+    def exportar_resumen_ventas(self, fecha_inicio, fecha_fin, periodo='M'):
+        """Exporta el resumen de ventas por período a CSV"""
+        resumen = self.resumen_ventas_por_periodo(fecha_inicio, fecha_fin, periodo)
+        data = [[str(p), n, format_currency(int(t)), format_currency(int(m))]
+                for p, n, t, m in resumen.itertuples()]
+        headers = ['Período', 'Ventas', 'Total', 'Ticket Medio']
+        filename = f"resumen_ventas_{datetime.date.today().strftime('%Y%m%d')}.csv"
+        return export_to_csv(data, filename, headers)
+    
+    def ventas_por_empleado(self, fecha_inicio, fecha_fin, periodo='M'):
+        """Importe vendido (céntimos) por empleado en filas y período en columnas (DataFrame)"""
+        ventas = self.db.fetch_frame('reporte.ventas', (fecha_inicio, fecha_fin))
+        ventas['periodo'] = ventas['Fecha'].dt.to_period(periodo)
+        ventas['NombreEmp'] = ventas['NombreEmp'].fillna('Sin empleado')
+        return ventas.pivot_table(index='NombreEmp', columns='periodo', values='Total',
+                                  aggfunc='sum', fill_value=0)
+    
+    def generar_reporte_productos_vendidos(self, fecha_inicio=None, fecha_fin=None, limite=10):
+        """Genera un reporte de productos más vendidos (desde el resumen diario)"""
+        # Sin rango completo se toma todo el historial
+        if not (fecha_inicio and fecha_fin):
+            fecha_inicio = fecha_fin = None
+        rows = self.db.fetch_all('reporte.productos_vendidos', (fecha_inicio, fecha_fin, limite))
         
         return [{
             'id': row['idProducto'],
             'nombre': row['NombrePro'],
             'categoria': row['NombreCat'],
             'cantidad_vendida': row['cantidad_vendida'],
-            'total_vendido': row['total_vendido']
+            'total_vendido': row['total_vendido'],
+            'tickets': row['tickets']
         } for row in rows]
     
     def exportar_reporte_productos(self, fecha_inicio=None, fecha_fin=None, limite=10):
@@ -71,15 +80,30 @@ class ReporteController:
         filename = f"reporte_productos_{datetime.date.today().strftime('%Y%m%d')}.csv"
         return export_to_csv(data, filename, headers)
     
+    def generar_reporte_ventas_diarias(self, fecha_inicio, fecha_fin):
+        """Genera un reporte de unidades e ingresos por día (desde el resumen diario)"""
+        rows = self.db.fetch_all('reporte.ventas_diarias', (fecha_inicio, fecha_fin))
+        return [{
+            'fecha': format_date(row['Fecha']),
+            'unidades': row['unidades'],
+            'ingresos': row['ingresos']
+        } for row in rows]
+    
+    def exportar_reporte_ventas_diarias(self, fecha_inicio, fecha_fin):
+        """Exporta el reporte de ventas por día a CSV"""
+        dias = self.generar_reporte_ventas_diarias(fecha_inicio, fecha_fin)
+        data = [[d['fecha'], d['unidades'], format_currency(d['ingresos'])] for d in dias]
+        headers = ['Fecha', 'Unidades', 'Ingresos']
+        filename = f"reporte_ventas_diarias_{datetime.date.today().strftime('%Y%m%d')}.csv"
+        return export_to_csv(data, filename, headers)
+    
+    def reconstruir_resumen_ventas(self):
+        """Recalcula el resumen diario de ventas (tras cargas masivas o importaciones)"""
+        return rebuild_summary(self.db)
+    
     def generar_reporte_clientes_frecuentes(self, limite=10):
         """Genera un reporte de clientes frecuentes"""
-        query = """SELECT c.*, COUNT(v.idVenta) as total_compras, SUM(v.Total) as total_gastado
-                 FROM Cliente c
-                 LEFT JOIN Venta v ON c.idCliente = v.idCliente
-                 GROUP BY c.idCliente
-                 ORDER BY total_compras DESC
-                 LIMIT ?"""
-        rows = self.db.fetch_all(query, (limite,))
+        rows = self.db.fetch_all('cliente.frecuentes', (limite,))
         return [{
             'id': row['idCliente'],
             'nombre': row['NombreCli'],
@@ -100,12 +124,7 @@ class ReporteController:
     
     def generar_reporte_stock_bajo(self, limite=10):
         """Genera un reporte de productos con stock bajo"""
-        query = """SELECT p.*, c.NombreCat
-                 FROM Producto p
-                 LEFT JOIN Categoria c ON p.idCategoria = c.idCategoria
-                 WHERE p.Stock <= ?
-                 ORDER BY p.Stock ASC"""
-        rows = self.db.fetch_all(query, (limite,))
+        rows = self.db.fetch_all('reporte.stock_bajo', (limite,))
         return [{
             'id': row['idProducto'],
             'nombre': row['NombrePro'],
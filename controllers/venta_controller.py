@@ -1,5 +1,7 @@
 from database.models import Venta, DetalleVenta
 from database.connection import DatabaseConnection
+from database.busy import DatabaseBusyError
+from database import statements
 import datetime
 
 class VentaController:
@@ -8,44 +10,27 @@ class VentaController:
     
     def get_all_ventas(self):
         """Obtiene todas las ventas con información de cliente y empleado"""
-        query = """
-        SELECT v.*, c.NombreCli as cliente_nombre, e.NombreEmp as empleado_nombre
-        FROM Venta v
-        LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-        LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-        ORDER BY v.Fecha DESC
-        """
-        
-        rows = self.db.fetch_all(query)
-        ventas = []
-        
-        for row in rows:
-            venta = Venta(
-                id=row['idVenta'],
-                fecha=row['Fecha'],
-                total=row['Total'],
-                id_cliente=row['idCliente'],
-                id_empleado=row['idEmpleado']
-            )
-            # Agregar información adicional
-            venta.cliente_nombre = row['cliente_nombre']
-            venta.empleado_nombre = row['empleado_nombre']
-            ventas.append(venta)
-        
-        return ventas
+        rows = self.db.fetch_all('venta.all_with_names')
+        # Con cliente_nombre y empleado_nombre (columnas del JOIN)
+        return Venta.from_rows(rows)
     
     def listar_ventas(self):
         """Alias para get_all_ventas - para compatibilidad con la vista de facturas"""
         return self.get_all_ventas()
     
+    def listar_ventas_facturacion(self, id_cliente=None, desde=None, hasta=None):
+        """Ventas con cliente, empleado y si ya tienen factura; los filtros son opcionales"""
+        filtros = {
+            'cliente': id_cliente,
+            'desde': desde,
+            'hasta': hasta
+        }
+        # Una sentencia por combinación de filtros (cada una con su índice)
+        return self.db.fetch_all(statements.filtered('venta.facturacion', filtros), filtros)
+    
     def get_venta_by_id(self, id_venta):
         """Obtiene una venta por su ID"""
-        query = """SELECT v.*, c.NombreCli, e.NombreEmp 
-                 FROM Venta v
-                 LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-                 LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-                 WHERE v.idVenta = ?"""
-        row = self.db.fetch_one(query, (id_venta,))
+        row = self.db.fetch_one('venta.with_names', (id_venta,))
         if not row:
             return None
         
@@ -61,84 +46,67 @@ class VentaController:
     
     def obtener_venta(self, id_venta):
         """Obtiene una venta por su ID - retorna objeto Venta"""
-        query = """SELECT v.*, c.NombreCli, e.NombreEmp 
-                 FROM Venta v
-                 LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-                 LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-                 WHERE v.idVenta = ?"""
-        row = self.db.fetch_one(query, (id_venta,))
+        row = self.db.fetch_one('venta.with_names', (id_venta,))
         if not row:
             return None
         
-        venta = Venta(
-            id=row['idVenta'],
-            fecha=row['Fecha'],
-            total=row['Total'],
-            id_cliente=row['idCliente'],
-            id_empleado=row['idEmpleado']
-        )
-        # Agregar información adicional
-        venta.cliente_nombre = row['NombreCli']
-        venta.empleado_nombre = row['NombreEmp']
-        return venta
+        # Con cliente_nombre y empleado_nombre (columnas del JOIN)
+        return Venta.from_row(row)
     
     def get_detalles_venta(self, id_venta):
         """Obtiene los detalles de una venta"""
-        query = """SELECT d.*, p.NombrePro 
-                 FROM DetalleVenta d
-                 JOIN Producto p ON d.idProducto = p.idProducto
-                 WHERE d.idVenta = ?"""
-        rows = self.db.fetch_all(query, (id_venta,))
+        detalles = DetalleVenta.get_by_venta(id_venta, include=['producto'])
         return [{
-            'id': row['idDetalleVenta'],
-            'cantidad': row['Cantidad'],
-            'precio_uni': row['PrecioUni'],
-            'subtotal': row['SubTotal'],
-            'id_producto': row['idProducto'],
-            'producto': row['NombrePro']
-        } for row in rows]
+            'id': detalle.id,
+            'cantidad': detalle.cantidad,
+            'precio_uni': detalle.precio,
+            'subtotal': detalle.subtotal,
+            'id_producto': detalle.id_producto,
+            'producto': detalle.producto.nombre if detalle.producto else f"Producto #{detalle.id_producto}"
+        } for detalle in detalles]
     
     def crear_venta(self, id_cliente, id_empleado, detalles):
-        """Crea una nueva venta con sus detalles"""
+        """Crea una nueva venta con sus detalles en una sola transacción (importes en céntimos).
+        
+        La escritura pasa por el hilo escritor: las ventas de varias terminales
+        que llegan a la vez se confirman con un solo COMMIT. Si la base sigue
+        ocupada después de los reintentos se lanza DatabaseBusyError.
+        """
         try:
             # Calcular el total de la venta
             total = sum(detalle['subtotal'] for detalle in detalles)
-            
-            # Insertar la venta
-            query_venta = "INSERT INTO Venta (Fecha, Total, idEmpleado, idCliente) VALUES (?, ?, ?, ?)"
             fecha = datetime.date.today().isoformat()
-            cursor = self.db.execute_query(query_venta, (fecha, total, id_empleado, id_cliente))
-            id_venta = cursor.lastrowid
+            filas_detalle = [(
+                detalle['cantidad'],
+                detalle['precio_uni'],
+                detalle['subtotal'],
+                detalle['id_producto']
+            ) for detalle in detalles]
             
-            # Insertar los detalles de la venta
-            query_detalle = "INSERT INTO DetalleVenta (Cantidad, PrecioUni, SubTotal, idProducto, idVenta) VALUES (?, ?, ?, ?, ?)"
-            for detalle in detalles:
-                self.db.execute_query(query_detalle, (
-                    detalle['cantidad'],
-                    detalle['precio_uni'],
-                    detalle['subtotal'],
-                    detalle['id_producto'],
-                    id_venta
-                ))
-                
-                # Actualizar el stock del producto
-                query_update_stock = "UPDATE Producto SET Stock = Stock - ? WHERE idProducto = ?"
-                self.db.execute_query(query_update_stock, (detalle['cantidad'], detalle['id_producto']))
-            
-            return id_venta
+            return self.db.write(self._insertar_venta, fecha, total, id_cliente, id_empleado, filas_detalle)
+        except DatabaseBusyError:
+            # La venta no se guardó: la vista avisa para que se reintente
+            raise
         except Exception as e:
             print(f"Error al crear venta: {str(e)}")
             return None
     
+    def _insertar_venta(self, fecha, total, id_cliente, id_empleado, filas_detalle):
+        """Venta, detalles y descuento de stock (dentro de la transacción del escritor)"""
+        # Insertar la venta
+        cursor = self.db.execute_query('venta.insert', (fecha, total, id_empleado, id_cliente))
+        id_venta = cursor.lastrowid
+        
+        # Insertar todos los detalles de la venta de una vez
+        self.db.execute_many('detalleventa.insert', [fila + (id_venta,) for fila in filas_detalle])
+        
+        # Descontar el stock de todos los productos vendidos en una sola sentencia
+        self.db.execute_query('venta.discount_stock', (id_venta,))
+        return id_venta
+    
     def buscar_ventas_por_fecha(self, fecha_inicio, fecha_fin):
         """Busca ventas en un rango de fechas"""
-        query = """SELECT v.*, c.NombreCli, e.NombreEmp 
-                 FROM Venta v
-                 LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-                 LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-                 WHERE v.Fecha BETWEEN ? AND ?
-                 ORDER BY v.Fecha DESC"""
-        rows = self.db.fetch_all(query, (fecha_inicio, fecha_fin))
+        rows = self.db.fetch_all('venta.by_fecha_with_names', (fecha_inicio, fecha_fin))
         return [{
             'id': row['idVenta'],
             'fecha': row['Fecha'],
@@ -151,26 +119,6 @@ class VentaController:
     
     def buscar_ventas_por_cliente(self, id_cliente):
         """Busca ventas de un cliente específico"""
-        query = """SELECT v.*, c.NombreCli as cliente_nombre, e.NombreEmp as empleado_nombre
-                 FROM Venta v
-                 LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-                 LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-                 WHERE v.idCliente = ?
-                 ORDER BY v.Fecha DESC"""
-        rows = self.db.fetch_all(query, (id_cliente,))
-        ventas = []
-        
-        for row in rows:
-            venta = Venta(
-                id=row['idVenta'],
-                fecha=row['Fecha'],
-                total=row['Total'],
-                id_cliente=row['idCliente'],
-                id_empleado=row['idEmpleado']
-            )
-            # Agregar información adicional
-            venta.cliente_nombre = row['cliente_nombre']
-            venta.empleado_nombre = row['empleado_nombre']
-            ventas.append(venta)
-        
-        return ventas
\ No newline at end of file
+        rows = self.db.fetch_all('venta.by_cliente_with_names', (id_cliente,))
+        # Con cliente_nombre y empleado_nombre (columnas del JOIN)
+        return Venta.from_rows(rows)
\ No newline at end of file
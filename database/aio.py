@@ -0,0 +1,140 @@
+"""Fachada asyncio sobre la capa de datos.
+
+AsyncDatabase ejecuta las consultas de DatabaseConnection (y cualquier
+función bloqueante: finders de los modelos, métodos de los controladores)
+en un ThreadPoolExecutor propio. Sus hilos son las conexiones del pool menos
+las que se reservan para el hilo que llama (el de Tk) y el hilo escritor de
+group commit: el executor no deja sin conexión a esos hilos. Una tarea aún
+puede esperar en el checkout del pool si otros hilos (otra AsyncDatabase, un
+proceso por lotes) tienen prestadas las demás; la copia de seguridad usa su
+propia conexión y no cuenta.
+
+    adb = aio.default()
+    clientes, productos = await asyncio.gather(
+        adb.fetch_all('cliente.get_all'),
+        adb.run(Producto.get_all))
+    
+    clientes = aio.wrap(ClienteController())
+    await clientes.get_all_clientes()
+
+Cancelar la tarea que espera (task.cancel(), asyncio.wait_for) interrumpe
+la consulta en curso con Connection.interrupt(); si aún no había empezado,
+no llega a ejecutarse. El trabajo se hace en los hilos del executor, así
+que no hereda la sesión del mapa de identidad ni la transacción del hilo
+que llama.
+
+Solapar compensa con consultas que tardan (listados, reportes): cada llamada
+paga el salto de hilo y el préstamo de una conexión del pool, más que una
+búsqueda por clave primaria en serie.
+"""
+import asyncio
+import functools
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .connection import DatabaseConnection
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def _reserved_connections(db):
+    """Conexiones del pool que no usa el executor: la del hilo que llama y la del hilo escritor"""
+    return 1 + (db.writer is not None)
+
+
+class AsyncDatabase:
+    """Consultas awaitables con concurrencia acotada y cancelación"""
+    
+    def __init__(self, db=None, max_workers=None):
+        self.db = db or DatabaseConnection()
+        self.max_workers = max_workers or max(1, self.db.pool.max_size - _reserved_connections(self.db))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='db-async')
+    
+    def _call(self, state, func, args, kwargs):
+        """Se ejecuta en un hilo del executor con una conexión fija para poder interrumpirla"""
+        with state['lock']:
+            if state['cancelled']:
+                raise asyncio.CancelledError()
+            state['connection'] = self.db.connect()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with state['lock']:
+                state['connection'] = None
+            self.db.close()
+    
+    async def run(self, func, *args, **kwargs):
+        """Ejecuta func(*args, **kwargs) en el executor y devuelve su resultado"""
+        state = {'lock': threading.Lock(), 'connection': None, 'cancelled': False}
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._call, state, func, args, kwargs)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            with state['lock']:
+                state['cancelled'] = True
+                if state['connection'] is not None:
+                    # La consulta en curso termina con OperationalError('interrupted')
+                    state['connection'].interrupt()
+            future.cancel()
+            raise
+    
+    async def execute_query(self, query, params=()):
+        return await self.run(self.db.execute_query, query, params)
+    
+    async def execute_many(self, query, seq_of_params):
+        return await self.run(self.db.execute_many, query, seq_of_params)
+    
+    async def fetch_all(self, query, params=()):
+        return await self.run(self.db.fetch_all, query, params)
+    
+    async def fetch_one(self, query, params=()):
+        return await self.run(self.db.fetch_one, query, params)
+    
+    async def fetch_columns(self, query, params=(), **kwargs):
+        return await self.run(self.db.fetch_columns, query, params, **kwargs)
+    
+    async def fetch_frame(self, query, params=(), **kwargs):
+        return await self.run(self.db.fetch_frame, query, params, **kwargs)
+    
+    def shutdown(self, wait=True):
+        if sys.version_info >= (3, 9):
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+        else:
+            # Python 3.8 no tiene cancel_futures: las consultas en cola se ejecutan antes de cerrar
+            self._executor.shutdown(wait=wait)
+
+
+class AsyncProxy:
+    """Variante awaitable de un objeto: cada método público se ejecuta en el executor"""
+    
+    def __init__(self, target, adb=None):
+        self._target = target
+        self._adb = adb or default()
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        
+        @functools.wraps(attribute)
+        async def method(*args, **kwargs):
+            return await self._adb.run(attribute, *args, **kwargs)
+        return method
+
+
+def default():
+    """AsyncDatabase compartida sobre el DatabaseConnection de la aplicación"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = AsyncDatabase()
+    return _default
+
+
+def wrap(target, adb=None):
+    """Versión async de un controlador (o de un modelo): await wrap(c).metodo(...)"""
+    return AsyncProxy(target, adb)
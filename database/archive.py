@@ -0,0 +1,415 @@
+"""Archivo anual del historial: años cerrados en bases de datos aparte.
+
+Los años cerrados (más antiguos que los KeepYears últimos) se mueven de
+Venta, DetalleVenta, Factura y DetalleFactura a un archivo SQLite por año
+(data/archive/<base>-<año>.db) y se apuntan en la tabla Archivo. La base
+activa queda con los años abiertos: cabe en la caché de páginas, y las
+escrituras, los reportes recientes y las búsquedas por id de ventas y
+facturas recientes recorren solo esos años.
+ResumenVentaDiaria conserva todos los años, así que los reportes que lo usan
+no necesitan los archivos.
+
+Las sentencias de ROUTED_STATEMENTS consultan también los años archivados
+cuando les hace falta, sin cambios en los controladores:
+
+- las de rango de fechas, si el rango llega a un año archivado;
+- las búsquedas por id de venta o factura, si el id no está en la base
+  activa y cae en el rango de ids de algún año archivado;
+- las que no acotan la fecha (listados, paginación, estadísticas, ventas y
+  facturas de un cliente), siempre que haya años archivados.
+
+Para ellas la conexión adjunta (ATTACH) los años necesarios y crea vistas
+TEMP <Tabla>Historica = base activa UNION ALL años adjuntos; la sentencia se
+ejecuta con las tablas sustituidas por esas vistas. Las escrituras ven solo
+la base activa: los años archivados son de solo lectura.
+
+ATTACH no se puede ejecutar dentro de una transacción: una consulta que
+dentro de una transacción necesite un año que la conexión no tiene adjunto
+lanza ArchiveError en lugar de devolver solo la parte de la base activa.
+SQLite admite SQLITE_LIMIT_ATTACHED bases adjuntas por conexión (10 por
+defecto): una consulta que abarque más años archivados también lanza
+ArchiveError.
+
+Archivar los años cerrados (con la aplicación abierta o cerrada):
+    python -m database.archive [año]
+"""
+import datetime
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from . import statements
+
+ARCHIVED_TABLES = ('Venta', 'DetalleVenta', 'Factura', 'DetalleFactura')
+VIEW_SUFFIX = 'Historica'
+SCHEMA_PREFIX = 'archivo_'
+# Segundos que se reutiliza el catálogo leído (otra terminal puede archivar)
+CATALOG_TTL = 1.0
+# SQLITE_LIMIT_ATTACHED por defecto, si no se puede consultar
+DEFAULT_ATTACH_LIMIT = 10
+
+# Sentencias de lectura que pueden necesitar años archivados:
+# ('fechas', desde, hasta): posición o nombre de los parámetros del rango (None = sin límite)
+# ('id', 'Venta' | 'Factura', posición): búsqueda por id
+# ('todos',): sin límite de fechas, todos los años archivados
+ROUTED_STATEMENTS = {
+    'reporte.ventas': ('fechas', 0, 1),
+    'venta.by_fecha_with_names': ('fechas', 0, 1),
+    'venta.get_by_id': ('id', 'Venta', 0),
+    'venta.with_names': ('id', 'Venta', 0),
+    'detalleventa.get_by_venta': ('id', 'Venta', 0),
+    'detalleventa.get_by_venta.producto': ('id', 'Venta', 0),
+    'factura.get_by_id': ('id', 'Factura', 0),
+    'factura.with_names': ('id', 'Factura', 0),
+    'detallefactura.get_by_factura': ('id', 'Factura', 0),
+    'detallefactura.get_by_factura.producto': ('id', 'Factura', 0),
+    'cliente.frecuentes': ('todos',),
+    'venta.get_all': ('todos',),
+    'venta.all_with_names': ('todos',),
+    'venta.by_cliente_with_names': ('todos',),
+    'factura.get_all': ('todos',),
+    'factura.get_by_numero': ('todos',),
+    'factura.get_by_cliente': ('todos',),
+    'factura.get_by_estado': ('todos',),
+    'factura.estadisticas': ('todos',),
+}
+# Paginación por (fecha, id) de los listados
+for _query in ('venta.page', 'factura.page', 'factura.page_by_cliente', 'factura.page_by_estado'):
+    for _suffix in ('_first', '_after'):
+        ROUTED_STATEMENTS[_query + _suffix] = ('todos',)
+# Todas las combinaciones de filtros de las consultas con filtros opcionales
+for _base in ('venta.facturacion', 'factura.reporte'):
+    for _name in statements.filter_variants(_base):
+        ROUTED_STATEMENTS[_name] = ('fechas', 'desde', 'hasta')
+
+_TABLE_PATTERN = re.compile(r'\b(' + '|'.join(ARCHIVED_TABLES) + r')\b')
+# Nombre del objeto en un CREATE TABLE / CREATE INDEX de sqlite_master
+_CREATE_PATTERN = re.compile(r'^(CREATE\s+(?:UNIQUE\s+)?(?:TABLE|INDEX)\s+(?:IF\s+NOT\s+EXISTS\s+)?)', re.IGNORECASE)
+
+
+class ArchiveError(Exception):
+    """No se puede archivar el año o consultar los años archivados pedidos"""
+    pass
+
+
+def historic_sql(sql):
+    """El texto de la sentencia con las tablas archivadas sustituidas por las vistas históricas"""
+    return _TABLE_PATTERN.sub(lambda match: match.group(1) + VIEW_SUFFIX, sql)
+
+
+def _attach_limit(conn):
+    """Bases adjuntables por conexión (Connection.getlimit solo existe desde Python 3.11)"""
+    limit = getattr(sqlite3, 'SQLITE_LIMIT_ATTACHED', None)
+    if limit is None or not hasattr(conn, 'getlimit'):
+        return DEFAULT_ATTACH_LIMIT
+    return conn.getlimit(limit)
+
+
+def _param(params, key):
+    if key is None:
+        return None
+    try:
+        return params[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+class Archive:
+    """Catálogo de años archivados y adjuntado de sus archivos en las conexiones del pool"""
+    
+    def __init__(self, db, directory, keep_years=2):
+        self.db = db
+        if not os.path.isabs(directory):
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            directory = os.path.join(base_dir, directory)
+        self.directory = directory
+        self.keep_years = max(1, keep_years)
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._loaded_at = 0.0
+        # id(conexión) -> (conexión, años adjuntos con vistas creadas)
+        self._attached = {}
+        self._historic = {}
+    
+    @classmethod
+    def from_config(cls, db, config):
+        return cls(db, config['path'], config['keep_years'])
+    
+    @property
+    def prefix(self):
+        return os.path.splitext(os.path.basename(self.db.db_path))[0]
+    
+    def path(self, file_name):
+        return os.path.join(self.directory, file_name)
+    
+    # Catálogo
+    
+    def catalog(self, conn=None, refresh=False):
+        """{año: fila de Archivo} de los años archivados"""
+        now = time.monotonic()
+        if refresh or self._catalog is None or now - self._loaded_at > CATALOG_TTL:
+            if conn is None:
+                with self.db.connection() as conn:
+                    return self.catalog(conn, refresh=True)
+            try:
+                rows = conn.execute(statements.STATEMENTS['archivo.get_all']).fetchall()
+            except sqlite3.OperationalError:
+                # Base sin migrar todavía
+                rows = []
+            with self._lock:
+                self._catalog = {row['Anio']: row for row in rows}
+                self._loaded_at = now
+        return self._catalog
+    
+    def last_closed_year(self):
+        """Último año que ya puede archivarse"""
+        return datetime.date.today().year - self.keep_years
+    
+    # Consultas
+    
+    def read(self, conn, name, sql, params, fetch):
+        """fetch(cursor) sobre la base activa o, si la sentencia lo necesita, también sobre los años archivados"""
+        rule = ROUTED_STATEMENTS.get(name)
+        if rule is None or not self.catalog(conn):
+            return fetch(conn.execute(sql, params))
+        if rule[0] != 'id':
+            return fetch(conn.execute(self.sql_for(conn, name, sql, params), params))
+        
+        result = fetch(conn.execute(sql, params))
+        if result:
+            return result
+        # El id no está en la base activa: años archivados cuyo rango de ids lo incluye
+        years = self._years_for_id(rule[1], _param(params, rule[2]))
+        limit = _attach_limit(conn)
+        for start in range(0, len(years), limit):
+            self._ensure(conn, years[start:start + limit])
+            result = fetch(conn.execute(self._historic_sql(name, sql), params))
+            if result:
+                break
+        return result
+    
+    def sql_for(self, conn, name, sql, params):
+        """Texto a ejecutar para una sentencia sin búsqueda por id (el mismo si no llega a años archivados)"""
+        rule = ROUTED_STATEMENTS.get(name)
+        if rule is None or rule[0] == 'id' or not self.catalog(conn):
+            return sql
+        if rule[0] == 'todos':
+            years = sorted(self._catalog)
+        else:
+            years = self._years_for_range(_param(params, rule[1]), _param(params, rule[2]))
+        if not years:
+            return sql
+        self._ensure(conn, years)
+        return self._historic_sql(name, sql)
+    
+    def _historic_sql(self, name, sql):
+        historic = self._historic.get(name)
+        if historic is None:
+            historic = self._historic[name] = historic_sql(sql)
+        return historic
+    
+    def _years_for_range(self, desde, hasta):
+        first = int(str(desde)[:4]) if desde else 0
+        last = int(str(hasta)[:4]) if hasta else 9999
+        return [year for year in self._catalog if first <= year <= last]
+    
+    def _years_for_id(self, table, id):
+        if id is None:
+            return []
+        return [year for year, row in self._catalog.items()
+                if row[f'Min{table}'] is not None and row[f'Min{table}'] <= id <= row[f'Max{table}']]
+    
+    def _ensure(self, conn, years):
+        """Adjunta los años a la conexión y recrea las vistas si hace falta"""
+        entry = self._attached.get(id(conn))
+        current = entry[1] if entry is not None and entry[0] is conn else ()
+        if set(years) <= set(current):
+            return
+        if conn.in_transaction:
+            # ATTACH y DETACH no se pueden ejecutar en medio de una transacción
+            missing = ', '.join(str(year) for year in sorted(set(years) - set(current)))
+            raise ArchiveError(f"La consulta necesita los años archivados {missing}, que no están adjuntos a la "
+                               f"conexión, dentro de una transacción: hágala fuera de la transacción")
+        limit = _attach_limit(conn)
+        wanted = sorted(set(current) | set(years))
+        if len(wanted) > limit:
+            wanted = sorted(years)
+        if len(wanted) > limit:
+            raise ArchiveError(f"La consulta abarca {len(wanted)} años archivados y SQLite admite "
+                               f"{limit} bases adjuntas por conexión: acote el rango de fechas")
+        
+        for year in current:
+            if year not in wanted:
+                conn.execute(f"DETACH DATABASE {SCHEMA_PREFIX}{year}")
+        for year in wanted:
+            if year not in current:
+                path = self.path(self._catalog[year]['Archivo'])
+                if not os.path.exists(path):
+                    raise ArchiveError(f"No se encuentra el archivo del año {year}: {path}")
+                conn.execute(f"ATTACH DATABASE ? AS {SCHEMA_PREFIX}{year}", (path,))
+        self._create_views(conn, wanted)
+        self._attached[id(conn)] = (conn, tuple(wanted))
+    
+    def _create_views(self, conn, years):
+        for table in ARCHIVED_TABLES:
+            columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+            selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+            for year in years:
+                schema = f"{SCHEMA_PREFIX}{year}"
+                available = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")}
+                # Columnas añadidas por migraciones posteriores al archivo
+                values = [column if column in available else f"NULL AS {column}" for column in columns]
+                selects.append(f"SELECT {', '.join(values)} FROM {schema}.{table}")
+            conn.execute(f"DROP VIEW IF EXISTS temp.{table}{VIEW_SUFFIX}")
+            conn.execute(f"CREATE TEMP VIEW {table}{VIEW_SUFFIX} AS {' UNION ALL '.join(selects)}")
+    
+    # Archivado
+    
+    def pending_years(self):
+        """Años cerrados que todavía tienen ventas o facturas en la base activa"""
+        last = self.last_closed_year()
+        row = self.db.fetch_one('archivo.first_fecha')
+        if row is None or row['Fecha'] is None:
+            return []
+        first = int(row['Fecha'][:4])
+        archived = self.catalog(refresh=True)
+        return [year for year in range(first, last + 1)
+                if year not in archived and self.db.fetch_one('archivo.has_data', (f"{year}-01-01", f"{year}-12-31"))]
+    
+    def archive_closed_years(self, vacuum=True):
+        """Archiva todos los años cerrados pendientes; devuelve un registro por año"""
+        records = [self.archive_year(year, vacuum=False) for year in self.pending_years()]
+        if records and vacuum:
+            self.vacuum()
+        return records
+    
+    def archive_year(self, year, vacuum=True):
+        """Mueve las ventas y facturas de un año cerrado a su archivo y devuelve el registro.
+        
+        Primero se copia el año al archivo (una transacción que solo escribe en
+        él) y se comprueba con quick_check; después, en una transacción de la
+        base activa, se borran las filas y se da de alta el año en Archivo. Si
+        el proceso se corta entre ambas, el año sigue en la base activa y el
+        archivo a medias se rehace en el siguiente intento.
+        """
+        if year > self.last_closed_year():
+            raise ArchiveError(f"El año {year} no está cerrado: se conservan los últimos {self.keep_years} años")
+        if year in self.catalog(refresh=True):
+            raise ArchiveError(f"El año {year} ya está archivado")
+        
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"{self.prefix}-{year}.db"
+        path = self.path(file_name)
+        if os.path.exists(path):
+            os.remove(path)
+        rango = (f"{year}-01-01", f"{year}-12-31")
+        start = time.perf_counter()
+        
+        # Conexión propia: ATTACH/DETACH sin tocar las conexiones del pool
+        conn = sqlite3.connect(self.db.db_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA busy_timeout = 10000")
+            conn.execute("ATTACH DATABASE ? AS archivo", (path,))
+            self._copy_schema(conn)
+            
+            # Fase 1: copia al archivo
+            conn.execute("BEGIN")
+            conn.execute("INSERT INTO archivo.Venta SELECT * FROM main.Venta WHERE Fecha BETWEEN ? AND ?", rango)
+            conn.execute("""INSERT INTO archivo.DetalleVenta SELECT * FROM main.DetalleVenta
+                            WHERE idVenta IN (SELECT idVenta FROM archivo.Venta)""")
+            conn.execute("INSERT INTO archivo.Factura SELECT * FROM main.Factura WHERE Fecha BETWEEN ? AND ?", rango)
+            conn.execute("""INSERT INTO archivo.DetalleFactura SELECT * FROM main.DetalleFactura
+                            WHERE idFactura IN (SELECT idFactura FROM archivo.Factura)""")
+            conn.execute("COMMIT")
+            check = conn.execute("PRAGMA archivo.quick_check").fetchone()[0]
+            if check != 'ok':
+                raise ArchiveError(f"El archivo del año {year} no superó quick_check: {check}")
+            ventas = conn.execute("SELECT COUNT(*), MIN(idVenta), MAX(idVenta) FROM archivo.Venta").fetchone()
+            facturas = conn.execute("SELECT COUNT(*), MIN(idFactura), MAX(idFactura) FROM archivo.Factura").fetchone()
+            
+            # Fase 2: borrado en la base activa y alta en el catálogo
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # El resumen diario conserva el año: se guarda antes de que los triggers de borrado lo descuenten
+                conn.execute("""CREATE TEMP TABLE resumen_archivado AS
+                                SELECT * FROM main.ResumenVentaDiaria WHERE Fecha BETWEEN ? AND ?""", rango)
+                # Primero Venta: su trigger descuenta la venta entera y el de cada línea ya no encuentra la venta
+                conn.execute("DELETE FROM main.Venta WHERE idVenta IN (SELECT idVenta FROM archivo.Venta)")
+                conn.execute("DELETE FROM main.DetalleVenta WHERE idVenta IN (SELECT idVenta FROM archivo.Venta)")
+                conn.execute("""DELETE FROM main.DetalleFactura
+                                WHERE idFactura IN (SELECT idFactura FROM archivo.Factura)""")
+                conn.execute("DELETE FROM main.Factura WHERE idFactura IN (SELECT idFactura FROM archivo.Factura)")
+                conn.execute("DELETE FROM main.ResumenVentaDiaria WHERE Fecha BETWEEN ? AND ?", rango)
+                conn.execute("INSERT INTO main.ResumenVentaDiaria SELECT * FROM temp.resumen_archivado")
+                conn.execute("DROP TABLE temp.resumen_archivado")
+                conn.execute("""INSERT INTO main.Archivo (Anio, Archivo, Ventas, Facturas, MinVenta, MaxVenta,
+                                                         MinFactura, MaxFactura, FechaArchivado)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                             (year, file_name, ventas[0], facturas[0], ventas[1], ventas[2], facturas[1], facturas[2],
+                              datetime.datetime.now().isoformat(timespec='seconds')))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        conn.execute("DETACH DATABASE archivo")
+        conn.close()
+        
+        self.catalog(refresh=True)
+        if vacuum:
+            self.vacuum()
+        return {
+            'year': year,
+            'path': path,
+            'ventas': ventas[0],
+            'facturas': facturas[0],
+            'bytes': os.path.getsize(path),
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+    
+    def vacuum(self):
+        """Compacta la base activa para devolver al disco las páginas que ocupaba el año archivado"""
+        conn = sqlite3.connect(self.db.db_path, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout = 10000")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    
+    def _copy_schema(self, conn):
+        """Crea en el archivo las tablas archivadas y sus índices con la definición de la base activa"""
+        placeholders = ', '.join('?' * len(ARCHIVED_TABLES))
+        rows = conn.execute(f"""SELECT type, sql FROM main.sqlite_master
+                                WHERE tbl_name IN ({placeholders}) AND type IN ('table', 'index')
+                                  AND sql IS NOT NULL
+                                ORDER BY type = 'index'""", ARCHIVED_TABLES).fetchall()
+        for row in rows:
+            conn.execute(_CREATE_PATTERN.sub(r'\1archivo.', row['sql'].strip(), count=1))
+
+
+if __name__ == "__main__":
+    import sys
+    
+    from .connection import DatabaseConnection
+    
+    db = DatabaseConnection()
+    db.create_tables()
+    archive = db.archive
+    if len(sys.argv) > 1:
+        records = [archive.archive_year(int(sys.argv[1]))]
+    else:
+        records = archive.archive_closed_years()
+    if not records:
+        print(f"No hay años cerrados pendientes (se conservan los últimos {archive.keep_years} años)")
+    for record in records:
+        print(f"Año {record['year']}: {record['ventas']} ventas y {record['facturas']} facturas en "
+              f"{record['path']} ({record['bytes'] / 2 ** 20:.1f} MB, {record['seconds']:.1f} s)")
@@ -0,0 +1,203 @@
+"""Copias de seguridad en caliente con sqlite3.Connection.backup ([Backup] de settings.ini).
+
+En modo WAL la lectura de la copia no bloquea a los escritores y se copia
+en un solo paso. Con el journal clásico (perfil 'durable') la lectura sí
+retiene los COMMIT, así que se copia por pasos de PagesPerStep páginas con
+una pausa de StepPauseMs entre pasos para que las ventas entren entre uno y
+otro. Si otra conexión escribe durante la copia, SQLite la reinicia; tras
+MAX_RESTARTS reinicios se termina en un solo paso.
+
+Cada copia se escribe primero como '.part', se comprueba con PRAGMA
+quick_check y solo entonces se renombra; se conservan las Keep más
+recientes. Cada intento (duración, bytes, páginas, reinicios, resultado)
+queda en backups.jsonl dentro del directorio de copias.
+
+BackupService.start() arranca un hilo que hace una copia cada
+BackupInterval días si AutoBackup está activo.
+"""
+import datetime
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config.config_manager import config_manager
+from .connection import DatabaseConnection
+
+LOG_NAME = 'backups.jsonl'
+MAX_RESTARTS = 3
+# Segundos entre comprobaciones de si toca copia, y antes de la primera
+CHECK_INTERVAL = 3600
+STARTUP_DELAY = 60
+
+
+class BackupError(Exception):
+    """La copia no se completó o no superó la comprobación de integridad"""
+    pass
+
+
+class _Restarted(Exception):
+    """La copia por pasos se reinició demasiadas veces"""
+    pass
+
+
+class BackupService:
+    """Copias de seguridad periódicas, rotadas y comprobadas de la base de datos"""
+    
+    def __init__(self, db=None, config=None):
+        self.db = db or DatabaseConnection()
+        config = config or config_manager.get_backup_config()
+        self.enabled = config['auto_backup']
+        directory = config['path']
+        if not os.path.isabs(directory):
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            directory = os.path.join(base_dir, directory)
+        self.directory = directory
+        self.interval = config['interval_days'] * 86400
+        self.keep = max(1, config['keep'])
+        self.pages_per_step = config['pages_per_step']
+        self.step_pause = config['step_pause_ms'] / 1000
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def prefix(self):
+        """Nombre de la base de datos sin extensión: las copias son <prefijo>-AAAAMMDD-HHMMSS.db"""
+        return os.path.splitext(os.path.basename(self.db.db_path))[0]
+    
+    def backups(self):
+        """Rutas de las copias existentes, la más reciente primero"""
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}-*.db")), reverse=True)
+    
+    def last_backup_time(self):
+        """Fecha de la última copia (datetime) o None si no hay ninguna"""
+        backups = self.backups()
+        if not backups:
+            return None
+        return datetime.datetime.fromtimestamp(os.path.getmtime(backups[0]))
+    
+    def is_due(self):
+        """Indica si ya pasó BackupInterval desde la última copia"""
+        last = self.last_backup_time()
+        return last is None or (datetime.datetime.now() - last).total_seconds() >= self.interval
+    
+    def backup(self):
+        """Hace una copia ahora y devuelve su registro; lanza BackupError si falla"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(self.directory, f"{self.prefix}-{stamp}.db")
+            partial = path + '.part'
+            record = {'started': datetime.datetime.now().isoformat(timespec='seconds'), 'path': path}
+            start = time.perf_counter()
+            try:
+                record.update(self._copy(partial))
+                record['quick_check'] = self._quick_check(partial)
+                if record['quick_check'] != 'ok':
+                    raise BackupError(f"La copia no superó quick_check: {record['quick_check']}")
+                os.replace(partial, path)
+                record['bytes'] = os.path.getsize(path)
+                record['ok'] = True
+            except Exception as e:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                record.update(ok=False, error=str(e))
+                if isinstance(e, BackupError):
+                    raise
+                raise BackupError(f"Error en la copia de seguridad: {e}") from e
+            finally:
+                record['seconds'] = round(time.perf_counter() - start, 3)
+                self._log(record)
+            record['removed'] = self._rotate()
+            return record
+    
+    def _copy(self, path):
+        """Copia la base de datos a `path`; devuelve páginas, pasos y reinicios"""
+        state = {'steps': 0, 'restarts': 0, 'remaining': None, 'pages': 0}
+        
+        def progress(status, remaining, total):
+            if state['remaining'] is not None and remaining > state['remaining']:
+                # Otra conexión escribió: SQLite empieza de nuevo
+                state['restarts'] += 1
+                if state['restarts'] > MAX_RESTARTS:
+                    raise _Restarted()
+            state.update(steps=state['steps'] + 1, remaining=remaining, pages=total)
+            if remaining:
+                time.sleep(self.step_pause)
+        
+        # Conexiones propias: la copia no ocupa una conexión del pool
+        source = sqlite3.connect(self.db.db_path)
+        target = sqlite3.connect(path)
+        try:
+            source.execute("PRAGMA busy_timeout = 5000")
+            wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+            state['single_step'] = True
+            try:
+                source.backup(target, pages=-1 if wal else self.pages_per_step, progress=progress)
+                state['single_step'] = wal
+            except _Restarted:
+                source.backup(target, pages=-1)
+        finally:
+            target.close()
+            source.close()
+        del state['remaining']
+        return state
+    
+    def _quick_check(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+    
+    def _rotate(self):
+        """Borra las copias que exceden Keep; devuelve las rutas borradas"""
+        removed = self.backups()[self.keep:]
+        for path in removed:
+            os.remove(path)
+        return removed
+    
+    def _log(self, record):
+        with open(os.path.join(self.directory, LOG_NAME), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    
+    def history(self, limit=None):
+        """Registros de las copias (backups.jsonl), el más reciente primero"""
+        log_path = os.path.join(self.directory, LOG_NAME)
+        if not os.path.exists(log_path):
+            return []
+        with open(log_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        records.reverse()
+        return records[:limit] if limit else records
+    
+    def start(self):
+        """Arranca el hilo de copias periódicas; False si AutoBackup está desactivado"""
+        if not self.enabled:
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='db-backup', daemon=True)
+            self._thread.start()
+        return True
+    
+    def stop(self, wait=True):
+        """Detiene el hilo; una copia en curso termina antes"""
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+    
+    def _run(self):
+        # Sin copias durante el arranque de la aplicación
+        if self._stop.wait(STARTUP_DELAY):
+            return
+        while not self._stop.is_set():
+            if self.is_due():
+                try:
+                    self.backup()
+                except BackupError as e:
+                    print(e)
+            self._stop.wait(min(CHECK_INTERVAL, self.interval))
@@ -0,0 +1,88 @@
+"""Base de datos ocupada (SQLITE_BUSY): política de reintentos con espera aleatoria.
+
+SQLite ya espera el bloqueo de escritura hasta busy_timeout; si aun así
+otra conexión lo retiene, la operación falla con "database is locked". Solo
+se reintenta lo que puede repetirse entero sin efectos a medias:
+
+- una sentencia fuera de transacción (es su propia transacción),
+- la apertura de una transacción (BEGIN IMMEDIATE todavía no escribió nada),
+- una transacción completa con run_in_transaction (se deshace y se repite).
+
+Una sentencia dentro de una transacción abierta no se reintenta sola: el
+error sube hasta quien abrió la transacción.
+
+Entre intentos se espera un tiempo aleatorio entre 0 y base * 2**intento
+(con tope en max_delay) para que las terminales que chocaron no vuelvan a
+chocar a la vez. Agotados los intentos se lanza DatabaseBusyError.
+"""
+import random
+import sqlite3
+import time
+
+# Códigos de error de SQLite (sqlite3.OperationalError.sqlite_errorcode, Python 3.11+)
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+class DatabaseBusyError(sqlite3.OperationalError):
+    """La base de datos siguió bloqueada por otra conexión después de todos los reintentos"""
+    
+    def __init__(self, name, attempts, waited):
+        super().__init__(f"Base de datos ocupada: '{name}' no obtuvo el bloqueo tras "
+                         f"{attempts} intentos ({waited * 1000:.0f} ms)")
+        self.name = name
+        self.attempts = attempts
+        self.waited = waited
+
+
+def is_busy(error):
+    """Indica si una excepción de sqlite3 es un bloqueo (SQLITE_BUSY / SQLITE_LOCKED)"""
+    if isinstance(error, DatabaseBusyError) or not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        # Los códigos extendidos llevan el principal en el byte bajo
+        return code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED)
+    message = str(error)
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+class RetryPolicy:
+    """Reintentos acotados con espera aleatoria (full jitter) ante SQLITE_BUSY"""
+    
+    def __init__(self, retries=3, base_delay=0.02, max_delay=1.0):
+        self.retries = max(0, int(retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    @classmethod
+    def from_config(cls, db_config):
+        return cls(retries=db_config['busy_retries'],
+                   base_delay=db_config['busy_retry_base_ms'] / 1000,
+                   max_delay=db_config['busy_retry_max_ms'] / 1000)
+    
+    def delay(self, attempt):
+        """Espera antes del reintento número `attempt` (desde 0)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+    
+    def call(self, name, operation, on_retry=None):
+        """Ejecuta operation() reintentando mientras la base esté ocupada.
+        
+        on_retry(error, espera) se llama antes de cada reintento. Agotados
+        los reintentos se lanza DatabaseBusyError encadenada al último error.
+        """
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                if not is_busy(e):
+                    raise
+                if attempt >= self.retries:
+                    raise DatabaseBusyError(name, attempt + 1, time.perf_counter() - start) from e
+                wait = self.delay(attempt)
+                if on_retry is not None:
+                    on_retry(e, wait)
+                time.sleep(wait)
+                attempt += 1
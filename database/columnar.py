@@ -0,0 +1,124 @@
+"""Resultados por columnas: arrays de NumPy y DataFrames de pandas.
+
+DatabaseConnection.fetch_columns y fetch_frame leen el cursor por bloques
+(fetchmany) sin sqlite3.Row y convierten cada bloque columna a columna, de
+modo que un reporte de cientos de miles de filas no crea un objeto por fila.
+
+Los tipos se deciden por el nombre de la columna (o por `dtypes`):
+
+- 'money': importes en céntimos, int64 (como en el resto de la aplicación)
+- 'date': fechas ISO, datetime64[D] (datetime64[s] en pandas, que no tiene días)
+- 'int', 'float': int64 / float64
+- 'str': objeto (textos)
+
+Las columnas sin tipo conocido se infieren del primer valor no nulo. Un
+entero con NULL queda como float64 con NaN en fetch_columns y como Int64
+(entero con nulos) en fetch_frame.
+
+NumPy y pandas se importan solo al usar estas funciones.
+"""
+
+# Columnas con importes en céntimos (tablas y alias de los reportes)
+MONEY_COLUMNS = {
+    'Precio', 'PrecioUni', 'SubTotal', 'Impuesto', 'Total', 'Ingresos',
+    'total_vendido', 'total_gastado', 'ingresos'
+}
+# Columnas de fecha (texto ISO 'AAAA-MM-DD')
+DATE_COLUMNS = {'Fecha', 'fecha'}
+
+DEFAULT_CHUNK_SIZE = 10000
+
+_NUMPY_DTYPES = {'money': 'int64', 'int': 'int64', 'float': 'float64', 'date': 'datetime64[D]', 'str': object}
+
+
+def column_kind(name, value=None):
+    """Tipo de una columna por su nombre o, si no se conoce, por un valor no nulo (None si no hay)"""
+    if name in MONEY_COLUMNS:
+        return 'money'
+    if name in DATE_COLUMNS:
+        return 'date'
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    return 'str'
+
+
+class _Column:
+    """Bloques ya convertidos de una columna y si alguno tenía NULL"""
+    
+    def __init__(self, name, kind=None):
+        self.name = name
+        self.kind = kind
+        self.chunks = []
+        self.has_nulls = False
+        # Filas leídas antes de conocer el tipo (solo NULL hasta ahora)
+        self.pending = 0
+    
+    def add(self, values, np):
+        if self.kind is None:
+            value = next((v for v in values if v is not None), None)
+            if value is None:
+                self.pending += len(values)
+                return
+            self.kind = column_kind(self.name, value)
+        if self.pending:
+            values = (None,) * self.pending + values
+            self.pending = 0
+        
+        if self.kind in ('int', 'money') and None in values:
+            # Los enteros no admiten NULL en NumPy: el bloque va como float con NaN
+            self.has_nulls = True
+            self.chunks.append(np.array(values, dtype='float64'))
+        else:
+            self.chunks.append(np.array(values, dtype=_NUMPY_DTYPES[self.kind]))
+    
+    def finish(self, np):
+        if self.kind is None:
+            # Todo NULL (o sin filas)
+            return np.full(self.pending, np.nan) if self.pending else np.array([], dtype=object)
+        if self.has_nulls:
+            return np.concatenate([chunk.astype('float64') for chunk in self.chunks])
+        if not self.chunks:
+            return np.array([], dtype=_NUMPY_DTYPES[self.kind])
+        return np.concatenate(self.chunks) if len(self.chunks) > 1 else self.chunks[0]
+
+
+def read_columns(cursor, dtypes=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lee un cursor ya ejecutado por bloques y devuelve ({columna: array}, {columna: tipo}).
+    
+    `dtypes` fija el tipo ('money', 'date', 'int', 'float', 'str') de las
+    columnas indicadas; el resto se decide por nombre o por el primer valor.
+    """
+    import numpy as np
+    
+    dtypes = dtypes or {}
+    names = [description[0] for description in cursor.description]
+    columns = [_Column(name, dtypes.get(name) or column_kind(name)) for name in names]
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for column, values in zip(columns, zip(*rows)):
+            column.add(values, np)
+    arrays = {column.name: column.finish(np) for column in columns}
+    kinds = {column.name: column.kind for column in columns}
+    return arrays, kinds
+
+
+def to_frame(arrays, kinds, index=None):
+    """DataFrame con las columnas leídas; los enteros con NULL pasan a Int64"""
+    import pandas as pd
+    
+    data = {}
+    for name, array in arrays.items():
+        if kinds[name] in ('int', 'money') and array.dtype.kind == 'f':
+            data[name] = pd.array(array, dtype='Int64')
+        else:
+            data[name] = array
+    frame = pd.DataFrame(data, columns=list(arrays))
+    if index is not None:
+        frame = frame.set_index(index)
+    return frame
@@ -1,51 +1,461 @@
 import sqlite3
 import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config.config_manager import config_manager
+from .archive import Archive
+from .busy import DatabaseBusyError, RetryPolicy
+from .pool import ConnectionPool
+from .slowlog import SlowQueryLog
+from .writer import WriteQueue
+from .profiles import apply_profile, read_pragmas
+from .migrations import LATEST_VERSION, get_schema_version, run_migrations
+from . import columnar, statements
 
 class DatabaseConnection:
     _instance = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
-            # Crear el directorio de datos si no existe
-            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
-            if not os.path.exists(data_dir):
-                os.makedirs(data_dir)
-            
-            # Ruta de la base de datos
-            cls.db_path = os.path.join(data_dir, 'dcorelp.db')
-            cls._instance.connection = None
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super(DatabaseConnection, cls).__new__(cls)
+                    instance._local = threading.local()
+                    instance.pool = None
+                    instance.writer = None
+                    instance.profile = config_manager.get_database_config()['profile']
+                    # Versión del perfil activo y la aplicada a cada conexión (por id)
+                    instance._profile_version = 0
+                    instance._applied_profile = {}
+                    
+                    # Ruta de la base de datos (relativa al directorio del proyecto)
+                    db_config = config_manager.get_database_config()
+                    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                    db_path = db_config['path']
+                    if not os.path.isabs(db_path):
+                        db_path = os.path.join(base_dir, db_path)
+                    instance.set_database_path(db_path)
+                    cls._instance = instance
         return cls._instance
     
+    def set_database_path(self, db_path):
+        """Apunta el pool a otra base de datos, cerrando las conexiones anteriores"""
+        # Crear el directorio de datos si no existe
+        data_dir = os.path.dirname(db_path)
+        if data_dir and not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        
+        if self.writer is not None:
+            self.writer.close()
+        if self.pool is not None:
+            self.pool.close()
+        
+        db_config = config_manager.get_database_config()
+        self.db_path = db_path
+        self.busy_timeout = db_config['busy_timeout_ms']
+        self.retry_policy = RetryPolicy.from_config(db_config)
+        # Años cerrados en bases de datos anuales, adjuntadas cuando una consulta las necesita
+        self.archive = Archive.from_config(self, config_manager.get_archive_config())
+        # Sentencias que superan [SlowLog] ThresholdMs, con su plan y quién las pidió
+        if getattr(self, 'slow_log', None) is not None:
+            self.slow_log.close()
+        self.slow_log = SlowQueryLog.from_config(config_manager.get_slowlog_config())
+        self._applied_profile = {}
+        self.pool = ConnectionPool(db_path, max_size=db_config['pool_size'],
+                                   timeout=db_config['pool_timeout'],
+                                   on_connect=self._apply_profile,
+                                   on_checkout=self._on_checkout,
+                                   cached_statements=statements.cache_size())
+        self._local = threading.local()
+        # Hilo escritor (se arranca con la primera escritura encolada)
+        self.writer = None
+        if db_config['group_commit']:
+            self.writer = WriteQueue(self, max_batch=db_config['group_commit_max_batch'],
+                                     window=db_config['group_commit_window_ms'] / 1000)
+    
+    def _apply_profile(self, conn):
+        """Configura una conexión con el perfil de rendimiento activo"""
+        version = self._profile_version
+        apply_profile(conn, self.profile, self.busy_timeout)
+        self._applied_profile[id(conn)] = version
+    
+    def _on_checkout(self, conn):
+        """Aplica el perfil a una conexión que sale del pool si cambió desde la última vez"""
+        if self._applied_profile.get(id(conn)) != self._profile_version:
+            self._apply_profile(conn)
+    
+    def set_profile(self, profile):
+        """Cambia el perfil de rendimiento sin cortar el trabajo en curso.
+        
+        Se cierran las conexiones libres (las nuevas se abren con el perfil) y
+        las que están en uso, o asignadas a un hilo, lo reciben al volver a
+        salir del pool; sus transacciones en curso no se ven afectadas.
+        """
+        self.profile = profile
+        self._profile_version += 1
+        self.pool.recycle()
+    
+    def current_pragmas(self):
+        """Valores efectivos de los PRAGMA de rendimiento en una conexión del pool"""
+        with self.connection() as conn:
+            return read_pragmas(conn)
+    
+    @contextmanager
+    def use_profile(self, profile):
+        """Aplica temporalmente otro perfil (p. ej. 'bulk-load') a la conexión del hilo.
+        
+        Pensado para cargas masivas e importaciones: el bloque trabaja con una
+        conexión propia y al salir se restaura el perfil configurado.
+        """
+        owns_connection = getattr(self._local, 'connection', None) is None
+        conn = self.connect()
+        apply_profile(conn, profile, self.busy_timeout)
+        try:
+            yield conn
+        finally:
+            self._apply_profile(conn)
+            if owns_connection:
+                self.close()
+    
     def connect(self):
-        if self.connection is None:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
-        return self.connection
+        """Devuelve la conexión asignada al hilo actual, tomándola del pool si no tiene"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = self.pool.acquire()
+            self._local.connection = conn
+        return conn
     
     def close(self):
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """Devuelve al pool la conexión asignada al hilo actual"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            self._local.connection = None
+            self.pool.release(conn)
     
-    def execute_query(self, query, params=()):
+    def close_all(self):
+        """Cierra todas las conexiones del pool (y termina el hilo escritor)"""
+        if self.writer is not None:
+            self.writer.close()
+        self.close()
+        self.pool.close()
+    
+    @contextmanager
+    def connection(self):
+        """Conexión para una operación: la del hilo si tiene una asignada o una prestada del pool"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            yield conn
+            return
+        
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+    
+    def pool_stats(self):
+        """Métricas del pool de conexiones, incluido el tiempo de espera en el checkout"""
+        return self.pool.stats()
+    
+    @contextmanager
+    def transaction(self, name='transaction'):
+        """Unidad de trabajo: confirma al salir del bloque o revierte si hay una excepción.
+        
+        Las transacciones anidadas se implementan con SAVEPOINT, de modo que un
+        método que abre su propia transacción puede llamarse dentro de otra.
+        BEGIN IMMEDIATE se reintenta si la base está ocupada y su espera queda
+        en lock_wait_stats() con el nombre `name`; el bloque no se repite (ver
+        run_in_transaction).
+        """
+        depth = getattr(self._local, 'tx_depth', 0)
+        owns_connection = depth == 0 and getattr(self._local, 'connection', None) is None
         conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        return cursor
+        savepoint = f"sp_{depth}"
+        
+        try:
+            if depth == 0:
+                self._begin(conn, name)
+            else:
+                conn.execute(f"SAVEPOINT {savepoint}")
+        except BaseException:
+            if owns_connection:
+                self.close()
+            raise
+        self._local.tx_depth = depth + 1
+        
+        try:
+            yield conn
+        except BaseException:
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            if depth == 0:
+                try:
+                    conn.execute("COMMIT")
+                except Exception:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+        finally:
+            self._local.tx_depth = depth
+            if owns_connection:
+                self.close()
+    
+    def _begin(self, conn, name):
+        """BEGIN IMMEDIATE con reintentos; registra la espera por el bloqueo de escritura"""
+        start = time.perf_counter()
+        retries = []
+        try:
+            self.retry_policy.call(name, lambda: conn.execute("BEGIN IMMEDIATE"),
+                                   on_retry=lambda error, wait: retries.append(wait))
+        except DatabaseBusyError:
+            self._record_lock_wait(name, start, len(retries), failed=True)
+            raise
+        self._record_lock_wait(name, start, len(retries))
+    
+    def in_transaction(self):
+        """Indica si el hilo actual tiene una transacción abierta"""
+        return getattr(self._local, 'tx_depth', 0) > 0
+    
+    def run_in_transaction(self, func, *args, **kwargs):
+        """Ejecuta func(*args, **kwargs) en una transacción y la repite entera si la base está ocupada.
+        
+        Para trabajo que puede repetirse desde el principio (solo accede a la
+        base de datos). Agotados los reintentos lanza DatabaseBusyError. Dentro
+        de una transacción ya abierta se ejecuta sin reintentos.
+        """
+        if self.in_transaction():
+            return func(*args, **kwargs)
+        name = getattr(func, '__qualname__', 'transaction')
+        
+        def attempt():
+            with self.transaction(name):
+                return func(*args, **kwargs)
+        return self.retry_policy.call(name, attempt)
+    
+    def _retry(self, name, operation):
+        """Reintenta operation() si la base está ocupada, salvo dentro de una transacción abierta"""
+        if self.in_transaction():
+            return operation()
+        return self.retry_policy.call(name, operation)
+    
+    def write(self, func, *args, **kwargs):
+        """Ejecuta una unidad de escritura en el hilo escritor y devuelve su resultado.
+        
+        func(*args, **kwargs) corre dentro de una transacción compartida con
+        otras escrituras que llegan a la vez (group commit, ver
+        database.writer); sus excepciones se relanzan aquí. Sin hilo escritor,
+        o si el hilo ya tiene una transacción abierta, se ejecuta en el hilo
+        actual con transaction().
+        """
+        writer = self.writer
+        if writer is None or self.in_transaction() or writer.is_writer_thread():
+            return self.run_in_transaction(func, *args, **kwargs)
+        return writer.submit(func, *args, **kwargs).result()
+    
+    def writer_stats(self):
+        """Lotes y trabajos confirmados por el hilo escritor (None si está desactivado)"""
+        return self.writer.stats() if self.writer is not None else None
+    
+    def execute_query(self, query, params=()):
+        """Ejecuta una sentencia de escritura (autocommit fuera de transaction()).
+        
+        `query` es el nombre de una sentencia del registro (database.statements)
+        o, para DDL y mantenimiento, un texto SQL. Fuera de transaction() las
+        sentencias del registro se ejecutan en su propia transacción (BEGIN
+        IMMEDIATE), que se reintenta entera si la base está ocupada.
+        """
+        name, sql = statements.resolve(query)
+        alone = name != statements.AD_HOC and not self.in_transaction()
+        
+        def execute():
+            with self.connection() as conn, self._alone(conn, name, alone):
+                start = time.perf_counter()
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                self._record(conn, name, sql, params, start, cursor.rowcount)
+                return cursor
+        return self._retry(name, execute)
+    
+    def execute_many(self, query, seq_of_params):
+        """Ejecuta una sentencia para cada juego de parámetros (todas o ninguna)"""
+        name, sql = statements.resolve(query)
+        alone = name != statements.AD_HOC and not self.in_transaction()
+        if not self.in_transaction():
+            # Lista: un generador no se puede recorrer de nuevo al reintentar
+            seq_of_params = list(seq_of_params)
+        
+        def execute():
+            with self.connection() as conn, self._alone(conn, name, alone):
+                start = time.perf_counter()
+                cursor = conn.cursor()
+                cursor.executemany(sql, seq_of_params)
+                self._record_many(conn, name, sql, seq_of_params, start, cursor.rowcount)
+                return cursor
+        return self._retry(name, execute)
+    
+    @contextmanager
+    def _alone(self, conn, name, enabled):
+        """Transacción propia de una escritura suelta, con la espera del bloqueo registrada a su nombre"""
+        if not enabled:
+            yield
+            return
+        self._begin(conn, name)
+        try:
+            yield
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
     
     def fetch_all(self, query, params=()):
-        cursor = self.execute_query(query, params)
-        return cursor.fetchall()
+        """Consulta de solo lectura: no confirma nada"""
+        name, sql = statements.resolve(query)
+        
+        def fetch():
+            with self.connection() as conn:
+                start = time.perf_counter()
+                rows = self.archive.read(conn, name, sql, params, sqlite3.Cursor.fetchall)
+                self._record(conn, name, sql, params, start, len(rows))
+                return rows
+        return self._retry(name, fetch)
     
     def fetch_one(self, query, params=()):
-        cursor = self.execute_query(query, params)
-        return cursor.fetchone()
+        """Consulta de solo lectura: no confirma nada"""
+        name, sql = statements.resolve(query)
+        
+        def fetch():
+            with self.connection() as conn:
+                start = time.perf_counter()
+                row = self.archive.read(conn, name, sql, params, sqlite3.Cursor.fetchone)
+                self._record(conn, name, sql, params, start, 0 if row is None else 1)
+                return row
+        return self._retry(name, fetch)
+    
+    def iterate(self, query, params=(), batch_size=1000):
+        """Recorre el resultado de una consulta leyendo de a `batch_size` filas con fetchmany.
+        
+        La memoria no depende del tamaño del resultado. La conexión queda
+        ocupada hasta que el generador se agota o se cierra.
+        """
+        name, sql = statements.resolve(query)
+        with self.connection() as conn:
+            start = time.perf_counter()
+            sql = self.archive.sql_for(conn, name, sql, params)
+            cursor = conn.execute(sql, params)
+            elapsed = time.perf_counter() - start
+            total = 0
+            try:
+                while True:
+                    start = time.perf_counter()
+                    rows = cursor.fetchmany(batch_size)
+                    elapsed += time.perf_counter() - start
+                    if not rows:
+                        break
+                    total += len(rows)
+                    yield from rows
+            finally:
+                cursor.close()
+                # Solo el tiempo dentro de SQLite, no el del consumidor
+                self._observe(conn, name, sql, params, elapsed, total)
+    
+    def fetch_columns(self, query, params=(), dtypes=None, chunk_size=columnar.DEFAULT_CHUNK_SIZE):
+        """Resultado por columnas: {columna: array de NumPy}, sin crear un objeto por fila.
+        
+        Importes en céntimos como int64 y fechas como datetime64[D] (ver
+        database.columnar); `dtypes` fija el tipo de columnas concretas.
+        """
+        arrays, _ = self._retry(statements.resolve(query)[0], lambda: self._read_columns(query, params, dtypes, chunk_size))
+        return arrays
+    
+    def fetch_frame(self, query, params=(), dtypes=None, chunk_size=columnar.DEFAULT_CHUNK_SIZE, index=None):
+        """Resultado como DataFrame de pandas con los tipos de fetch_columns"""
+        arrays, kinds = self._retry(statements.resolve(query)[0], lambda: self._read_columns(query, params, dtypes, chunk_size))
+        return columnar.to_frame(arrays, kinds, index)
+    
+    def _read_columns(self, query, params, dtypes, chunk_size):
+        name, sql = statements.resolve(query)
+        with self.connection() as conn:
+            start = time.perf_counter()
+            cursor = conn.cursor()
+            # Tuplas en lugar de sqlite3.Row: se transponen por bloques
+            cursor.row_factory = None
+            try:
+                sql = self.archive.sql_for(conn, name, sql, params)
+                cursor.execute(sql, params)
+                arrays, kinds = columnar.read_columns(cursor, dtypes, chunk_size)
+            finally:
+                cursor.close()
+            rows = len(next(iter(arrays.values()))) if arrays else 0
+            self._record(conn, name, sql, params, start, rows)
+            return arrays, kinds
+    
+    def _record(self, conn, name, sql, params, start, rows):
+        self._observe(conn, name, sql, params, time.perf_counter() - start, rows)
+    
+    def _record_many(self, conn, name, sql, seq_of_params, start, rows):
+        elapsed = time.perf_counter() - start
+        if statements.stats.enabled:
+            statements.stats.record(name, elapsed, rows)
+        if elapsed >= self.slow_log.threshold:
+            # Plan y parámetros del primer juego (dentro de una transacción puede ser un generador ya consumido)
+            sized = isinstance(seq_of_params, (list, tuple))
+            sample = seq_of_params[0] if sized and seq_of_params else ()
+            self._log_slow(conn, name, sql, sample, elapsed, rows, batch=len(seq_of_params) if sized else None)
+    
+    def _observe(self, conn, name, sql, params, elapsed, rows):
+        """Estadísticas por sentencia y, si supera el umbral, registro de consulta lenta"""
+        if statements.stats.enabled:
+            statements.stats.record(name, elapsed, rows)
+        if elapsed >= self.slow_log.threshold:
+            self._log_slow(conn, name, sql, params, elapsed, rows)
+    
+    def _log_slow(self, conn, name, sql, params, elapsed, rows, batch=None):
+        """Registro de consulta lenta; un fallo del registro (disco, permisos) nunca hace fallar la consulta"""
+        try:
+            self.slow_log.record(conn, name, sql, params, elapsed, rows, batch)
+        except Exception as e:
+            print(f"No se pudo registrar la consulta lenta '{name}': {e}")
+    
+    def _record_lock_wait(self, name, start, retries, failed=False):
+        if statements.stats.enabled:
+            statements.stats.record_lock_wait(name, time.perf_counter() - start, retries, failed)
+    
+    def statement_stats(self):
+        """Llamadas, tiempo (ms) y filas acumuladas por sentencia del registro"""
+        return statements.stats.snapshot()
+    
+    def reset_statement_stats(self):
+        statements.stats.reset()
+    
+    def lock_wait_stats(self):
+        """Espera por el bloqueo de escritura por sentencia o transacción: histograma, reintentos y fallos"""
+        return statements.stats.lock_wait_snapshot()
+    
+    def dump_statement_stats(self, path):
+        """Guarda las estadísticas por sentencia en un archivo JSON"""
+        return statements.stats.dump_json(path)
     
     def create_tables(self):
-        """Crea todas las tablas de la base de datos si no existen"""
-        conn = self.connect()
+        """Crea las tablas si no existen y aplica las migraciones pendientes"""
+        with self.connection() as conn:
+            # Esquema al día: no se ejecuta ninguna sentencia DDL
+            if get_schema_version(conn) >= LATEST_VERSION:
+                return []
+            self._create_tables(conn)
+            return run_migrations(conn)
+    
+    def _create_tables(self, conn):
         cursor = conn.cursor()
         
         # Tabla Categoria
@@ -57,12 +467,12 @@ class DatabaseConnection:
         )
         ''')
         
-        # Tabla Producto
+        # Tabla Producto (los importes se guardan en céntimos)
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS Producto (
             idProducto INTEGER PRIMARY KEY AUTOINCREMENT,
             NombrePro TEXT NOT NULL,
-            Precio REAL NOT NULL,
+            Precio INTEGER NOT NULL,
             Stock INTEGER NOT NULL,
             idCategoria INTEGER,
             FOREIGN KEY (idCategoria) REFERENCES Categoria(idCategoria)
@@ -96,7 +506,7 @@ class DatabaseConnection:
         CREATE TABLE IF NOT EXISTS Venta (
             idVenta INTEGER PRIMARY KEY AUTOINCREMENT,
             Fecha DATE NOT NULL DEFAULT CURRENT_DATE,
-            Total REAL NOT NULL,
+            Total INTEGER NOT NULL,
             idEmpleado INTEGER,
             idCliente INTEGER,
             FOREIGN KEY (idEmpleado) REFERENCES Empleado(idEmpleado),
@@ -109,8 +519,8 @@ class DatabaseConnection:
         CREATE TABLE IF NOT EXISTS DetalleVenta (
             idDetalleVenta INTEGER PRIMARY KEY AUTOINCREMENT,
             Cantidad INTEGER NOT NULL,
-            PrecioUni REAL NOT NULL,
-            SubTotal REAL NOT NULL,
+            PrecioUni INTEGER NOT NULL,
+            SubTotal INTEGER NOT NULL,
             idProducto INTEGER,
             idVenta INTEGER,
             FOREIGN KEY (idProducto) REFERENCES Producto(idProducto),
@@ -124,9 +534,9 @@ class DatabaseConnection:
             idFactura INTEGER PRIMARY KEY AUTOINCREMENT,
             NumeroFactura TEXT UNIQUE NOT NULL,
             Fecha DATE NOT NULL DEFAULT CURRENT_DATE,
-            SubTotal REAL NOT NULL,
-            Impuesto REAL NOT NULL DEFAULT 0,
-            Total REAL NOT NULL,
+            SubTotal INTEGER NOT NULL,
+            Impuesto INTEGER NOT NULL DEFAULT 0,
+            Total INTEGER NOT NULL,
             Estado TEXT NOT NULL DEFAULT 'Pendiente',
             Observaciones TEXT,
             idVenta INTEGER,
@@ -143,13 +553,11 @@ class DatabaseConnection:
         CREATE TABLE IF NOT EXISTS DetalleFactura (
             idDetalleFactura INTEGER PRIMARY KEY AUTOINCREMENT,
             Cantidad INTEGER NOT NULL,
-            PrecioUni REAL NOT NULL,
-            SubTotal REAL NOT NULL,
+            PrecioUni INTEGER NOT NULL,
+            SubTotal INTEGER NOT NULL,
             idProducto INTEGER,
             idFactura INTEGER,
             FOREIGN KEY (idProducto) REFERENCES Producto(idProducto),
             FOREIGN KEY (idFactura) REFERENCES Factura(idFactura)
         )
-        ''')
-        
-        conn.commit()
\ No newline at end of file
+        ''')
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""Mapa de identidad por sesión para las búsquedas de modelos por ID.
+
+Dentro de una sesión (`with identity.session():`), Model.get_by_id devuelve
+la misma instancia para el mismo ID sin volver a consultar la base de datos;
+save() deja en el mapa el objeto guardado y delete() lo quita, de modo que
+lo que se lee después dentro de la sesión refleja lo escrito.
+
+Fuera de una sesión no hay caché: varias terminales escriben en la misma
+base, y un objeto retenido más allá de una operación (por ejemplo el stock
+de un producto) podría quedar desactualizado. Por eso las sesiones duran lo
+que dura una operación de la interfaz, como la edición de una factura.
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Entradas por sesión; las menos usadas recientemente se descartan primero
+DEFAULT_MAX_SIZE = 1024
+
+_local = threading.local()
+
+
+class IdentityMap:
+    """Caché LRU acotada de instancias de modelos por (clase, id)"""
+    
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._objects = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, cls, id):
+        key = (cls, id)
+        obj = self._objects.get(key)
+        if obj is None:
+            self.misses += 1
+            return None
+        self._objects.move_to_end(key)
+        self.hits += 1
+        return obj
+    
+    def put(self, obj):
+        key = (type(obj), obj.id)
+        self._objects[key] = obj
+        self._objects.move_to_end(key)
+        while len(self._objects) > self.max_size:
+            self._objects.popitem(last=False)
+            self.evictions += 1
+    
+    def adopt(self, obj):
+        """Devuelve la instancia ya mapeada con la misma clave, o mapea `obj` (carga anticipada)"""
+        existing = self._objects.get((type(obj), obj.id))
+        if existing is None:
+            self.put(obj)
+            return obj
+        self._objects.move_to_end((type(obj), obj.id))
+        return existing
+    
+    def discard(self, cls, id):
+        self._objects.pop((cls, id), None)
+    
+    def discard_class(self, cls):
+        """Quita todas las instancias de una clase (tras escrituras de varias filas)"""
+        for key in [key for key in self._objects if key[0] is cls]:
+            del self._objects[key]
+    
+    def clear(self):
+        self._objects.clear()
+    
+    def __len__(self):
+        return len(self._objects)
+    
+    def stats(self):
+        """Aciertos, fallos, descartes por LRU y entradas actuales"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'size': len(self._objects)
+        }
+
+
+def current():
+    """Mapa de la sesión activa en este hilo, o None fuera de una sesión"""
+    return getattr(_local, 'map', None)
+
+
+@contextmanager
+def session(identity_map=None):
+    """Activa un mapa de identidad en este hilo durante el bloque.
+    
+    Una sesión anidada sin mapa propio reutiliza la de fuera. Se puede pasar
+    un IdentityMap para retomar la misma sesión en varios bloques (por ejemplo,
+    en cada evento de un formulario). Si el bloque termina con una excepción
+    el mapa se vacía: una transacción revertida pudo dejar objetos con cambios
+    que no llegaron a la base de datos.
+    """
+    previous = current()
+    if identity_map is None:
+        identity_map = previous if previous is not None else IdentityMap()
+    _local.map = identity_map
+    try:
+        yield identity_map
+    except BaseException:
+        identity_map.clear()
+        raise
+    finally:
+        _local.map = previous
+
+
+def remember(obj):
+    """Deja en el mapa de la sesión activa un objeto recién guardado"""
+    identity_map = current()
+    if identity_map is not None and obj.id is not None:
+        identity_map.put(obj)
+
+
+def forget(cls, id):
+    """Quita del mapa de la sesión activa un objeto eliminado"""
+    identity_map = current()
+    if identity_map is not None:
+        identity_map.discard(cls, id)
+
+
+def forget_class(cls):
+    identity_map = current()
+    if identity_map is not None:
+        identity_map.discard_class(cls)
@@ -0,0 +1,184 @@
+"""Migraciones versionadas del esquema.
+
+La versión aplicada se guarda en PRAGMA user_version. Cada migración es una
+lista de pasos (sentencias SQL o funciones que reciben la conexión) que se
+ejecutan en su propia transacción junto con el cambio de versión.
+"""
+from .search import create_fts_indexes
+from .summary import create_summary
+
+# Índices secundarios (migración 1); se recrean al reconstruir una tabla
+_INDICES = [
+    "CREATE INDEX IF NOT EXISTS idx_venta_fecha ON Venta(Fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_venta_cliente ON Venta(idCliente, Fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_venta_empleado ON Venta(idEmpleado)",
+    "CREATE INDEX IF NOT EXISTS idx_detalleventa_venta ON DetalleVenta(idVenta)",
+    "CREATE INDEX IF NOT EXISTS idx_detalleventa_producto ON DetalleVenta(idProducto)",
+    "CREATE INDEX IF NOT EXISTS idx_detallefactura_factura ON DetalleFactura(idFactura)",
+    "CREATE INDEX IF NOT EXISTS idx_factura_estado ON Factura(Estado, Fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_factura_venta ON Factura(idVenta)",
+    "CREATE INDEX IF NOT EXISTS idx_factura_fecha ON Factura(Fecha)"
+]
+
+# Tablas con importes: definición con columnas INTEGER (céntimos) y columnas a convertir
+_TABLAS_IMPORTES = [
+    ('Producto', """CREATE TABLE Producto_nueva (
+            idProducto INTEGER PRIMARY KEY AUTOINCREMENT,
+            NombrePro TEXT NOT NULL,
+            Precio INTEGER NOT NULL,
+            Stock INTEGER NOT NULL,
+            idCategoria INTEGER,
+            FOREIGN KEY (idCategoria) REFERENCES Categoria(idCategoria)
+        )""", ('Precio',)),
+    ('Venta', """CREATE TABLE Venta_nueva (
+            idVenta INTEGER PRIMARY KEY AUTOINCREMENT,
+            Fecha DATE NOT NULL DEFAULT CURRENT_DATE,
+            Total INTEGER NOT NULL,
+            idEmpleado INTEGER,
+            idCliente INTEGER,
+            FOREIGN KEY (idEmpleado) REFERENCES Empleado(idEmpleado),
+            FOREIGN KEY (idCliente) REFERENCES Cliente(idCliente)
+        )""", ('Total',)),
+    ('DetalleVenta', """CREATE TABLE DetalleVenta_nueva (
+            idDetalleVenta INTEGER PRIMARY KEY AUTOINCREMENT,
+            Cantidad INTEGER NOT NULL,
+            PrecioUni INTEGER NOT NULL,
+            SubTotal INTEGER NOT NULL,
+            idProducto INTEGER,
+            idVenta INTEGER,
+            FOREIGN KEY (idProducto) REFERENCES Producto(idProducto),
+            FOREIGN KEY (idVenta) REFERENCES Venta(idVenta)
+        )""", ('PrecioUni', 'SubTotal')),
+    ('Factura', """CREATE TABLE Factura_nueva (
+            idFactura INTEGER PRIMARY KEY AUTOINCREMENT,
+            NumeroFactura TEXT UNIQUE NOT NULL,
+            Fecha DATE NOT NULL DEFAULT CURRENT_DATE,
+            SubTotal INTEGER NOT NULL,
+            Impuesto INTEGER NOT NULL DEFAULT 0,
+            Total INTEGER NOT NULL,
+            Estado TEXT NOT NULL DEFAULT 'Pendiente',
+            Observaciones TEXT,
+            idVenta INTEGER,
+            idCliente INTEGER,
+            idEmpleado INTEGER,
+            FOREIGN KEY (idVenta) REFERENCES Venta(idVenta),
+            FOREIGN KEY (idCliente) REFERENCES Cliente(idCliente),
+            FOREIGN KEY (idEmpleado) REFERENCES Empleado(idEmpleado)
+        )""", ('SubTotal', 'Impuesto', 'Total')),
+    ('DetalleFactura', """CREATE TABLE DetalleFactura_nueva (
+            idDetalleFactura INTEGER PRIMARY KEY AUTOINCREMENT,
+            Cantidad INTEGER NOT NULL,
+            PrecioUni INTEGER NOT NULL,
+            SubTotal INTEGER NOT NULL,
+            idProducto INTEGER,
+            idFactura INTEGER,
+            FOREIGN KEY (idProducto) REFERENCES Producto(idProducto),
+            FOREIGN KEY (idFactura) REFERENCES Factura(idFactura)
+        )""", ('PrecioUni', 'SubTotal'))
+]
+
+
+def _importes_a_centimos(conn):
+    """Reconstruye las tablas con importes REAL como INTEGER en céntimos.
+    
+    SQLite no permite cambiar el tipo de una columna: se crea la tabla nueva,
+    se copian los datos convirtiendo los importes, se reemplaza la anterior y
+    se conserva el contador AUTOINCREMENT.
+    """
+    for tabla, create_sql, columnas_importe in _TABLAS_IMPORTES:
+        columnas = [row[1] for row in conn.execute(f"PRAGMA table_info({tabla})")]
+        valores = [f"CAST(ROUND({col} * 100) AS INTEGER)" if col in columnas_importe else col
+                   for col in columnas]
+        secuencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabla,)).fetchone()
+        
+        conn.execute(create_sql)
+        conn.execute(f"INSERT INTO {tabla}_nueva ({', '.join(columnas)}) "
+                     f"SELECT {', '.join(valores)} FROM {tabla}")
+        conn.execute(f"DROP TABLE {tabla}")
+        conn.execute(f"ALTER TABLE {tabla}_nueva RENAME TO {tabla}")
+        if secuencia:
+            conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                         (secuencia[0], tabla))
+    
+    for sql in _INDICES:
+        conn.execute(sql)
+
+
+MIGRATIONS = [
+    (1, "Índices secundarios para reportes y búsquedas por clave foránea", _INDICES),
+    (2, "Secuencia de números de factura por serie", [
+        """CREATE TABLE IF NOT EXISTS SecuenciaFactura (
+            Serie TEXT PRIMARY KEY,
+            Ultimo INTEGER NOT NULL DEFAULT 0
+        )""",
+        """INSERT OR IGNORE INTO SecuenciaFactura (Serie, Ultimo)
+           SELECT 'FAC-', COALESCE(MAX(CAST(SUBSTR(NumeroFactura, 5) AS INTEGER)), 0)
+           FROM Factura WHERE NumeroFactura LIKE 'FAC-%'"""
+    ]),
+    (3, "Importes en céntimos (INTEGER) en lugar de REAL", [_importes_a_centimos]),
+    (4, "Índices de texto completo (FTS5) para búsquedas", [create_fts_indexes]),
+    (5, "Resumen diario de ventas mantenido por triggers", [create_summary]),
+    # La clave primaria va implícita al final de cada índice: (columna, id) es el orden de los listados
+    (6, "Índices para el orden de los listados y la paginación por clave", [
+        "CREATE INDEX IF NOT EXISTS idx_producto_nombre ON Producto(NombrePro)",
+        "CREATE INDEX IF NOT EXISTS idx_cliente_nombre ON Cliente(NombreCli)",
+        "CREATE INDEX IF NOT EXISTS idx_empleado_nombre ON Empleado(NombreEmp)",
+        "CREATE INDEX IF NOT EXISTS idx_categoria_nombre ON Categoria(NombreCat)",
+        "CREATE INDEX IF NOT EXISTS idx_factura_cliente ON Factura(idCliente, Fecha)"
+    ]),
+    # Cada UPDATE de los modelos la incrementa (statements.VERSIONED)
+    (7, "Versión de fila en Producto y Factura para la concurrencia optimista", [
+        "ALTER TABLE Producto ADD COLUMN Version INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE Factura ADD COLUMN Version INTEGER NOT NULL DEFAULT 0"
+    ]),
+    # Rangos de ids para buscar una venta o factura archivada sin adjuntar todos los años
+    (8, "Catálogo de años archivados en bases de datos anuales", [
+        """CREATE TABLE IF NOT EXISTS Archivo (
+            Anio INTEGER PRIMARY KEY,
+            Archivo TEXT NOT NULL,
+            Ventas INTEGER NOT NULL DEFAULT 0,
+            Facturas INTEGER NOT NULL DEFAULT 0,
+            MinVenta INTEGER,
+            MaxVenta INTEGER,
+            MinFactura INTEGER,
+            MaxFactura INTEGER,
+            FechaArchivado TEXT
+        )"""
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Devuelve la versión de esquema guardada en la base de datos"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn):
+    """Aplica en orden las migraciones pendientes y devuelve las versiones aplicadas"""
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Otra terminal pudo aplicar la migración mientras esperábamos el bloqueo
+            if get_schema_version(conn) >= version:
+                conn.execute("ROLLBACK")
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
@@ -1,13 +1,448 @@
+from operator import attrgetter
+
+from . import identity, statements
 from .connection import DatabaseConnection
 
+def _compile_mapper(cls, keys):
+    """Compila la función que convierte una fila con columnas `keys` en un modelo.
+    
+    La fila se desempaqueta por posición y cada columna del mapa del modelo se
+    asigna a su atributo sin pasar por __init__ ni buscar columnas por nombre.
+    Las columnas del modelo y de _extra_columns que falten en la fila quedan en
+    None. Con nombres repetidos (JOIN) vale la primera aparición.
+    """
+    positions = {}
+    for i, key in enumerate(keys):
+        positions.setdefault(key, i)
+    names = [f"c{i}" for i in range(len(keys))]
+    lines = ["def map_row(row):",
+             f"    {', '.join(names)}, = row",
+             "    obj = new(cls)"]
+    for column, attribute in list(cls._column_map.items()) + list(cls._extra_columns.items()):
+        lines.append(f"    obj.{attribute} = {names[positions[column]] if column in positions else 'None'}")
+    lines.append("    return obj")
+    namespace = {'new': object.__new__, 'cls': cls}
+    exec('\n'.join(lines), namespace)
+    return namespace['map_row']
+
+# Intentos de Model.modify cuando otra terminal escribe entre la lectura y el UPDATE
+CONFLICT_RETRIES = 3
+
+class ConflictError(Exception):
+    """Otra terminal modificó o eliminó el registro desde que se leyó su versión"""
+    
+    def __init__(self, model, id, version):
+        super().__init__(f"{model.__name__} {id} fue modificado por otro usuario (versión leída: {version})")
+        self.model = model
+        self.id = id
+        self.version = version
+
+class _SharedConnection:
+    """Conexión compartida por todos los modelos (atributo de clase `db`).
+    
+    Se resuelve en el primer acceso y queda fijada en BaseModel, de modo que
+    crear un modelo no consulta el singleton DatabaseConnection.
+    """
+    def __get__(self, instance, owner):
+        db = DatabaseConnection()
+        BaseModel.db = db
+        return db
+
 class BaseModel:
-    """Clase base para todos los modelos"""
-    def __init__(self):
-        self.db = DatabaseConnection()
+    """Clase base para todos los modelos.
+    
+    Los modelos declaran __slots__: cada instancia guarda solo sus campos, sin
+    __dict__, lo que reduce memoria y tiempo al cargar listas grandes.
+    
+    Un objeto leído con get_by_id o ya guardado recuerda los valores de sus
+    columnas (_loaded); save() actualiza entonces solo las que cambiaron.
+    
+    Los modelos de tablas con versión (statements.VERSIONED) tienen además el
+    atributo `version`: los UPDATE de un objeto leído solo se aplican si la fila
+    sigue en esa versión y, si no, lanzan ConflictError sin bloquear la tabla
+    mientras se edita. Model.modify reintenta la lectura y el cambio.
+    """
+    __slots__ = ('_loaded',)
+    db = _SharedConnection()
+    
+    # Prefijo de las sentencias del modelo en el registro (database.statements)
+    _statements = None
+    # Atributos en el orden de las columnas de '<_statements>.insert' (MODEL_TABLES);
+    # con la clave primaria como `id` forman el mapa columna -> atributo del modelo
+    _fields = ()
+    # Columnas que solo traen algunas consultas con JOIN: columna -> atributo
+    _extra_columns = {}
+    # Atributos que forman la clave del orden de get_all (paginación por clave)
+    _page_key = ('id',)
+    # Relaciones que se pueden cargar con include=[...]: nombre -> (modelo,
+    # columna NOT NULL del modelo relacionado, NULL en la fila si no existe)
+    _relations = {}
+    # Atributos de columnas UNIQUE que upsert_many acepta como conflict_key
+    _unique_keys = {}
+    # Tabla con columna de versión (statements.VERSIONED); se calcula al definir el modelo
+    _versioned = False
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls._fields:
+            _, pk, cls._columns, _ = statements.MODEL_TABLES[cls._statements]
+            cls._getter = attrgetter(*cls._fields)
+            cls._field_index = {field: i for i, field in enumerate(cls._fields)}
+            cls._column_map = {pk: 'id', **dict(zip(cls._columns, cls._fields))}
+            cls._versioned = cls._statements in statements.VERSIONED
+            if cls._versioned:
+                cls._column_map[statements.VERSION_COLUMN] = 'version'
+            cls._mappers = {}
+    
+    @classmethod
+    def _mapper(cls, keys):
+        """Función fila -> modelo para filas con estas columnas, compilada una sola vez"""
+        keys = tuple(keys)
+        mapper = cls._mappers.get(keys)
+        if mapper is None:
+            mapper = cls._mappers[keys] = _compile_mapper(cls, keys)
+        return mapper
+    
+    @classmethod
+    def from_row(cls, row):
+        """Modelo a partir de una fila (sqlite3.Row) de su tabla o de una consulta con JOIN"""
+        return cls._mapper(row.keys())(row)
+    
+    @classmethod
+    def from_rows(cls, rows):
+        """Modelos a partir de una lista de filas con las mismas columnas"""
+        if not rows:
+            return []
+        return list(map(cls._mapper(rows[0].keys()), rows))
+    
+    @classmethod
+    def _load(cls, row):
+        """Modelo de una fila leída para editarla: recuerda los valores de sus columnas"""
+        obj = cls.from_row(row)
+        obj._loaded = obj._values()
+        return obj
+    
+    def _values(self):
+        """Valores de las columnas en el orden de '<_statements>.insert'"""
+        return self._getter(self)
+    
+    def _insert(self):
+        values = self._values()
+        cursor = self.db.execute_query(f'{self._statements}.insert', values)
+        self.id = cursor.lastrowid
+        self._loaded = values
+        if self._versioned:
+            self.version = 0
+    
+    def _update(self):
+        """UPDATE de las columnas que cambiaron desde que el objeto se leyó o guardó.
+        
+        Sin valores recordados (objetos de listados o creados con un id) se
+        escriben todas; si no cambió ninguna, no se ejecuta nada. En los modelos
+        con versión se comprueba la del objeto (si la tiene) y se incrementa.
+        """
+        values = self._values()
+        loaded = getattr(self, '_loaded', None)
+        if loaded is None:
+            changed = range(len(values))
+        else:
+            changed = [i for i, value in enumerate(values) if value != loaded[i]]
+        if not self._versioned:
+            if loaded is None:
+                self.db.execute_query(f'{self._statements}.update', values + (self.id,))
+            elif changed:
+                query = statements.set_columns(self._statements, [self._columns[i] for i in changed])
+                self.db.execute_query(query, tuple(values[i] for i in changed) + (self.id,))
+        elif changed:
+            query = statements.set_columns(self._statements, [self._columns[i] for i in changed])
+            cursor = self.db.execute_query(query, tuple(values[i] for i in changed) + (self.id, self.version))
+            self._check_version(cursor)
+        self._loaded = values
+    
+    def _check_version(self, cursor):
+        """Tras un UPDATE con versión: ConflictError si no se escribió, o la versión siguiente"""
+        if cursor.rowcount == 0 and self.version is not None:
+            identity.forget(type(self), self.id)
+            raise ConflictError(type(self), self.id, self.version)
+        if self.version is not None:
+            self.version += 1
+    
+    def _mark_saved(self, *fields):
+        """Da por guardados esos atributos tras una escritura hecha fuera de save()"""
+        loaded = getattr(self, '_loaded', None)
+        if loaded is not None:
+            loaded = list(loaded)
+            for field in fields:
+                loaded[self._field_index[field]] = getattr(self, field)
+            self._loaded = tuple(loaded)
+    
+    def changed_fields(self):
+        """Atributos modificados desde que el objeto se leyó o guardó (None si no se sabe)"""
+        loaded = getattr(self, '_loaded', None)
+        if loaded is None:
+            return None
+        return [field for field, value, old in zip(self._fields, self._values(), loaded) if value != old]
+    
+    def _before_insert(self):
+        """Se llama dentro de la transacción justo antes de insertar un registro nuevo"""
+    
+    @classmethod
+    def _get_by_id(cls, id):
+        """Busca por ID pasando por el mapa de identidad de la sesión activa"""
+        identity_map = identity.current()
+        if identity_map is not None:
+            obj = identity_map.get(cls, id)
+            if obj is not None:
+                return obj
+        row = cls.db.fetch_one(f'{cls._statements}.get_by_id', (id,))
+        if row is None:
+            return None
+        obj = cls._load(row)
+        if identity_map is not None:
+            identity_map.put(obj)
+        return obj
+    
+    @classmethod
+    def _fetch_all(cls, query, params=(), include=None):
+        """Modelos de la consulta del registro `query`.
+        
+        Con `include` se usa la variante '<query>.<relación>' de la sentencia, que
+        une las tablas relacionadas, y cada objeto recibe el modelo relacionado
+        en el atributo del mismo nombre: una sola consulta para todas las filas.
+        """
+        if not include:
+            return cls.from_rows(cls.db.fetch_all(query, params))
+        names = sorted(set(include))
+        for name in names:
+            if name not in cls._relations:
+                raise ValueError(f"{cls.__name__} no tiene la relación '{name}'")
+        rows = cls.db.fetch_all(f"{query}.{'.'.join(names)}", params)
+        if not rows:
+            return []
+        keys = rows[0].keys()
+        mapper = cls._mapper(keys)
+        related_mappers = {name: cls._relations[name][0]._mapper(keys) for name in names}
+        identity_map = identity.current()
+        objects = []
+        for row in rows:
+            obj = mapper(row)
+            for name in names:
+                related = None
+                if row[cls._relations[name][1]] is not None:
+                    related = related_mappers[name](row)
+                    if identity_map is not None:
+                        related = identity_map.adopt(related)
+                setattr(obj, name, related)
+            objects.append(obj)
+        return objects
+    
+    @classmethod
+    def _iter(cls, query, params=(), batch_size=1000):
+        mapper = None
+        for row in cls.db.iterate(query, params, batch_size):
+            if mapper is None:
+                mapper = cls._mapper(row.keys())
+            yield mapper(row)
+    
+    @classmethod
+    def _page(cls, query, params, after, limit):
+        if after is None:
+            rows = cls.db.fetch_all(f'{query}_first', params + (limit,))
+        else:
+            rows = cls.db.fetch_all(f'{query}_after', params + tuple(after) + (limit,))
+        return cls.from_rows(rows)
+    
+    @classmethod
+    def iter_all(cls, batch_size=1000):
+        """Recorre todos los registros en el orden de get_all leyendo de a `batch_size` filas"""
+        return cls._iter(f'{cls._statements}.get_all', (), batch_size)
+    
+    @classmethod
+    def page(cls, after=None, limit=100):
+        """Hasta `limit` registros en el orden de get_all a continuación de la clave `after`.
+        
+        `after` es la page_key() del último registro de la página anterior
+        (None para la primera). La consulta busca la clave en el índice, así que
+        todas las páginas cuestan lo mismo, sin el OFFSET que recorre las anteriores.
+        """
+        return cls._page(f'{cls._statements}.page', (), after, limit)
+    
+    @classmethod
+    def save_all(cls, instances):
+        """Guarda registros nuevos y existentes en una sola transacción.
+        
+        Los nuevos (id None) se insertan con un único executemany. Con el bloqueo
+        de escritura de la transacción sus rowid son consecutivos y terminan en
+        last_insert_rowid(), de donde se asigna el ID a cada objeto. Los existentes
+        se actualizan con otro executemany; en los modelos con versión, fila a fila
+        comprobando la de cada objeto, y con un ConflictError no se guarda ninguno.
+        Devuelve la lista de IDs.
+        """
+        instances = list(instances)
+        new = [obj for obj in instances if obj.id is None]
+        existing = [obj for obj in instances if obj.id is not None]
+        versions = [obj.version for obj in existing] if cls._versioned else None
+        db = cls.db
+        try:
+            with db.transaction():
+                if new:
+                    for obj in new:
+                        obj._before_insert()
+                    db.execute_many(f'{cls._statements}.insert', [obj._values() for obj in new])
+                    last = db.fetch_one('schema.last_insert_rowid')[0]
+                    for id, obj in enumerate(new, start=last - len(new) + 1):
+                        obj.id = id
+                        obj._loaded = obj._values()
+                        if cls._versioned:
+                            obj.version = 0
+                if existing and cls._versioned:
+                    # Fila a fila para saber cuál cambió de versión
+                    query = statements.set_columns(cls._statements, cls._columns)
+                    for obj in existing:
+                        obj._check_version(db.execute_query(query, obj._values() + (obj.id, obj.version)))
+                elif existing:
+                    db.execute_many(f'{cls._statements}.update', [obj._values() + (obj.id,) for obj in existing])
+                for obj in existing:
+                    obj._loaded = obj._values()
+        except BaseException:
+            for obj in new:
+                obj.id = None
+                if cls._versioned:
+                    obj.version = None
+            if cls._versioned:
+                for obj, version in zip(existing, versions):
+                    obj.version = version
+            raise
+        for obj in instances:
+            identity.remember(obj)
+        return [obj.id for obj in instances]
+    
+    @classmethod
+    def delete_many(cls, ids):
+        """Elimina los registros con esos IDs en una sola transacción; devuelve cuántos se eliminaron"""
+        ids = list(ids)
+        if not ids:
+            return 0
+        with cls.db.transaction():
+            cursor = cls.db.execute_many(f'{cls._statements}.delete', [(id,) for id in ids])
+        for id in ids:
+            identity.forget(cls, id)
+        return cursor.rowcount
+    
+    @classmethod
+    def update_fields(cls, id, version=None, **changes):
+        """UPDATE de solo las columnas indicadas, sin leer antes el registro.
+        
+        Factura.update_fields(7, estado='Pagada') escribe únicamente Estado.
+        Devuelve True si el registro existía. Con `version` (modelos con versión)
+        solo se escribe si la fila sigue en esa versión; si no, ConflictError.
+        En una sesión del mapa de identidad la instancia mapeada se descarta,
+        porque ya no coincide con la base.
+        """
+        if not changes:
+            return False
+        unknown = [field for field in changes if field not in cls._field_index]
+        if unknown:
+            raise ValueError(f"{cls.__name__} no tiene los campos {', '.join(unknown)}")
+        if version is not None and not cls._versioned:
+            raise ValueError(f"{cls.__name__} no tiene versión")
+        fields = sorted(changes, key=cls._field_index.__getitem__)
+        query = statements.set_columns(cls._statements, [cls._columns[cls._field_index[field]] for field in fields])
+        params = tuple(changes[field] for field in fields) + (id,)
+        cursor = cls.db.execute_query(query, params + (version,) if cls._versioned else params)
+        identity.forget(cls, id)
+        if cursor.rowcount == 0 and version is not None:
+            raise ConflictError(cls, id, version)
+        return cursor.rowcount > 0
+    
+    @classmethod
+    def modify(cls, id, change, version=None, attempts=CONFLICT_RETRIES):
+        """Lee el registro, aplica change(obj) y lo guarda comprobando su versión.
+        
+        Si otra terminal lo modifica entre la lectura y el UPDATE, se vuelve a
+        leer y se aplica el cambio otra vez, hasta `attempts` veces: ninguna
+        escritura se pierde y no se retiene ningún bloqueo entre lectura y
+        escritura. Con `version` (la leída al abrir un formulario) no se
+        reintenta: si la fila ya no está en esa versión se lanza ConflictError.
+        Devuelve el objeto guardado, o None si el registro no existe.
+        """
+        for attempt in range(attempts):
+            # Siempre de la base: el mapa de identidad puede tener una versión anterior
+            row = cls.db.fetch_one(f'{cls._statements}.get_by_id', (id,))
+            if row is None:
+                return None
+            obj = cls._load(row)
+            if version is not None and obj.version != version:
+                identity.forget(cls, id)
+                raise ConflictError(cls, id, version)
+            change(obj)
+            try:
+                obj.save()
+                return obj
+            except ConflictError:
+                if version is not None or attempt == attempts - 1:
+                    raise
+    
+    @classmethod
+    def upsert_many(cls, instances, conflict_key='id'):
+        """Inserta o actualiza registros en una sola transacción y devuelve sus IDs.
+        
+        Con conflict_key='id' se actualizan los objetos cuyo ID ya existe y se
+        insertan los demás. Con el atributo de una columna UNIQUE (_unique_keys,
+        p. ej. Cliente.upsert_many(clientes, conflict_key='dni')) el conflicto se
+        resuelve por esa columna y cada objeto recibe el ID de su fila. Los objetos
+        sin valor en la clave no pueden entrar en conflicto y se guardan con save_all.
+        """
+        instances = list(instances)
+        if conflict_key == 'id':
+            keyed = [obj for obj in instances if obj.id is not None]
+            query = f'{cls._statements}.upsert'
+        else:
+            column = cls._unique_keys.get(conflict_key)
+            if column is None:
+                raise ValueError(f"{cls.__name__} no tiene la clave única '{conflict_key}'")
+            keyed = [obj for obj in instances if getattr(obj, conflict_key) is not None]
+            query = f'{cls._statements}.upsert.{column}'
+        keyed_ids = {id(obj) for obj in keyed}
+        rest = [obj for obj in instances if id(obj) not in keyed_ids]
+        previous = [obj.id for obj in keyed]
+        db = cls.db
+        try:
+            with db.transaction():
+                if keyed:
+                    for obj in keyed:
+                        obj._before_insert()
+                    if conflict_key == 'id':
+                        db.execute_many(query, [(obj.id,) + obj._values() for obj in keyed])
+                    else:
+                        db.execute_many(query, [obj._values() for obj in keyed])
+                        for obj in keyed:
+                            obj.id = db.fetch_one(f'{cls._statements}.id_by.{column}',
+                                                  (getattr(obj, conflict_key),))[0]
+                if rest:
+                    cls.save_all(rest)
+        except BaseException:
+            for obj, old in zip(keyed, previous):
+                obj.id = old
+            raise
+        for obj in keyed:
+            if cls._versioned:
+                # La fila pudo insertarse o actualizarse: versión desconocida
+                obj.version = None
+            identity.remember(obj)
+        return [obj.id for obj in instances]
+    
+    def page_key(self):
+        """Clave de este registro en el orden de get_all (para page(after=...))"""
+        return tuple(getattr(self, field) for field in self._page_key)
 
 class Categoria(BaseModel):
+    __slots__ = ('id', 'nombre', 'descripcion')
+    _statements = 'categoria'
+    _fields = ('nombre', 'descripcion')
+    _page_key = ('nombre', 'id')
+    
     def __init__(self, id=None, nombre=None, descripcion=None):
-        super().__init__()
         self.id = id
         self.nombre = nombre
         self.descripcion = descripcion
@@ -16,191 +451,195 @@ class Categoria(BaseModel):
         """Guarda o actualiza una categoría en la base de datos"""
         if self.id is None:
             # Insertar nueva categoría
-            query = "INSERT INTO Categoria (NombreCat, Descripcion) VALUES (?, ?)"
-            cursor = self.db.execute_query(query, (self.nombre, self.descripcion))
-            self.id = cursor.lastrowid
+            self._insert()
         else:
             # Actualizar categoría existente
-            query = "UPDATE Categoria SET NombreCat = ?, Descripcion = ? WHERE idCategoria = ?"
-            self.db.execute_query(query, (self.nombre, self.descripcion, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         """Elimina una categoría de la base de datos"""
         if self.id:
-            query = "DELETE FROM Categoria WHERE idCategoria = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('categoria.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     @classmethod
     def get_by_id(cls, id):
         """Obtiene una categoría por su ID"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Categoria WHERE idCategoria = ?"
-        row = db.fetch_one(query, (id,))
-        if row:
-            return cls(id=row['idCategoria'], nombre=row['NombreCat'], descripcion=row['Descripcion'])
-        return None
+        return cls._get_by_id(id)
     
     @classmethod
     def get_all(cls):
         """Obtiene todas las categorías"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Categoria ORDER BY NombreCat"
-        rows = db.fetch_all(query)
-        return [cls(id=row['idCategoria'], nombre=row['NombreCat'], descripcion=row['Descripcion']) for row in rows]
+        rows = cls.db.fetch_all('categoria.get_all')
+        return cls.from_rows(rows)
 
 class Producto(BaseModel):
+    __slots__ = ('id', 'nombre', 'precio', 'stock', 'id_categoria', 'version')
+    _statements = 'producto'
+    _fields = ('nombre', 'precio', 'stock', 'id_categoria')
+    _page_key = ('nombre', 'id')
+    
     def __init__(self, id=None, nombre=None, precio=None, stock=None, id_categoria=None):
-        super().__init__()
         self.id = id
         self.nombre = nombre
-        self.precio = precio
+        self.precio = precio  # céntimos
         self.stock = stock
         self.id_categoria = id_categoria
+        self.version = None  # se asigna al leer o guardar
     
     def save(self):
         """Guarda o actualiza un producto en la base de datos"""
         if self.id is None:
             # Insertar nuevo producto
-            query = "INSERT INTO Producto (NombrePro, Precio, Stock, idCategoria) VALUES (?, ?, ?, ?)"
-            cursor = self.db.execute_query(query, (self.nombre, self.precio, self.stock, self.id_categoria))
-            self.id = cursor.lastrowid
+            self._insert()
         else:
             # Actualizar producto existente
-            query = "UPDATE Producto SET NombrePro = ?, Precio = ?, Stock = ?, idCategoria = ? WHERE idProducto = ?"
-            self.db.execute_query(query, (self.nombre, self.precio, self.stock, self.id_categoria, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         """Elimina un producto de la base de datos"""
         if self.id:
-            query = "DELETE FROM Producto WHERE idProducto = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('producto.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     def update_stock(self, cantidad):
-        """Actualiza el stock de un producto"""
+        """Suma `cantidad` al stock del producto (negativa para descontar).
+        
+        Si el producto se leyó con su versión y otra terminal lo modificó desde
+        entonces, lanza ConflictError: el stock del objeto ya no es el de la base.
+        Para sumar sin comprobar nada está Producto.add_stock.
+        """
         if self.id:
+            cursor = self.db.execute_query('producto.add_stock', (cantidad, self.id, self.version))
+            self._check_version(cursor)
             self.stock += cantidad
-            query = "UPDATE Producto SET Stock = ? WHERE idProducto = ?"
-            self.db.execute_query(query, (self.stock, self.id))
+            self._mark_saved('stock')
+            identity.remember(self)
             return True
         return False
     
+    @classmethod
+    def add_stock(cls, id, cantidad):
+        """Suma `cantidad` al stock con un UPDATE relativo, sin leer antes el producto.
+        
+        Las sumas no se pisan entre sí, así que no se comprueba la versión (pero
+        se incrementa, y un formulario abierto con el stock anterior no lo sobrescribe).
+        """
+        cursor = cls.db.execute_query('producto.add_stock', (cantidad, id, None))
+        identity.forget(cls, id)
+        return cursor.rowcount > 0
+    
     @classmethod
     def get_by_id(cls, id):
         """Obtiene un producto por su ID"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Producto WHERE idProducto = ?"
-        row = db.fetch_one(query, (id,))
-        if row:
-            return cls(id=row['idProducto'], nombre=row['NombrePro'], precio=row['Precio'], 
-                       stock=row['Stock'], id_categoria=row['idCategoria'])
-        return None
+        return cls._get_by_id(id)
     
     @classmethod
     def get_all(cls):
         """Obtiene todos los productos"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Producto ORDER BY NombrePro"
-        rows = db.fetch_all(query)
-        return [cls(id=row['idProducto'], nombre=row['NombrePro'], precio=row['Precio'], 
-                   stock=row['Stock'], id_categoria=row['idCategoria']) for row in rows]
+        rows = cls.db.fetch_all('producto.get_all')
+        return cls.from_rows(rows)
     
     @classmethod
     def get_by_categoria(cls, id_categoria):
         """Obtiene productos por categoría"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Producto WHERE idCategoria = ? ORDER BY NombrePro"
-        rows = db.fetch_all(query, (id_categoria,))
-        return [cls(id=row['idProducto'], nombre=row['NombrePro'], precio=row['Precio'], 
-                   stock=row['Stock'], id_categoria=row['idCategoria']) for row in rows]
+        rows = cls.db.fetch_all('producto.get_by_categoria', (id_categoria,))
+        return cls.from_rows(rows)
 
 class Venta(BaseModel):
+    __slots__ = ('id', 'fecha', 'total', 'id_cliente', 'id_empleado',
+                 # Solo en las consultas que unen Cliente y Empleado
+                 'cliente_nombre', 'empleado_nombre')
+    _statements = 'venta'
+    _fields = ('fecha', 'total', 'id_empleado', 'id_cliente')
+    _extra_columns = {'NombreCli': 'cliente_nombre', 'NombreEmp': 'empleado_nombre'}
+    _page_key = ('fecha', 'id')
+    
     def __init__(self, id=None, fecha=None, total=None, id_cliente=None, id_empleado=None):
-        super().__init__()
         self.id = id
         self.fecha = fecha
-        self.total = total
+        self.total = total  # céntimos
         self.id_cliente = id_cliente
         self.id_empleado = id_empleado
+        self.cliente_nombre = None
+        self.empleado_nombre = None
     
     def save(self):
         if self.id is None:
-            query = "INSERT INTO Venta (Fecha, Total, idCliente, idEmpleado) VALUES (?, ?, ?, ?)"
-            cursor = self.db.execute_query(query, (self.fecha, self.total, self.id_cliente, self.id_empleado))
-            self.id = cursor.lastrowid
+            self._insert()
         else:
-            query = "UPDATE Venta SET Fecha = ?, Total = ?, idCliente = ?, idEmpleado = ? WHERE idVenta = ?"
-            self.db.execute_query(query, (self.fecha, self.total, self.id_cliente, self.id_empleado, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         if self.id:
-            query = "DELETE FROM Venta WHERE idVenta = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('venta.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     @classmethod
     def get_by_id(cls, id):
-        db = DatabaseConnection()
-        query = "SELECT * FROM Venta WHERE idVenta = ?"
-        row = db.fetch_one(query, (id,))
-        if row:
-            return cls(id=row['idVenta'], fecha=row['Fecha'], total=row['Total'], 
-                      id_cliente=row['idCliente'], id_empleado=row['idEmpleado'])
-        return None
+        return cls._get_by_id(id)
     
     @classmethod
     def get_all(cls):
-        db = DatabaseConnection()
-        query = "SELECT * FROM Venta ORDER BY Fecha DESC"
-        rows = db.fetch_all(query)
-        return [cls(id=row['idVenta'], fecha=row['Fecha'], total=row['Total'], 
-                   id_cliente=row['idCliente'], id_empleado=row['idEmpleado']) for row in rows]
+        rows = cls.db.fetch_all('venta.get_all')
+        return cls.from_rows(rows)
 
 class DetalleVenta(BaseModel):
+    __slots__ = ('id', 'id_venta', 'id_producto', 'cantidad', 'precio', 'subtotal',
+                 # Solo con include=['producto']
+                 'producto')
+    _statements = 'detalleventa'
+    _fields = ('cantidad', 'precio', 'subtotal', 'id_producto', 'id_venta')
+    _relations = {'producto': (Producto, 'NombrePro')}
+    
     def __init__(self, id=None, id_venta=None, id_producto=None, cantidad=None, precio=None, subtotal=None):
-        super().__init__()
         self.id = id
         self.id_venta = id_venta
         self.id_producto = id_producto
         self.cantidad = cantidad
-        self.precio = precio
+        self.precio = precio  # céntimos
         self.subtotal = subtotal
     
     def save(self):
         if self.id is None:
-            query = "INSERT INTO DetalleVenta (idVenta, idProducto, Cantidad, PrecioUni, SubTotal) VALUES (?, ?, ?, ?, ?)"
-            cursor = self.db.execute_query(query, (self.id_venta, self.id_producto, self.cantidad, self.precio, self.subtotal))
-            self.id = cursor.lastrowid
+            self._insert()
         else:
-            query = "UPDATE DetalleVenta SET idVenta = ?, idProducto = ?, Cantidad = ?, PrecioUni = ?, SubTotal = ? WHERE idDetalleVenta = ?"
-            self.db.execute_query(query, (self.id_venta, self.id_producto, self.cantidad, self.precio, self.subtotal, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         if self.id:
-            query = "DELETE FROM DetalleVenta WHERE idDetalleVenta = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('detalleventa.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     @classmethod
-    def get_by_venta(cls, id_venta):
-        db = DatabaseConnection()
-        query = "SELECT * FROM DetalleVenta WHERE idVenta = ?"
-        rows = db.fetch_all(query, (id_venta,))
-        return [cls(id=row['idDetalleVenta'], id_venta=row['idVenta'], id_producto=row['idProducto'], 
-                   cantidad=row['Cantidad'], precio=row['PrecioUni'], subtotal=row['SubTotal']) for row in rows]
+    def get_by_venta(cls, id_venta, include=None):
+        """Líneas de una venta; include=['producto'] adjunta el Producto de cada una"""
+        return cls._fetch_all('detalleventa.get_by_venta', (id_venta,), include)
     
 class Cliente(BaseModel):
+    __slots__ = ('id', 'nombre', 'telefono', 'dni', 'direccion')
+    _statements = 'cliente'
+    _fields = ('nombre', 'telefono', 'dni', 'direccion')
+    _page_key = ('nombre', 'id')
+    _unique_keys = {'dni': 'Dni'}
+    
     def __init__(self, id=None, nombre=None, telefono=None, dni=None, direccion=None):
-        super().__init__()
         self.id = id
         self.nombre = nombre
         self.telefono = telefono
@@ -209,44 +648,36 @@ class Cliente(BaseModel):
     
     def save(self):
         if self.id is None:
-            query = "INSERT INTO Cliente (NombreCli, TelefonoCli, Dni, DireccionClie) VALUES (?, ?, ?, ?)"
-            cursor = self.db.execute_query(query, (self.nombre, self.telefono, self.dni, self.direccion))
-            self.id = cursor.lastrowid
+            self._insert()
         else:
-            query = "UPDATE Cliente SET NombreCli = ?, TelefonoCli = ?, Dni = ?, DireccionClie = ? WHERE idCliente = ?"
-            self.db.execute_query(query, (self.nombre, self.telefono, self.dni, self.direccion, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         if self.id:
-            query = "DELETE FROM Cliente WHERE idCliente = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('cliente.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     @classmethod
     def get_by_id(cls, id):
-        db = DatabaseConnection()
-        query = "SELECT * FROM Cliente WHERE idCliente = ?"
-        row = db.fetch_one(query, (id,))
-        if row:
-            return cls(id=row['idCliente'], nombre=row['NombreCli'], 
-                      telefono=row['TelefonoCli'], dni=row['Dni'], 
-                      direccion=row['DireccionClie'])
-        return None
+        return cls._get_by_id(id)
     
     @classmethod
     def get_all(cls):
-        db = DatabaseConnection()
-        query = "SELECT * FROM Cliente ORDER BY NombreCli"
-        rows = db.fetch_all(query)
-        return [cls(id=row['idCliente'], nombre=row['NombreCli'], 
-                   telefono=row['TelefonoCli'], dni=row['Dni'], 
-                   direccion=row['DireccionClie']) for row in rows]
+        rows = cls.db.fetch_all('cliente.get_all')
+        return cls.from_rows(rows)
 
 class Empleado(BaseModel):
+    __slots__ = ('id', 'nombre', 'correo', 'telefono', 'direccion')
+    _statements = 'empleado'
+    _fields = ('nombre', 'correo', 'telefono', 'direccion')
+    _page_key = ('nombre', 'id')
+    _unique_keys = {'correo': 'CorreoEmp'}
+    
     def __init__(self, id=None, nombre=None, correo=None, telefono=None, direccion=None):
-        super().__init__()
         self.id = id
         self.nombre = nombre
         self.correo = correo
@@ -255,49 +686,46 @@ class Empleado(BaseModel):
     
     def save(self):
         if self.id is None:
-            query = "INSERT INTO Empleado (NombreEmp, CorreoEmp, Telefono, DireccionEmp) VALUES (?, ?, ?, ?)"
-            cursor = self.db.execute_query(query, (self.nombre, self.correo, self.telefono, self.direccion))
-            self.id = cursor.lastrowid
+            self._insert()
         else:
-            query = "UPDATE Empleado SET NombreEmp = ?, CorreoEmp = ?, Telefono = ?, DireccionEmp = ? WHERE idEmpleado = ?"
-            self.db.execute_query(query, (self.nombre, self.correo, self.telefono, self.direccion, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         if self.id:
-            query = "DELETE FROM Empleado WHERE idEmpleado = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('empleado.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     @classmethod
     def get_by_id(cls, id):
-        db = DatabaseConnection()
-        query = "SELECT * FROM Empleado WHERE idEmpleado = ?"
-        row = db.fetch_one(query, (id,))
-        if row:
-            return cls(id=row['idEmpleado'], nombre=row['NombreEmp'], 
-                      correo=row['CorreoEmp'], telefono=row['Telefono'], 
-                      direccion=row['DireccionEmp'])
-        return None
+        return cls._get_by_id(id)
     
     @classmethod
     def get_all(cls):
-        db = DatabaseConnection()
-        query = "SELECT * FROM Empleado ORDER BY NombreEmp"
-        rows = db.fetch_all(query)
-        return [cls(id=row['idEmpleado'], nombre=row['NombreEmp'], 
-                   correo=row['CorreoEmp'], telefono=row['Telefono'], 
-                   direccion=row['DireccionEmp']) for row in rows]
+        rows = cls.db.fetch_all('empleado.get_all')
+        return cls.from_rows(rows)
 
 class Factura(BaseModel):
+    __slots__ = ('id', 'numero_factura', 'fecha', 'subtotal', 'impuesto', 'total', 'estado',
+                 'observaciones', 'id_venta', 'id_cliente', 'id_empleado', 'version')
+    _statements = 'factura'
+    _fields = ('numero_factura', 'fecha', 'subtotal', 'impuesto', 'total', 'estado',
+               'observaciones', 'id_venta', 'id_cliente', 'id_empleado')
+    _page_key = ('fecha', 'id')
+    _unique_keys = {'numero_factura': 'NumeroFactura'}
+    
+    SERIE = 'FAC-'
+    
     def __init__(self, id=None, numero_factura=None, fecha=None, subtotal=None, 
                  impuesto=None, total=None, estado='Pendiente', observaciones=None,
                  id_venta=None, id_cliente=None, id_empleado=None):
-        super().__init__()
         self.id = id
         self.numero_factura = numero_factura
         self.fecha = fecha
+        # Importes en céntimos
         self.subtotal = subtotal
         self.impuesto = impuesto
         self.total = total
@@ -306,111 +734,120 @@ class Factura(BaseModel):
         self.id_venta = id_venta
         self.id_cliente = id_cliente
         self.id_empleado = id_empleado
+        self.version = None  # se asigna al leer o guardar
+    
+    def _before_insert(self):
+        if self.numero_factura is None:
+            self.numero_factura = self.asignar_numero()
     
     def save(self):
-        """Guarda o actualiza una factura en la base de datos"""
+        """Guarda o actualiza una factura en la base de datos.
+        
+        Si una factura nueva no tiene número, se le asigna el siguiente de la serie
+        en la misma transacción que el INSERT.
+        """
         if self.id is None:
-            query = """INSERT INTO Factura (NumeroFactura, Fecha, SubTotal, Impuesto, Total, 
-                      Estado, Observaciones, idVenta, idCliente, idEmpleado) 
-                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
-            cursor = self.db.execute_query(query, (self.numero_factura, self.fecha, self.subtotal,
-                                                 self.impuesto, self.total, self.estado, 
-                                                 self.observaciones, self.id_venta, 
-                                                 self.id_cliente, self.id_empleado))
-            self.id = cursor.lastrowid
+            with self.db.transaction():
+                self._before_insert()
+                self._insert()
         else:
-            query = """UPDATE Factura SET NumeroFactura = ?, Fecha = ?, SubTotal = ?, 
-                      Impuesto = ?, Total = ?, Estado = ?, Observaciones = ?, 
-                      idVenta = ?, idCliente = ?, idEmpleado = ? WHERE idFactura = ?"""
-            self.db.execute_query(query, (self.numero_factura, self.fecha, self.subtotal,
-                                        self.impuesto, self.total, self.estado, 
-                                        self.observaciones, self.id_venta, 
-                                        self.id_cliente, self.id_empleado, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         """Elimina una factura de la base de datos"""
         if self.id:
-            query = "DELETE FROM Factura WHERE idFactura = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('factura.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     @classmethod
     def get_by_id(cls, id):
         """Obtiene una factura por su ID"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Factura WHERE idFactura = ?"
-        row = db.fetch_one(query, (id,))
-        if row:
-            return cls(id=row['idFactura'], numero_factura=row['NumeroFactura'],
-                      fecha=row['Fecha'], subtotal=row['SubTotal'], 
-                      impuesto=row['Impuesto'], total=row['Total'],
-                      estado=row['Estado'], observaciones=row['Observaciones'],
-                      id_venta=row['idVenta'], id_cliente=row['idCliente'],
-                      id_empleado=row['idEmpleado'])
-        return None
+        return cls._get_by_id(id)
     
     @classmethod
     def get_all(cls):
         """Obtiene todas las facturas"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Factura ORDER BY Fecha DESC"
-        rows = db.fetch_all(query)
-        return [cls(id=row['idFactura'], numero_factura=row['NumeroFactura'],
-                   fecha=row['Fecha'], subtotal=row['SubTotal'], 
-                   impuesto=row['Impuesto'], total=row['Total'],
-                   estado=row['Estado'], observaciones=row['Observaciones'],
-                   id_venta=row['idVenta'], id_cliente=row['idCliente'],
-                   id_empleado=row['idEmpleado']) for row in rows]
+        rows = cls.db.fetch_all('factura.get_all')
+        return cls.from_rows(rows)
+    
+    @classmethod
+    def asignar_numero(cls, serie=None):
+        """Incrementa la secuencia de la serie y devuelve el número asignado.
+        
+        Debe llamarse dentro de una transacción: el bloqueo de escritura impide
+        que otra terminal obtenga el mismo número.
+        """
+        db = cls.db
+        serie = serie or cls.SERIE
+        db.execute_query('factura.secuencia_init', (serie,))
+        db.execute_query('factura.secuencia_next', (serie,))
+        row = db.fetch_one('factura.secuencia_get', (serie,))
+        return f"{serie}{row['Ultimo']:06d}"
+    
+    @classmethod
+    def proximo_numero(cls, serie=None):
+        """Devuelve el número que recibirá la próxima factura, sin reservarlo"""
+        db = cls.db
+        serie = serie or cls.SERIE
+        row = db.fetch_one('factura.secuencia_get', (serie,))
+        siguiente = (row['Ultimo'] if row else 0) + 1
+        return f"{serie}{siguiente:06d}"
     
     @classmethod
     def get_by_numero(cls, numero_factura):
         """Obtiene una factura por su número"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Factura WHERE NumeroFactura = ?"
-        row = db.fetch_one(query, (numero_factura,))
-        if row:
-            return cls(id=row['idFactura'], numero_factura=row['NumeroFactura'],
-                      fecha=row['Fecha'], subtotal=row['SubTotal'], 
-                      impuesto=row['Impuesto'], total=row['Total'],
-                      estado=row['Estado'], observaciones=row['Observaciones'],
-                      id_venta=row['idVenta'], id_cliente=row['idCliente'],
-                      id_empleado=row['idEmpleado'])
-        return None
+        row = cls.db.fetch_one('factura.get_by_numero', (numero_factura,))
+        return cls._load(row) if row else None
     
     @classmethod
     def get_by_cliente(cls, id_cliente):
         """Obtiene facturas por cliente"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Factura WHERE idCliente = ? ORDER BY Fecha DESC"
-        rows = db.fetch_all(query, (id_cliente,))
-        return [cls(id=row['idFactura'], numero_factura=row['NumeroFactura'],
-                   fecha=row['Fecha'], subtotal=row['SubTotal'], 
-                   impuesto=row['Impuesto'], total=row['Total'],
-                   estado=row['Estado'], observaciones=row['Observaciones'],
-                   id_venta=row['idVenta'], id_cliente=row['idCliente'],
-                   id_empleado=row['idEmpleado']) for row in rows]
+        rows = cls.db.fetch_all('factura.get_by_cliente', (id_cliente,))
+        return cls.from_rows(rows)
     
     @classmethod
     def get_by_estado(cls, estado):
         """Obtiene facturas por estado"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM Factura WHERE Estado = ? ORDER BY Fecha DESC"
-        rows = db.fetch_all(query, (estado,))
-        return [cls(id=row['idFactura'], numero_factura=row['NumeroFactura'],
-                   fecha=row['Fecha'], subtotal=row['SubTotal'], 
-                   impuesto=row['Impuesto'], total=row['Total'],
-                   estado=row['Estado'], observaciones=row['Observaciones'],
-                   id_venta=row['idVenta'], id_cliente=row['idCliente'],
-                   id_empleado=row['idEmpleado']) for row in rows]
+        rows = cls.db.fetch_all('factura.get_by_estado', (estado,))
+        return cls.from_rows(rows)
+    
+    @classmethod
+    def iter_by_cliente(cls, id_cliente, batch_size=1000):
+        """Recorre las facturas de un cliente (más recientes primero) por lotes"""
+        return cls._iter('factura.get_by_cliente', (id_cliente,), batch_size)
+    
+    @classmethod
+    def page_by_cliente(cls, id_cliente, after=None, limit=100):
+        """Página de facturas de un cliente a continuación de la clave (fecha, id) `after`"""
+        return cls._page('factura.page_by_cliente', (id_cliente,), after, limit)
+    
+    @classmethod
+    def iter_by_estado(cls, estado, batch_size=1000):
+        """Recorre las facturas de un estado (más recientes primero) por lotes"""
+        return cls._iter('factura.get_by_estado', (estado,), batch_size)
+    
+    @classmethod
+    def page_by_estado(cls, estado, after=None, limit=100):
+        """Página de facturas de un estado a continuación de la clave (fecha, id) `after`"""
+        return cls._page('factura.page_by_estado', (estado,), after, limit)
 
 class DetalleFactura(BaseModel):
+    __slots__ = ('id', 'cantidad', 'precio_unitario', 'subtotal', 'id_producto', 'id_factura',
+                 # Solo con include=['producto']
+                 'producto')
+    _statements = 'detallefactura'
+    _fields = ('cantidad', 'precio_unitario', 'subtotal', 'id_producto', 'id_factura')
+    _relations = {'producto': (Producto, 'NombrePro')}
+    
     def __init__(self, id=None, cantidad=None, precio_unitario=None, subtotal=None,
                  id_producto=None, id_factura=None):
-        super().__init__()
         self.id = id
         self.cantidad = cantidad
+        # Importes en céntimos
         self.precio_unitario = precio_unitario
         self.subtotal = subtotal
         self.id_producto = id_producto
@@ -419,55 +856,33 @@ class DetalleFactura(BaseModel):
     def save(self):
         """Guarda o actualiza un detalle de factura en la base de datos"""
         if self.id is None:
-            query = """INSERT INTO DetalleFactura (Cantidad, PrecioUni, SubTotal, idProducto, idFactura) 
-                      VALUES (?, ?, ?, ?, ?)"""
-            cursor = self.db.execute_query(query, (self.cantidad, self.precio_unitario, 
-                                                 self.subtotal, self.id_producto, self.id_factura))
-            self.id = cursor.lastrowid
+            self._insert()
         else:
-            query = """UPDATE DetalleFactura SET Cantidad = ?, PrecioUni = ?, SubTotal = ?, 
-                      idProducto = ?, idFactura = ? WHERE idDetalleFactura = ?"""
-            self.db.execute_query(query, (self.cantidad, self.precio_unitario, self.subtotal,
-                                        self.id_producto, self.id_factura, self.id))
+            self._update()
+        identity.remember(self)
         return self.id
     
     def delete(self):
         """Elimina un detalle de factura de la base de datos"""
         if self.id:
-            query = "DELETE FROM DetalleFactura WHERE idDetalleFactura = ?"
-            self.db.execute_query(query, (self.id,))
+            self.db.execute_query('detallefactura.delete', (self.id,))
+            identity.forget(type(self), self.id)
             return True
         return False
     
     @classmethod
-    def get_by_factura(cls, id_factura):
-        """Obtiene todos los detalles de una factura"""
-        db = DatabaseConnection()
-        query = """SELECT df.*, p.NombrePro as producto_nombre 
-                  FROM DetalleFactura df 
-                  JOIN Producto p ON df.idProducto = p.idProducto 
-                  WHERE df.idFactura = ?"""
-        rows = db.fetch_all(query, (id_factura,))
-        return [cls(id=row['idDetalleFactura'], cantidad=row['Cantidad'],
-                   precio_unitario=row['PrecioUni'], subtotal=row['SubTotal'],
-                   id_producto=row['idProducto'], id_factura=row['idFactura']) for row in rows]
+    def get_by_factura(cls, id_factura, include=None):
+        """Obtiene todos los detalles de una factura; include=['producto'] adjunta el Producto de cada uno"""
+        return cls._fetch_all('detallefactura.get_by_factura', (id_factura,), include)
     
     @classmethod
     def get_by_id(cls, id):
         """Obtiene un detalle de factura por su ID"""
-        db = DatabaseConnection()
-        query = "SELECT * FROM DetalleFactura WHERE idDetalleFactura = ?"
-        row = db.fetch_one(query, (id,))
-        if row:
-            return cls(id=row['idDetalleFactura'], cantidad=row['Cantidad'],
-                      precio_unitario=row['PrecioUni'], subtotal=row['SubTotal'],
-                      id_producto=row['idProducto'], id_factura=row['idFactura'])
-        return None
+        return cls._get_by_id(id)
     
     @classmethod
     def delete_by_factura(cls, id_factura):
         """Elimina todos los detalles de una factura"""
-        db = DatabaseConnection()
-        query = "DELETE FROM DetalleFactura WHERE idFactura = ?"
-        db.execute_query(query, (id_factura,))
+        cls.db.execute_query('detallefactura.delete_by_factura', (id_factura,))
+        identity.forget_class(cls)
         return True
\ No newline at end of file
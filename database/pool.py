@@ -0,0 +1,149 @@
+import sqlite3
+import queue
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera"""
+    pass
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones SQLite que pueden usarse desde cualquier hilo.
+
+    Cada conexión solo la usa un hilo a la vez (checkout/checkin), por eso se
+    abren con check_same_thread=False.
+    """
+
+    def __init__(self, db_path, max_size=5, timeout=30.0, on_connect=None, cached_statements=128,
+                 on_checkout=None):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self.on_connect = on_connect
+        # Se llama con cada conexión que sale del pool (p. ej. para aplicar un perfil cambiado)
+        self.on_checkout = on_checkout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Métricas de espera en el checkout
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _create_connection(self):
+        # isolation_level=None: autocommit; las transacciones se abren explícitamente
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        if self.on_connect:
+            self.on_connect(conn)
+        return conn
+
+    def acquire(self):
+        """Obtiene una conexión del pool, creando una nueva si hay cupo"""
+        if self._closed:
+            raise PoolTimeoutError("El pool de conexiones está cerrado")
+
+        start = time.perf_counter()
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            create = False
+            with self._lock:
+                if self._created < self.max_size:
+                    self._created += 1
+                    create = True
+            if create:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No hay conexiones libres después de {self.timeout} segundos")
+
+        if self.on_checkout:
+            try:
+                self.on_checkout(conn)
+            except Exception:
+                self._idle.put(conn)
+                raise
+        
+        wait = time.perf_counter() - start
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_total += wait
+            if wait > self._wait_max:
+                self._wait_max = wait
+        return conn
+
+    def release(self, conn):
+        """Devuelve una conexión al pool"""
+        with self._lock:
+            self._in_use -= 1
+
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+
+        # No devolver al pool una conexión con una transacción abierta
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+    
+    def recycle(self):
+        """Cierra las conexiones libres sin cerrar el pool; las que están en uso siguen abiertas"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def close(self):
+        """Cierra todas las conexiones libres; las que están en uso se cierran al devolverse"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self):
+        """Devuelve las métricas del pool (tiempos en milisegundos)"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'max_size': self.max_size,
+                'created': self._created,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'wait_total_ms': self._wait_total * 1000,
+                'wait_avg_ms': (self._wait_total / checkouts * 1000) if checkouts else 0.0,
+                'wait_max_ms': self._wait_max * 1000
+            }
@@ -0,0 +1,77 @@
+import sqlite3
+
+# Perfiles de rendimiento de SQLite.
+# cache_size negativo = KiB; mmap_size en bytes; busy_timeout en milisegundos.
+PERFORMANCE_PROFILES = {
+    'durable': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    },
+    'bulk-load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000
+    }
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+PROFILE_DESCRIPTIONS = {
+    'durable': "Journal clásico y synchronous=FULL: máxima seguridad ante cortes de luz",
+    'balanced': "WAL y synchronous=NORMAL: lecturas concurrentes y escrituras rápidas",
+    'bulk-load': "Sin fsync y caché grande: solo para cargas masivas e importaciones"
+}
+
+# Orden en que se aplican y se muestran los PRAGMA
+PRAGMA_NAMES = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+
+
+# Nombres legibles de los valores numéricos que devuelve SQLite
+_PRAGMA_LABELS = {
+    'synchronous': {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'},
+    'temp_store': {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+}
+
+
+def get_profile(name):
+    """Devuelve los PRAGMA de un perfil (el perfil por defecto si el nombre no existe)"""
+    return PERFORMANCE_PROFILES.get(name, PERFORMANCE_PROFILES[DEFAULT_PROFILE])
+
+
+def apply_profile(conn, name, busy_timeout=None):
+    """Aplica los PRAGMA del perfil a una conexión (busy_timeout en ms sustituye al del perfil)"""
+    profile = get_profile(name)
+    if busy_timeout is not None:
+        profile = dict(profile, busy_timeout=int(busy_timeout))
+    for pragma in PRAGMA_NAMES:
+        try:
+            conn.execute(f"PRAGMA {pragma} = {profile[pragma]}")
+        except sqlite3.OperationalError:
+            # journal_mode necesita acceso exclusivo para salir de WAL; se
+            # mantiene el modo actual si otra conexión tiene la base abierta
+            if pragma != 'journal_mode':
+                raise
+
+
+def read_pragmas(conn):
+    """Lee los valores efectivos de los PRAGMA de rendimiento de una conexión"""
+    values = {}
+    for pragma in PRAGMA_NAMES:
+        value = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        values[pragma] = _PRAGMA_LABELS.get(pragma, {}).get(value, value)
+    return values
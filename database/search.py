@@ -0,0 +1,111 @@
+"""Búsqueda de texto completo con FTS5.
+
+Cada tabla buscable tiene una tabla virtual FTS5 de contenido externo
+(<Tabla>Fts) que guarda solo el índice invertido; los triggers la mantienen
+sincronizada con la tabla base. Las búsquedas son por prefijo de cada palabra
+y FTS5 devuelve las SEARCH_LIMIT más relevantes (bm25) de todas las
+coincidencias. Si ninguna palabra empieza así ("phone" dentro de
+"Smartphone") o la versión de SQLite no incluye FTS5, se usa la búsqueda
+por subcadena con LIKE de siempre, que recorre la tabla.
+"""
+import re
+import sqlite3
+
+# Tabla base: (clave primaria, columnas indexadas)
+FTS_TABLES = {
+    'Producto': ('idProducto', ('NombrePro',)),
+    'Cliente': ('idCliente', ('NombreCli', 'Dni', 'TelefonoCli')),
+    'Empleado': ('idEmpleado', ('NombreEmp', 'CorreoEmp', 'Telefono')),
+    'Categoria': ('idCategoria', ('NombreCat', 'Descripcion')),
+    'Factura': ('idFactura', ('Observaciones',))
+}
+
+# Sin distinguir tildes ("cafe" encuentra "Café"); índices de prefijo de 2 y 3 caracteres
+TOKENIZE = "unicode61 remove_diacritics 2"
+PREFIX = "2 3"
+
+# Máximo de resultados que devuelve una búsqueda
+SEARCH_LIMIT = 200
+
+# Mismo criterio que el tokenizador unicode61: letras y dígitos
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def fts_table(table):
+    return f"{table}Fts"
+
+
+def fts5_available(conn):
+    """Indica si la biblioteca SQLite enlazada incluye FTS5"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_check USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_check")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def create_fts_indexes(conn):
+    """Crea las tablas FTS5, sus triggers de sincronización y las llena con los datos actuales"""
+    if not fts5_available(conn):
+        return
+    
+    for table, (pk, columns) in FTS_TABLES.items():
+        fts = fts_table(table)
+        cols = ', '.join(columns)
+        new_values = ', '.join(f"new.{col}" for col in columns)
+        old_values = ', '.join(f"old.{col}" for col in columns)
+        
+        conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='{pk}',
+            tokenize='{TOKENIZE}', prefix='{PREFIX}'
+        )""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.{pk}, {new_values});
+        END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_values});
+        END""")
+        # Solo cuando cambian las columnas indexadas (no en cada cambio de stock o estado)
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_values});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.{pk}, {new_values});
+        END""")
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def build_match_query(term):
+    """Convierte el texto del usuario en una consulta MATCH segura.
+    
+    Cada palabra se entrecomilla (los operadores de FTS5 no se interpretan) y
+    se busca por prefijo; todas las palabras deben aparecer.
+    """
+    tokens = _TOKEN.findall(term or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def has_fts_index(db, table):
+    """Indica si la tabla tiene su índice FTS5 creado"""
+    return db.fetch_one('schema.has_table', (fts_table(table),)) is not None
+
+
+def search(db, table, term, limit=SEARCH_LIMIT):
+    """Filas de la tabla base que coinciden con el término, las más relevantes primero.
+    
+    Las sentencias de cada tabla están en el registro (database.statements)
+    como 'search.<Tabla>' y 'search.<Tabla>.like'.
+    """
+    if has_fts_index(db, table):
+        match = build_match_query(term)
+        if match is None:
+            return []
+        rows = db.fetch_all(f'search.{table}', (match, limit))
+        if rows:
+            return rows
+    
+    # Sin FTS5 o sin coincidencias por prefijo: búsqueda por subcadena recorriendo la tabla
+    columns = FTS_TABLES[table][1]
+    search_term = f"%{term}%"
+    return db.fetch_all(f'search.{table}.like', (search_term,) * len(columns) + (limit,))
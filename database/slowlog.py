@@ -0,0 +1,211 @@
+"""Registro de consultas lentas ([SlowLog] de settings.ini).
+
+DatabaseConnection mide cada sentencia que ejecuta. Las que tardan
+ThresholdMs o más se apuntan en un archivo JSONL rotativo (MaxKB por
+archivo, Backups archivos anteriores) con:
+
+- nombre de la sentencia del registro (o '<ad hoc>') y su SQL normalizado,
+- duración, filas y parámetros,
+- EXPLAIN QUERY PLAN, obtenido en la misma conexión justo después,
+- el código que la pidió (primer marco fuera de database/).
+
+El EXPLAIN solo se paga en las sentencias lentas. Las consultas que
+database.archive dirige a los años archivados se explican con su SQL de la
+base activa.
+
+Las que más tiempo suman, agrupadas por SQL normalizado:
+    python -m database.slowlog [número de consultas]
+"""
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+LOGGER_NAME = 'dcorelp.slowlog'
+# Longitud máxima de cada parámetro en el registro
+MAX_PARAM_LENGTH = 200
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_BASE_DIR = os.path.dirname(_PACKAGE_DIR)
+# Marcos que no son quien pidió la consulta
+_SKIPPED_FILES = ('contextlib.py', 'threading.py', os.path.join('concurrent', 'futures'), 'asyncio')
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w:?$@])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """SQL sin literales, comentarios ni espacios de más: las variantes de una consulta quedan juntas"""
+    sql = _COMMENT.sub(' ', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _safe(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    text = str(value)
+    return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + '...'
+
+
+def _params(params):
+    if isinstance(params, dict):
+        return {key: _safe(value) for key, value in params.items()}
+    return [_safe(value) for value in params]
+
+
+def caller():
+    """'archivo:línea en función' del primer marco fuera de database/ (None si no hay)"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if not path.startswith(_PACKAGE_DIR) and not any(part in path for part in _SKIPPED_FILES):
+            if path.startswith(_BASE_DIR):
+                path = path[len(_BASE_DIR) + 1:]
+            # co_qualname (Clase.método) solo existe desde Python 3.11
+            code = frame.f_code
+            return f"{path}:{frame.f_lineno} en {getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """Apunta en un JSONL rotativo las sentencias que superan el umbral"""
+    
+    def __init__(self, path, threshold_ms=100, max_kb=1024, backups=3, enabled=True):
+        if not os.path.isabs(path):
+            path = os.path.join(_BASE_DIR, path)
+        self.path = path
+        self.enabled = enabled
+        self.max_kb = max_kb
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._handler = None
+        self.set_threshold(threshold_ms if enabled else None)
+    
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['path'], config['threshold_ms'], config['max_kb'], config['backups'], config['enabled'])
+    
+    def set_threshold(self, threshold_ms):
+        """Cambia el umbral en milisegundos; None desactiva el registro"""
+        # En segundos, comparable con la duración medida; infinito = nunca
+        self.threshold = float('inf') if threshold_ms is None else threshold_ms / 1000
+    
+    def _logger(self):
+        with self._lock:
+            if self._handler is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._handler = logging.handlers.RotatingFileHandler(
+                    self.path, maxBytes=self.max_kb * 1024, backupCount=self.backups, encoding='utf-8')
+                self._handler.setFormatter(logging.Formatter('%(message)s'))
+                logger = logging.getLogger(f"{LOGGER_NAME}.{id(self)}")
+                logger.addHandler(self._handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                self._log = logger
+            return self._log
+    
+    def record(self, conn, name, sql, params, elapsed, rows, batch=None):
+        """Apunta una sentencia lenta con su plan; `batch` es el número de juegos de parámetros de executemany"""
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'name': name,
+            'sql': normalize_sql(sql),
+            'ms': round(elapsed * 1000, 3),
+            'rows': rows,
+            'params': _params(params),
+            'plan': self.explain(conn, sql, params),
+            'caller': caller(),
+            'thread': threading.current_thread().name
+        }
+        if batch is not None:
+            entry['batch'] = batch
+        self._logger().info(json.dumps(entry, ensure_ascii=False))
+        return entry
+    
+    @staticmethod
+    def explain(conn, sql, params):
+        """Líneas de EXPLAIN QUERY PLAN (sangradas según el árbol) o None si no se puede obtener"""
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        except (sqlite3.Error, ValueError):
+            return None
+        depth = {0: -1}
+        lines = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node] + detail)
+        return lines
+    
+    def close(self):
+        with self._lock:
+            if self._handler is not None:
+                self._log.removeHandler(self._handler)
+                self._handler.close()
+                self._handler = None
+    
+    def entries(self):
+        """Registros del archivo actual y de los rotados, del más antiguo al más reciente"""
+        paths = [f"{self.path}.{i}" for i in range(self.backups, 0, -1)] + [self.path]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+    
+    def top(self, limit=10):
+        """Consultas lentas agrupadas por (nombre, SQL normalizado), la de más tiempo total primero"""
+        groups = {}
+        for entry in self.entries():
+            key = (entry['name'], entry['sql'])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {'name': entry['name'], 'sql': entry['sql'], 'count': 0,
+                                       'total_ms': 0.0, 'max_ms': 0.0, 'callers': {}}
+            group['count'] += 1
+            group['total_ms'] += entry['ms']
+            if entry['ms'] >= group['max_ms']:
+                # Plan y parámetros de la ejecución más lenta
+                group.update(max_ms=entry['ms'], plan=entry['plan'], params=entry['params'], slowest_at=entry['time'])
+            if entry['caller']:
+                group['callers'][entry['caller']] = group['callers'].get(entry['caller'], 0) + 1
+        result = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)[:limit]
+        for group in result:
+            group['avg_ms'] = group['total_ms'] / group['count']
+            group['callers'] = sorted(group['callers'].items(), key=lambda item: item[1], reverse=True)
+        return result
+
+
+if __name__ == "__main__":
+    from config.config_manager import config_manager
+    
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    slow_log = SlowQueryLog.from_config(config_manager.get_slowlog_config())
+    groups = slow_log.top(limit)
+    if not groups:
+        print(f"No hay consultas lentas en {slow_log.path}")
+    for position, group in enumerate(groups, 1):
+        print(f"{position}. {group['name']}: {group['count']} veces, {group['total_ms']:.0f} ms en total, "
+              f"media {group['avg_ms']:.1f} ms, máx {group['max_ms']:.1f} ms ({group['slowest_at']})")
+        print(f"   {group['sql'][:300]}")
+        for line in group['plan'] or ['(sin plan)']:
+            print(f"     {line}")
+        print(f"   Parámetros de la más lenta: {group['params']}")
+        for location, count in group['callers'][:3]:
+            print(f"   {count} x {location}")
+        print()
@@ -0,0 +1,458 @@
+"""Registro central de sentencias SQL.
+
+Modelos, controladores y vistas llaman a la base de datos por nombre
+(db.fetch_all('producto.get_all')) en lugar de copiar el texto SQL. Así el
+texto de cada sentencia es siempre el mismo, la caché de sentencias
+preparadas de sqlite3 (cached_statements) se dimensiona para que quepan
+todas, y cada llamada queda registrada en las estadísticas por sentencia
+(DatabaseConnection.statement_stats / dump_statement_stats).
+
+Los filtros opcionales se expresan en SQL (COALESCE / IS NULL) para que
+cada sentencia tenga un único texto y se prepare una sola vez.
+"""
+import json
+import threading
+
+from .search import FTS_TABLES, fts_table
+
+# Nombre con el que se acumulan las sentencias que no están en el registro
+# (DDL, migraciones, benchmarks)
+AD_HOC = '<ad hoc>'
+
+# Sentencias fuera del registro que pueden coincidir en la caché de una conexión
+CACHE_MARGIN = 32
+
+# Límites (ms) de los tramos del histograma de espera por el bloqueo de escritura
+LOCK_WAIT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_VENTA_CON_NOMBRES = """SELECT v.*, c.NombreCli, e.NombreEmp
+                 FROM Venta v
+                 LEFT JOIN Cliente c ON v.idCliente = c.idCliente
+                 LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado"""
+
+# Columnas de Producto para la carga anticipada (include=['producto']) de las
+# líneas de venta y factura; ninguna coincide con una columna de las líneas
+_CON_PRODUCTO = "p.NombrePro, p.Precio, p.Stock, p.idCategoria"
+
+_FACTURA_CON_NOMBRES = """SELECT f.*, c.NombreCli as cliente_nombre, e.NombreEmp as empleado_nombre
+            FROM Factura f
+            LEFT JOIN Cliente c ON f.idCliente = c.idCliente
+            LEFT JOIN Empleado e ON f.idEmpleado = e.idEmpleado"""
+
+STATEMENTS = {
+    # Categoria
+    'categoria.insert': "INSERT INTO Categoria (NombreCat, Descripcion) VALUES (?, ?)",
+    'categoria.update': "UPDATE Categoria SET NombreCat = ?, Descripcion = ? WHERE idCategoria = ?",
+    'categoria.delete': "DELETE FROM Categoria WHERE idCategoria = ?",
+    'categoria.get_by_id': "SELECT * FROM Categoria WHERE idCategoria = ?",
+    'categoria.get_all': "SELECT * FROM Categoria ORDER BY NombreCat, idCategoria",
+    'categoria.get_nombre': "SELECT NombreCat FROM Categoria WHERE idCategoria = ?",
+    'categoria.count': "SELECT COUNT(*) as count FROM Categoria",
+    
+    # Producto
+    'producto.insert': "INSERT INTO Producto (NombrePro, Precio, Stock, idCategoria) VALUES (?, ?, ?, ?)",
+    'producto.update': """UPDATE Producto SET NombrePro = ?, Precio = ?, Stock = ?, idCategoria = ?,
+                      Version = Version + 1 WHERE idProducto = ?""",
+    # Versión esperada opcional (NULL = sin comprobar)
+    'producto.add_stock': """UPDATE Producto SET Stock = Stock + ?, Version = Version + 1
+                      WHERE idProducto = ? AND Version = COALESCE(?, Version)""",
+    'producto.delete': "DELETE FROM Producto WHERE idProducto = ?",
+    'producto.get_by_id': "SELECT * FROM Producto WHERE idProducto = ?",
+    'producto.get_all': "SELECT * FROM Producto ORDER BY NombrePro, idProducto",
+    'producto.get_by_categoria': "SELECT * FROM Producto WHERE idCategoria = ? ORDER BY NombrePro",
+    'producto.stock_bajo': "SELECT * FROM Producto WHERE Stock <= ?",
+    
+    # Cliente
+    'cliente.insert': "INSERT INTO Cliente (NombreCli, TelefonoCli, Dni, DireccionClie) VALUES (?, ?, ?, ?)",
+    'cliente.update': "UPDATE Cliente SET NombreCli = ?, TelefonoCli = ?, Dni = ?, DireccionClie = ? WHERE idCliente = ?",
+    'cliente.delete': "DELETE FROM Cliente WHERE idCliente = ?",
+    'cliente.get_by_id': "SELECT * FROM Cliente WHERE idCliente = ?",
+    'cliente.get_all': "SELECT * FROM Cliente ORDER BY NombreCli, idCliente",
+    'cliente.frecuentes': """SELECT c.*, COUNT(v.idVenta) as total_compras, SUM(v.Total) as total_gastado
+                 FROM Cliente c
+                 LEFT JOIN Venta v ON c.idCliente = v.idCliente
+                 GROUP BY c.idCliente
+                 ORDER BY total_compras DESC
+                 LIMIT ?""",
+    
+    # Empleado
+    'empleado.insert': "INSERT INTO Empleado (NombreEmp, CorreoEmp, Telefono, DireccionEmp) VALUES (?, ?, ?, ?)",
+    'empleado.update': "UPDATE Empleado SET NombreEmp = ?, CorreoEmp = ?, Telefono = ?, DireccionEmp = ? WHERE idEmpleado = ?",
+    'empleado.delete': "DELETE FROM Empleado WHERE idEmpleado = ?",
+    'empleado.get_by_id': "SELECT * FROM Empleado WHERE idEmpleado = ?",
+    'empleado.get_all': "SELECT * FROM Empleado ORDER BY NombreEmp, idEmpleado",
+    
+    # Venta
+    'venta.insert': "INSERT INTO Venta (Fecha, Total, idEmpleado, idCliente) VALUES (?, ?, ?, ?)",
+    'venta.update': "UPDATE Venta SET Fecha = ?, Total = ?, idEmpleado = ?, idCliente = ? WHERE idVenta = ?",
+    'venta.delete': "DELETE FROM Venta WHERE idVenta = ?",
+    'venta.get_by_id': "SELECT * FROM Venta WHERE idVenta = ?",
+    'venta.get_all': "SELECT * FROM Venta ORDER BY Fecha DESC, idVenta DESC",
+    'venta.all_with_names': _VENTA_CON_NOMBRES + """
+                 ORDER BY v.Fecha DESC""",
+    'venta.with_names': _VENTA_CON_NOMBRES + """
+                 WHERE v.idVenta = ?""",
+    'venta.by_fecha_with_names': _VENTA_CON_NOMBRES + """
+                 WHERE v.Fecha BETWEEN ? AND ?
+                 ORDER BY v.Fecha DESC""",
+    'venta.by_cliente_with_names': _VENTA_CON_NOMBRES + """
+                 WHERE v.idCliente = ?
+                 ORDER BY v.Fecha DESC""",
+    # Descuenta de una vez el stock de todos los productos de la venta
+    'venta.discount_stock': """UPDATE Producto SET Stock = Stock - vendidos.Cantidad, Version = Version + 1
+                 FROM (SELECT idProducto, SUM(Cantidad) AS Cantidad
+                       FROM DetalleVenta WHERE idVenta = ?
+                       GROUP BY idProducto) AS vendidos
+                 WHERE Producto.idProducto = vendidos.idProducto""",
+    # DetalleVenta
+    'detalleventa.insert': "INSERT INTO DetalleVenta (Cantidad, PrecioUni, SubTotal, idProducto, idVenta) VALUES (?, ?, ?, ?, ?)",
+    'detalleventa.update': "UPDATE DetalleVenta SET Cantidad = ?, PrecioUni = ?, SubTotal = ?, idProducto = ?, idVenta = ? WHERE idDetalleVenta = ?",
+    'detalleventa.delete': "DELETE FROM DetalleVenta WHERE idDetalleVenta = ?",
+    'detalleventa.get_by_venta': "SELECT * FROM DetalleVenta WHERE idVenta = ?",
+    'detalleventa.get_by_venta.producto': f"""SELECT d.*, {_CON_PRODUCTO}
+                 FROM DetalleVenta d
+                 LEFT JOIN Producto p ON d.idProducto = p.idProducto
+                 WHERE d.idVenta = ?""",
+    
+    # Factura
+    'factura.insert': """INSERT INTO Factura (NumeroFactura, Fecha, SubTotal, Impuesto, Total,
+                      Estado, Observaciones, idVenta, idCliente, idEmpleado)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    'factura.update': """UPDATE Factura SET NumeroFactura = ?, Fecha = ?, SubTotal = ?,
+                      Impuesto = ?, Total = ?, Estado = ?, Observaciones = ?,
+                      idVenta = ?, idCliente = ?, idEmpleado = ?,
+                      Version = Version + 1 WHERE idFactura = ?""",
+    'factura.delete': "DELETE FROM Factura WHERE idFactura = ?",
+    'factura.get_by_id': "SELECT * FROM Factura WHERE idFactura = ?",
+    'factura.get_all': "SELECT * FROM Factura ORDER BY Fecha DESC, idFactura DESC",
+    'factura.get_by_numero': "SELECT * FROM Factura WHERE NumeroFactura = ?",
+    'factura.get_by_cliente': "SELECT * FROM Factura WHERE idCliente = ? ORDER BY Fecha DESC, idFactura DESC",
+    'factura.get_by_estado': "SELECT * FROM Factura WHERE Estado = ? ORDER BY Fecha DESC, idFactura DESC",
+    'factura.with_names': _FACTURA_CON_NOMBRES + """
+            WHERE f.idFactura = ?""",
+    'factura.secuencia_init': "INSERT OR IGNORE INTO SecuenciaFactura (Serie, Ultimo) VALUES (?, 0)",
+    'factura.secuencia_next': "UPDATE SecuenciaFactura SET Ultimo = Ultimo + 1 WHERE Serie = ?",
+    'factura.secuencia_get': "SELECT Ultimo FROM SecuenciaFactura WHERE Serie = ?",
+    'factura.estadisticas': """SELECT
+                        COUNT(*) as total_facturas,
+                        SUM(CASE WHEN Estado = 'Pendiente' THEN 1 ELSE 0 END) as pendientes,
+                        SUM(CASE WHEN Estado = 'Pagada' THEN 1 ELSE 0 END) as pagadas,
+                        SUM(CASE WHEN Estado = 'Cancelada' THEN 1 ELSE 0 END) as canceladas,
+                        SUM(CASE WHEN Estado = 'Vencida' THEN 1 ELSE 0 END) as vencidas,
+                        SUM(Total) as total_monto,
+                        AVG(Total) as promedio_monto
+                    FROM Factura""",
+    # DetalleFactura
+    'detallefactura.insert': """INSERT INTO DetalleFactura (Cantidad, PrecioUni, SubTotal, idProducto, idFactura)
+                      VALUES (?, ?, ?, ?, ?)""",
+    'detallefactura.update': """UPDATE DetalleFactura SET Cantidad = ?, PrecioUni = ?, SubTotal = ?,
+                      idProducto = ?, idFactura = ? WHERE idDetalleFactura = ?""",
+    'detallefactura.delete': "DELETE FROM DetalleFactura WHERE idDetalleFactura = ?",
+    'detallefactura.delete_by_factura': "DELETE FROM DetalleFactura WHERE idFactura = ?",
+    'detallefactura.get_by_id': "SELECT * FROM DetalleFactura WHERE idDetalleFactura = ?",
+    'detallefactura.get_by_factura': "SELECT * FROM DetalleFactura WHERE idFactura = ?",
+    'detallefactura.get_by_factura.producto': f"""SELECT df.*, {_CON_PRODUCTO}
+                  FROM DetalleFactura df
+                  LEFT JOIN Producto p ON df.idProducto = p.idProducto
+                  WHERE df.idFactura = ?""",
+    
+    # Reportes
+    'reporte.ventas': """SELECT v.idVenta, v.Fecha, v.Total, c.NombreCli, e.NombreEmp
+                 FROM Venta v
+                 LEFT JOIN Cliente c ON v.idCliente = c.idCliente
+                 LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
+                 WHERE v.Fecha BETWEEN ? AND ?
+                 ORDER BY v.Fecha DESC""",
+    # Desde el resumen diario; fechas opcionales (NULL = todo el historial)
+    'reporte.productos_vendidos': """SELECT p.idProducto, p.NombrePro, c.NombreCat,
+                      SUM(r.Unidades) as cantidad_vendida,
+                      SUM(r.Ingresos) as total_vendido,
+                      SUM(r.Tickets) as tickets
+                 FROM ResumenVentaDiaria r
+                 JOIN Producto p ON r.idProducto = p.idProducto
+                 LEFT JOIN Categoria c ON p.idCategoria = c.idCategoria
+                 WHERE r.Fecha BETWEEN COALESCE(?, '0000-01-01') AND COALESCE(?, '9999-12-31')
+                 GROUP BY p.idProducto
+                 ORDER BY cantidad_vendida DESC
+                 LIMIT ?""",
+    'reporte.ventas_diarias': """SELECT Fecha, SUM(Unidades) as unidades, SUM(Ingresos) as ingresos
+                 FROM ResumenVentaDiaria
+                 WHERE Fecha BETWEEN ? AND ?
+                 GROUP BY Fecha
+                 ORDER BY Fecha DESC""",
+    'reporte.stock_bajo': """SELECT p.*, c.NombreCat
+                 FROM Producto p
+                 LEFT JOIN Categoria c ON p.idCategoria = c.idCategoria
+                 WHERE p.Stock <= ?
+                 ORDER BY p.Stock ASC""",
+    
+    # Archivo anual (database.archive)
+    'archivo.get_all': "SELECT * FROM Archivo ORDER BY Anio",
+    'archivo.first_fecha': """SELECT MIN(Fecha) as Fecha FROM (SELECT MIN(Fecha) as Fecha FROM Venta
+                                                 UNION ALL SELECT MIN(Fecha) FROM Factura)""",
+    'archivo.has_data': """SELECT 1 WHERE EXISTS (SELECT 1 FROM Venta WHERE Fecha BETWEEN ?1 AND ?2)
+                          OR EXISTS (SELECT 1 FROM Factura WHERE Fecha BETWEEN ?1 AND ?2)""",
+    
+    # Esquema
+    'schema.has_table': "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+    'schema.last_insert_rowid': "SELECT last_insert_rowid()",
+}
+
+
+# Consultas con filtros opcionales: SELECT, fragmentos de WHERE por parámetro
+# y ORDER BY. Se registra una sentencia por combinación de filtros para que
+# cada una tenga su propio plan; con un único "(:x IS NULL OR col = :x)"
+# SQLite prepararía un solo plan y no usaría idx_venta_cliente ni
+# idx_factura_estado.
+FILTERED = {
+    # Ventas para facturar
+    'venta.facturacion': ("""SELECT v.idVenta, v.Fecha, v.Total, v.idCliente, v.idEmpleado,
+                   c.NombreCli, e.NombreEmp,
+                   CASE WHEN f.idFactura IS NOT NULL THEN 'Sí' ELSE 'No' END as Facturada
+            FROM Venta v
+            LEFT JOIN Cliente c ON v.idCliente = c.idCliente
+            LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
+            LEFT JOIN Factura f ON v.idVenta = f.idVenta""", {
+        'cliente': "v.idCliente = :cliente",
+        'desde': "v.Fecha >= :desde",
+        'hasta': "v.Fecha <= :hasta"
+    }, "ORDER BY v.Fecha DESC"),
+    'factura.reporte': ("""SELECT f.idFactura, f.NumeroFactura, f.Fecha, f.SubTotal,
+                           f.Impuesto, f.Total, f.Estado, f.Observaciones,
+                           c.NombreCli, e.NombreEmp, v.idVenta
+                    FROM Factura f
+                    LEFT JOIN Cliente c ON f.idCliente = c.idCliente
+                    LEFT JOIN Empleado e ON f.idEmpleado = e.idEmpleado
+                    LEFT JOIN Venta v ON f.idVenta = v.idVenta""", {
+        'desde': "f.Fecha >= :desde",
+        'hasta': "f.Fecha <= :hasta",
+        'estado': "f.Estado = :estado"
+    }, "ORDER BY f.Fecha DESC"),
+}
+
+
+def _filter_name(base, keys):
+    return f"{base}.where.{','.join(keys)}" if keys else base
+
+
+def _filter_combinations(base):
+    keys = list(FILTERED[base][1])
+    return [[key for i, key in enumerate(keys) if mask >> i & 1] for mask in range(2 ** len(keys))]
+
+
+def filter_variants(base):
+    """Nombres de todas las combinaciones de filtros de una consulta de FILTERED"""
+    return [_filter_name(base, keys) for keys in _filter_combinations(base)]
+
+
+def filtered(base, params):
+    """Nombre de la sentencia de `base` con los filtros de `params` que no son None"""
+    return _filter_name(base, [key for key in FILTERED[base][1] if params.get(key) is not None])
+
+for _base, (_select, _filters, _order) in FILTERED.items():
+    for _keys in _filter_combinations(_base):
+        _where = f"\n            WHERE {' AND '.join(_filters[key] for key in _keys)}" if _keys else ""
+        STATEMENTS[_filter_name(_base, _keys)] = f"{_select}{_where}\n            {_order}"
+
+
+def _keyset(table, order, where=None):
+    """Primera página y siguientes de un listado, paginado por la clave de su orden.
+    
+    order es (columna, clave primaria, 'ASC'|'DESC'); las páginas siguientes
+    reciben la clave del último registro y continúan a partir de ella.
+    """
+    column, pk, direction = order
+    compare = '<' if direction == 'DESC' else '>'
+    order_by = f"ORDER BY {column} {direction}, {pk} {direction} LIMIT ?"
+    after = f"({column}, {pk}) {compare} (?, ?)"
+    if where:
+        return (f"SELECT * FROM {table} WHERE {where} {order_by}",
+                f"SELECT * FROM {table} WHERE {where} AND {after} {order_by}")
+    return (f"SELECT * FROM {table} {order_by}",
+            f"SELECT * FROM {table} WHERE {after} {order_by}")
+
+for _name, _table, _order, _where in [
+    ('categoria.page', 'Categoria', ('NombreCat', 'idCategoria', 'ASC'), None),
+    ('producto.page', 'Producto', ('NombrePro', 'idProducto', 'ASC'), None),
+    ('cliente.page', 'Cliente', ('NombreCli', 'idCliente', 'ASC'), None),
+    ('empleado.page', 'Empleado', ('NombreEmp', 'idEmpleado', 'ASC'), None),
+    ('venta.page', 'Venta', ('Fecha', 'idVenta', 'DESC'), None),
+    ('factura.page', 'Factura', ('Fecha', 'idFactura', 'DESC'), None),
+    ('factura.page_by_cliente', 'Factura', ('Fecha', 'idFactura', 'DESC'), 'idCliente = ?'),
+    ('factura.page_by_estado', 'Factura', ('Fecha', 'idFactura', 'DESC'), 'Estado = ?'),
+]:
+    STATEMENTS[f'{_name}_first'], STATEMENTS[f'{_name}_after'] = _keyset(_table, _order, _where)
+
+# Tablas de los modelos para las escrituras en bloque (upsert_many):
+# prefijo -> (tabla, clave primaria, columnas en el orden de '<prefijo>.insert',
+# columnas UNIQUE que pueden usarse como clave de conflicto)
+MODEL_TABLES = {
+    'categoria': ('Categoria', 'idCategoria', ('NombreCat', 'Descripcion'), ()),
+    'producto': ('Producto', 'idProducto', ('NombrePro', 'Precio', 'Stock', 'idCategoria'), ()),
+    'venta': ('Venta', 'idVenta', ('Fecha', 'Total', 'idEmpleado', 'idCliente'), ()),
+    'detalleventa': ('DetalleVenta', 'idDetalleVenta',
+                     ('Cantidad', 'PrecioUni', 'SubTotal', 'idProducto', 'idVenta'), ()),
+    'cliente': ('Cliente', 'idCliente', ('NombreCli', 'TelefonoCli', 'Dni', 'DireccionClie'), ('Dni',)),
+    'empleado': ('Empleado', 'idEmpleado', ('NombreEmp', 'CorreoEmp', 'Telefono', 'DireccionEmp'), ('CorreoEmp',)),
+    'factura': ('Factura', 'idFactura', ('NumeroFactura', 'Fecha', 'SubTotal', 'Impuesto', 'Total', 'Estado',
+                                         'Observaciones', 'idVenta', 'idCliente', 'idEmpleado'), ('NumeroFactura',)),
+    'detallefactura': ('DetalleFactura', 'idDetalleFactura',
+                       ('Cantidad', 'PrecioUni', 'SubTotal', 'idProducto', 'idFactura'), ()),
+}
+
+# Tablas con columna de versión (concurrencia optimista): todo UPDATE de los
+# modelos la incrementa, y los que reciben la versión leída solo escriben si
+# la fila sigue en esa versión
+VERSIONED = {'producto', 'factura'}
+VERSION_COLUMN = 'Version'
+
+
+def _upsert(table, columns, key, versioned=False):
+    """INSERT que actualiza el resto de columnas si ya existe una fila con la misma `key`"""
+    placeholders = ', '.join('?' * len(columns))
+    updates = ', '.join(f"{col} = excluded.{col}" for col in columns if col != key)
+    if versioned:
+        updates += f", {VERSION_COLUMN} = {VERSION_COLUMN} + 1"
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {updates}")
+
+for _prefix, (_table, _pk, _columns, _unique) in MODEL_TABLES.items():
+    # Por clave primaria: (id, columnas...); un id NULL siempre inserta
+    STATEMENTS[f'{_prefix}.upsert'] = _upsert(_table, (_pk,) + _columns, _pk, _prefix in VERSIONED)
+    for _key in _unique:
+        # Por columna UNIQUE: (columnas...); el id se lee después con id_by.<columna>
+        STATEMENTS[f'{_prefix}.upsert.{_key}'] = _upsert(_table, _columns, _key, _prefix in VERSIONED)
+        STATEMENTS[f'{_prefix}.id_by.{_key}'] = f"SELECT {_pk} FROM {_table} WHERE {_key} = ?"
+
+
+def set_columns(prefix, columns):
+    """Nombre de la sentencia que actualiza solo `columns` de un modelo.
+    
+    Se registra la primera vez que se pide cada combinación; las que usa la
+    aplicación (estado, totales, stock...) son pocas y caben en CACHE_MARGIN.
+    En las tablas de VERSIONED incrementa la versión y recibe después del id
+    la versión esperada (NULL = sin comprobar).
+    """
+    name = f"{prefix}.set.{','.join(columns)}"
+    if name not in STATEMENTS:
+        table, pk, _, _ = MODEL_TABLES[prefix]
+        assignments = ', '.join(f"{col} = ?" for col in columns)
+        if prefix in VERSIONED:
+            STATEMENTS[name] = (f"UPDATE {table} SET {assignments}, {VERSION_COLUMN} = {VERSION_COLUMN} + 1 "
+                                f"WHERE {pk} = ? AND {VERSION_COLUMN} = COALESCE(?, {VERSION_COLUMN})")
+        else:
+            STATEMENTS[name] = f"UPDATE {table} SET {assignments} WHERE {pk} = ?"
+    return name
+
+
+# Búsquedas de texto completo (FTS5) y su alternativa con LIKE, una por tabla
+for _table, (_pk, _columns) in FTS_TABLES.items():
+    _fts = fts_table(_table)
+    # Las más relevantes (bm25) dentro de FTS5; la unión con la tabla base conserva ese orden
+    STATEMENTS[f'search.{_table}'] = f"""SELECT t.* FROM (SELECT rowid, rank FROM {_fts}
+                                     WHERE {_fts} MATCH ? ORDER BY rank LIMIT ?) AS m
+                    JOIN {_table} t ON t.{_pk} = m.rowid
+                    ORDER BY m.rank"""
+    _conditions = ' OR '.join(f"{col} LIKE ?" for col in _columns)
+    STATEMENTS[f'search.{_table}.like'] = (f"SELECT * FROM {_table} WHERE {_conditions} "
+                                           f"ORDER BY {_columns[0]} LIMIT ?")
+
+
+def cache_size():
+    """Tamaño de la caché de sentencias preparadas de cada conexión"""
+    return len(STATEMENTS) + CACHE_MARGIN
+
+
+def resolve(query):
+    """Devuelve (nombre, texto SQL) de una sentencia del registro o de un SQL ad hoc"""
+    sql = STATEMENTS.get(query)
+    if sql is None:
+        return AD_HOC, query
+    return query, sql
+
+
+class StatementStats:
+    """Llamadas, tiempo total y filas por sentencia (thread-safe).
+    
+    Las filas son las devueltas en las consultas y las afectadas
+    (rowcount) en las escrituras.
+    """
+    
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._lock_waits = {}
+    
+    def record(self, name, elapsed, rows):
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = [0, 0.0, 0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += max(rows, 0)
+            if elapsed > entry[3]:
+                entry[3] = elapsed
+    
+    def snapshot(self):
+        """Estadísticas por sentencia (tiempos en milisegundos), la de más tiempo total primero"""
+        with self._lock:
+            items = [(name, list(entry)) for name, entry in self._stats.items()]
+        items.sort(key=lambda item: item[1][1], reverse=True)
+        return {name: {
+            'calls': calls,
+            'total_ms': total * 1000,
+            'avg_ms': total / calls * 1000,
+            'max_ms': worst * 1000,
+            'rows': rows
+        } for name, (calls, total, rows, worst) in items}
+    
+    def record_lock_wait(self, name, elapsed, retries=0, failed=False):
+        """Espera hasta obtener el bloqueo de escritura (BEGIN IMMEDIATE y reintentos)"""
+        with self._lock:
+            entry = self._lock_waits.get(name)
+            if entry is None:
+                entry = self._lock_waits[name] = {
+                    'calls': 0, 'total': 0.0, 'max': 0.0, 'retries': 0, 'failed': 0,
+                    'buckets': [0] * (len(LOCK_WAIT_BUCKETS) + 1)
+                }
+            entry['calls'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['retries'] += retries
+            entry['failed'] += failed
+            ms = elapsed * 1000
+            bucket = next((i for i, limit in enumerate(LOCK_WAIT_BUCKETS) if ms < limit), len(LOCK_WAIT_BUCKETS))
+            entry['buckets'][bucket] += 1
+    
+    def lock_wait_snapshot(self):
+        """Histograma de espera por el bloqueo por sentencia (ms), la de más espera total primero"""
+        labels = [f"<{limit}ms" for limit in LOCK_WAIT_BUCKETS] + [f">={LOCK_WAIT_BUCKETS[-1]}ms"]
+        with self._lock:
+            items = [(name, dict(entry, buckets=list(entry['buckets']))) for name, entry in self._lock_waits.items()]
+        items.sort(key=lambda item: item[1]['total'], reverse=True)
+        return {name: {
+            'calls': entry['calls'],
+            'total_ms': entry['total'] * 1000,
+            'avg_ms': entry['total'] / entry['calls'] * 1000,
+            'max_ms': entry['max'] * 1000,
+            'retries': entry['retries'],
+            'failed': entry['failed'],
+            'histogram': dict(zip(labels, entry['buckets']))
+        } for name, entry in items}
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._lock_waits.clear()
+    
+    def dump_json(self, path):
+        """Guarda las estadísticas en un archivo JSON y devuelve la ruta"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+stats = StatementStats()
+
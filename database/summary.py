@@ -0,0 +1,125 @@
+"""Resumen diario de ventas por (día, producto, empleado).
+
+ResumenVentaDiaria guarda unidades, ingresos (céntimos) y número de ventas
+(tickets) de cada producto por día y empleado. Los triggers sobre
+DetalleVenta y Venta lo mantienen al día en la misma transacción que la
+venta, así los reportes por rango de fechas recorren días y no ventas.
+
+Las ventas sin empleado se guardan con idEmpleado = 0 (la clave primaria no
+admite NULL).
+
+Los años archivados (database.archive) ya no tienen ventas en la base
+activa: la reconstrucción conserva sus filas y recalcula solo los días
+posteriores al último año archivado.
+
+Reconstrucción completa (cargas masivas, importaciones):
+    python -m database.summary
+"""
+
+SUMMARY_TABLE = """CREATE TABLE IF NOT EXISTS ResumenVentaDiaria (
+    Fecha DATE NOT NULL,
+    idProducto INTEGER NOT NULL,
+    idEmpleado INTEGER NOT NULL,
+    Unidades INTEGER NOT NULL DEFAULT 0,
+    Ingresos INTEGER NOT NULL DEFAULT 0,
+    Tickets INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (Fecha, idProducto, idEmpleado)
+) WITHOUT ROWID"""
+
+# Suma (signo = 1) o resta (signo = -1) una línea de detalle en su fila del resumen.
+# La venta cuenta como ticket del producto solo en su primera línea de ese producto
+# (+o.idProducto obliga a buscar por idx_detalleventa_venta y no por producto).
+_APPLY_DETAIL = """INSERT INTO ResumenVentaDiaria (Fecha, idProducto, idEmpleado, Unidades, Ingresos, Tickets)
+    SELECT v.Fecha, {d}.idProducto, COALESCE(v.idEmpleado, 0),
+           {signo} * {d}.Cantidad, {signo} * {d}.SubTotal,
+           {signo} * (NOT EXISTS (SELECT 1 FROM DetalleVenta o
+                                  WHERE o.idVenta = {d}.idVenta AND +o.idProducto = {d}.idProducto
+                                    AND o.idDetalleVenta <> {d}.idDetalleVenta))
+    FROM Venta v WHERE v.idVenta = {d}.idVenta
+    ON CONFLICT (Fecha, idProducto, idEmpleado) DO UPDATE SET
+        Unidades = Unidades + excluded.Unidades,
+        Ingresos = Ingresos + excluded.Ingresos,
+        Tickets = Tickets + excluded.Tickets;"""
+
+# Suma o resta todas las líneas de una venta agrupadas por producto
+_APPLY_SALE = """INSERT INTO ResumenVentaDiaria (Fecha, idProducto, idEmpleado, Unidades, Ingresos, Tickets)
+    SELECT {v}.Fecha, d.idProducto, COALESCE({v}.idEmpleado, 0),
+           {signo} * SUM(d.Cantidad), {signo} * SUM(d.SubTotal), {signo}
+    FROM DetalleVenta d WHERE d.idVenta = {v}.idVenta
+    GROUP BY d.idProducto
+    ON CONFLICT (Fecha, idProducto, idEmpleado) DO UPDATE SET
+        Unidades = Unidades + excluded.Unidades,
+        Ingresos = Ingresos + excluded.Ingresos,
+        Tickets = Tickets + excluded.Tickets;"""
+
+# Elimina las filas que quedaron a cero en el día afectado
+_PRUNE = """DELETE FROM ResumenVentaDiaria
+    WHERE Fecha = {fecha} AND Tickets = 0 AND Unidades = 0 AND Ingresos = 0;"""
+_FECHA_DETALLE = "(SELECT Fecha FROM Venta WHERE idVenta = {d}.idVenta)"
+
+SUMMARY_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS DetalleVenta_resumen_ai AFTER INSERT ON DetalleVenta BEGIN
+        {_APPLY_DETAIL.format(d='new', signo=1)}
+    END""",
+    # En AFTER DELETE/UPDATE, NOT EXISTS ve solo las otras líneas de la venta
+    f"""CREATE TRIGGER IF NOT EXISTS DetalleVenta_resumen_ad AFTER DELETE ON DetalleVenta BEGIN
+        {_APPLY_DETAIL.format(d='old', signo=-1)}
+        {_PRUNE.format(fecha=_FECHA_DETALLE.format(d='old'))}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS DetalleVenta_resumen_au
+    AFTER UPDATE OF Cantidad, SubTotal, idProducto, idVenta ON DetalleVenta BEGIN
+        {_APPLY_DETAIL.format(d='old', signo=-1)}
+        {_APPLY_DETAIL.format(d='new', signo=1)}
+        {_PRUNE.format(fecha=_FECHA_DETALLE.format(d='old'))}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS Venta_resumen_au AFTER UPDATE OF Fecha, idEmpleado ON Venta BEGIN
+        {_APPLY_SALE.format(v='old', signo=-1)}
+        {_APPLY_SALE.format(v='new', signo=1)}
+        {_PRUNE.format(fecha='old.Fecha')}
+    END""",
+    # Las líneas de una venta borrada dejan de contar (los reportes siempre unían con Venta)
+    f"""CREATE TRIGGER IF NOT EXISTS Venta_resumen_ad AFTER DELETE ON Venta BEGIN
+        {_APPLY_SALE.format(v='old', signo=-1)}
+        {_PRUNE.format(fecha='old.Fecha')}
+    END""",
+]
+
+# :desde es el primer día que se recalcula ('' = todo el historial)
+REBUILD = [
+    "DELETE FROM ResumenVentaDiaria WHERE Fecha >= :desde",
+    """INSERT INTO ResumenVentaDiaria (Fecha, idProducto, idEmpleado, Unidades, Ingresos, Tickets)
+       SELECT v.Fecha, d.idProducto, COALESCE(v.idEmpleado, 0),
+              SUM(d.Cantidad), SUM(d.SubTotal), COUNT(DISTINCT d.idVenta)
+       FROM DetalleVenta d
+       JOIN Venta v ON v.idVenta = d.idVenta
+       WHERE v.Fecha >= :desde
+       GROUP BY v.Fecha, d.idProducto, COALESCE(v.idEmpleado, 0)"""
+]
+
+
+def create_summary(conn):
+    """Crea la tabla de resumen y sus triggers, y la llena con el historial actual"""
+    conn.execute(SUMMARY_TABLE)
+    for trigger in SUMMARY_TRIGGERS:
+        conn.execute(trigger)
+    for sql in REBUILD:
+        conn.execute(sql, {'desde': ''})
+
+
+def rebuild_summary(db):
+    """Recalcula el resumen desde Venta y DetalleVenta en una transacción (salvo los años archivados)"""
+    with db.transaction() as conn:
+        anio = conn.execute("SELECT MAX(Anio) FROM Archivo").fetchone()[0]
+        desde = f"{anio + 1:04d}-01-01" if anio is not None else ''
+        for sql in REBUILD:
+            conn.execute(sql, {'desde': desde})
+        return conn.execute("SELECT COUNT(*) FROM ResumenVentaDiaria").fetchone()[0]
+
+
+if __name__ == "__main__":
+    from .connection import DatabaseConnection
+    
+    db = DatabaseConnection()
+    db.create_tables()
+    filas = rebuild_summary(db)
+    print(f"Resumen de ventas reconstruido: {filas} filas")
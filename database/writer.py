@@ -0,0 +1,147 @@
+"""Escritor único con commit agrupado (group commit).
+
+SQLite admite un solo escritor a la vez: si cada terminal abre su propia
+transacción, las escrituras se pelean por el bloqueo y cada una paga su
+COMMIT. Con WriteQueue las escrituras se encolan como trabajos (funciones
+que usan DatabaseConnection) y las ejecuta un único hilo con su propia
+conexión del pool. Los trabajos que llegan juntos comparten transacción:
+
+    BEGIN IMMEDIATE
+      SAVEPOINT  trabajo 1  RELEASE
+      SAVEPOINT  trabajo 2  ROLLBACK TO   (falló: solo se deshace el suyo)
+      ...
+    COMMIT
+
+Cada llamador espera su Future, que se resuelve después del COMMIT: el
+resultado de la función o la excepción de su trabajo. Si la base está
+ocupada al confirmar, el lote se deshace y se repite entero (RetryPolicy);
+si aun así falla el COMMIT, todos los trabajos del lote reciben el error.
+
+Un trabajo no debe esperar a otro hilo que a su vez escriba por la cola.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+DEFAULT_MAX_BATCH = 64
+
+
+class WriteQueueClosedError(RuntimeError):
+    """La cola de escritura se cerró (p. ej. al cambiar de base de datos)"""
+
+
+class WriteQueue:
+    """Hilo escritor que agrupa en una transacción los trabajos encolados"""
+    
+    def __init__(self, db, max_batch=DEFAULT_MAX_BATCH, window=0.0):
+        self.db = db
+        self.max_batch = max_batch
+        # Segundos que se espera a que lleguen más trabajos antes del COMMIT;
+        # con 0 el lote es lo que se acumuló mientras se confirmaba el anterior
+        self.window = window
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._batches = 0
+        self._jobs = 0
+        self._largest = 0
+    
+    def is_writer_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+    
+    def submit(self, func, *args, **kwargs):
+        """Encola func(*args, **kwargs) y devuelve el Future con su resultado"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise WriteQueueClosedError("La cola de escritura está cerrada")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+            self._queue.put((future, func, args, kwargs))
+        return future
+    
+    def close(self, wait=True):
+        """Termina el hilo escritor después de los trabajos ya encolados"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._queue.put(None)
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+    
+    def stats(self):
+        """Lotes confirmados, trabajos, media y máximo de trabajos por lote"""
+        with self._lock:
+            return {
+                'batches': self._batches,
+                'jobs': self._jobs,
+                'avg_batch': self._jobs / self._batches if self._batches else 0,
+                'max_batch': self._largest
+            }
+    
+    def _run(self):
+        try:
+            stop = False
+            while not stop:
+                job = self._queue.get()
+                if job is None:
+                    break
+                batch = [job]
+                stop = self._collect(batch)
+                self._commit(batch)
+        finally:
+            self.db.close()
+    
+    def _collect(self, batch):
+        """Añade al lote los trabajos que van llegando; True si se pidió cerrar"""
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.perf_counter()
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if job is None:
+                return True
+            batch.append(job)
+        return False
+    
+    def _commit(self, batch):
+        batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        try:
+            # Si la base está ocupada al confirmar, el lote se repite entero
+            outcomes = self.db.retry_policy.call('writer.batch', lambda: self._run_batch(batch))
+        except Exception as e:
+            # Falló BEGIN o COMMIT: no quedó escrito ningún trabajo del lote
+            for future, _, _, _ in batch:
+                future.set_exception(e)
+            return
+        
+        with self._lock:
+            self._batches += 1
+            self._jobs += len(batch)
+            self._largest = max(self._largest, len(batch))
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+    
+    def _run_batch(self, batch):
+        outcomes = []
+        with self.db.transaction('writer.batch'):
+            for future, func, args, kwargs in batch:
+                try:
+                    # Transacción anidada: SAVEPOINT por trabajo
+                    with self.db.transaction():
+                        result = func(*args, **kwargs)
+                except Exception as e:
+                    outcomes.append((future, False, e))
+                else:
+                    outcomes.append((future, True, result))
+        return outcomes
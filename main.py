@@ -8,6 +8,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importaciones de la aplicación
 from database.connection import DatabaseConnection
+from database.backup import BackupService
 from views.main_window import MainWindow
 
 def main():
@@ -17,8 +18,7 @@ def main():
         db.create_tables()
         
         # Verificar si hay datos en la tabla Categoria
-        query = "SELECT COUNT(*) as count FROM Categoria"
-        result = db.fetch_one(query)
+        result = db.fetch_one('categoria.count')
         
         # Si no hay categorías, cargar datos iniciales
         if result and result['count'] == 0:
@@ -30,10 +30,15 @@ def main():
         messagebox.showerror("Error de Base de Datos", f"Error al inicializar la base de datos: {str(e)}")
         return
     
+    # Copias de seguridad periódicas en segundo plano ([Backup] en settings.ini)
+    backup_service = BackupService(db)
+    backup_service.start()
+    
     # Inicializar la aplicación Tkinter
     root = tk.Tk()
     app = MainWindow(root)
     root.mainloop()
+    backup_service.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
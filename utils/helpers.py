@@ -3,12 +3,12 @@ import locale
 import os
 import csv
 from config.config_manager import config_manager
+from utils.money import to_cents, format_cents
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
@@ -22,23 +22,14 @@ except locale.Error:
         pass
 
 def format_currency(amount):
-    """Formatea un valor como moneda usando la configuración del sistema"""
+    """Formatea un importe en céntimos como moneda (S/ 1,234.56).
+    
+    Los textos se interpretan como importes ya formateados en soles.
+    """
     try:
-        # Convertir a float primero
-        if amount is None:
-            amount = 0.0
-        elif isinstance(amount, str):
-            # Limpiar string de caracteres de moneda
-            amount = amount.replace('$', '').replace('S/', '').replace(',', '').strip()
-            if not amount or amount == '':
-                amount = 0.0
-            else:
-                amount = float(amount)
-        else:
-            amount = float(amount)
-        
-        # Formatear con símbolo de soles
-        return f"S/ {amount:,.2f}"
+        if isinstance(amount, str):
+            amount = to_cents(amount)
+        return format_cents(amount)
     except (ValueError, TypeError):
         # Fallback en caso de error
         return "S/ 0.00"
@@ -73,8 +64,8 @@ def export_to_csv(data, filename, headers=None):
     return filepath
 
 def calculate_subtotal(price, quantity):
-    """Calcula el subtotal de un producto"""
-    return float(price) * int(quantity)
+    """Calcula el subtotal de un producto (precio en céntimos)"""
+    return int(price) * int(quantity)
 
 def export_to_excel(data, filename, headers=None, sheet_name="Datos"):
     """Exporta datos a un archivo Excel con formato profesional"""
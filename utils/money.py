@@ -0,0 +1,87 @@
+"""Importes monetarios como enteros en céntimos.
+
+Los precios, subtotales, impuestos y totales se guardan y se operan como
+enteros (1 sol = 100 céntimos); solo se convierten a texto al mostrarlos y
+desde texto al leer lo que escribe el usuario.
+"""
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENTIMOS = 100
+SIMBOLO = "S/"
+
+# Importe con como mucho dos decimales: se convierte sin pasar por Decimal
+_IMPORTE_SIMPLE = re.compile(r'(-?)(\d*)(?:\.(\d{0,2}))?')
+# Coma decimal: una sola coma con uno o dos dígitos detrás ("12,50"); si no, separa miles ("1,234")
+_COMA_DECIMAL = re.compile(r'-?\d*,\d{1,2}')
+
+
+def to_cents(value):
+    """Convierte un importe en soles (texto, Decimal o float) a céntimos.
+    
+    Acepta el formato que muestra la aplicación ("S/ 1,234.56") y la coma
+    como separador decimal si le siguen uno o dos dígitos ("12,50"); con
+    tres dígitos es separador de miles. Lanza ValueError si no es un importe.
+    
+    >>> to_cents("S/ 1,234.56"), to_cents("1,234"), to_cents("1,234,567")
+    (123456, 123400, 123456700)
+    >>> to_cents("12,50"), to_cents("12,5"), to_cents("-0,05")
+    (1250, 1250, -5)
+    """
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        text = value.replace(SIMBOLO, '').replace('$', '').replace(' ', '').strip()
+        if not text:
+            return 0
+        if _COMA_DECIMAL.fullmatch(text):
+            text = text.replace(',', '.')
+        else:
+            text = text.replace(',', '')
+        match = _IMPORTE_SIMPLE.fullmatch(text)
+        if match and (match.group(2) or match.group(3)):
+            sign, units, decimals = match.groups()
+            cents = int(units or 0) * CENTIMOS + int((decimals or '').ljust(2, '0'))
+            return -cents if sign else cents
+        try:
+            value = Decimal(text)
+        except InvalidOperation:
+            raise ValueError(f"Importe no válido: {value!r}")
+        if not value.is_finite():
+            raise ValueError(f"Importe no válido: {text!r}")
+    elif isinstance(value, float):
+        value = Decimal(repr(value))
+    else:
+        value = Decimal(value)
+    return int((value * CENTIMOS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Convierte céntimos a un Decimal en soles (para exportaciones)"""
+    return Decimal(int(cents or 0)) / CENTIMOS
+
+
+def _entero(cents):
+    return cents if type(cents) is int else int(round(cents or 0))
+
+
+def cents_to_str(cents):
+    """Importe sin símbolo ni separador de miles, para campos de entrada ("1234.56")"""
+    cents = _entero(cents)
+    if cents < 0:
+        return '-' + cents_to_str(-cents)
+    return f"{cents // CENTIMOS}.{cents % CENTIMOS:02d}"
+
+
+def format_cents(cents):
+    """Formatea céntimos como moneda ("S/ 1,234.56") sin pasar por float"""
+    cents = _entero(cents)
+    if cents < 0:
+        return f"{SIMBOLO} -{format_cents(-cents)[len(SIMBOLO) + 1:]}"
+    return f"{SIMBOLO} {cents // CENTIMOS:,}.{cents % CENTIMOS:02d}"
+
+
+def apply_percentage(cents, percentage):
+    """Porcentaje de un importe en céntimos, redondeado al céntimo (mitad hacia arriba)"""
+    factor = Decimal(str(percentage)) / 100
+    return int((Decimal(int(cents or 0)) * factor).quantize(Decimal(1), rounding=ROUND_HALF_UP))
@@ -3,6 +3,8 @@ from tkinter import messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from config.config_manager import config_manager
+from database.connection import DatabaseConnection
+from database.profiles import PERFORMANCE_PROFILES, PROFILE_DESCRIPTIONS, PRAGMA_NAMES, get_profile
 
 class ConfigView:
     def __init__(self, parent):
@@ -16,6 +18,9 @@ class ConfigView:
         self.var_theme = tk.StringVar()
         self.var_stock_alert = tk.StringVar()
         self.var_encoding = tk.StringVar()
+        self.var_db_profile = tk.StringVar()
+        self.var_db_profile_desc = tk.StringVar()
+        self.vars_pragmas = {pragma: tk.StringVar() for pragma in PRAGMA_NAMES}
         
         # Crear la interfaz
         self.create_widgets()
@@ -57,6 +62,11 @@ class ConfigView:
         notebook.add(reports_frame, text="Reportes")
         self.create_reports_tab(reports_frame)
         
+        # Pestaña de Base de Datos
+        database_frame = ttk.Frame(notebook)
+        notebook.add(database_frame, text="Base de Datos")
+        self.create_database_tab(database_frame)
+        
         # Botones de acción
         btn_frame = ttk.Frame(main_frame)
         btn_frame.pack(fill=tk.X, pady=(20, 0))
@@ -134,6 +144,45 @@ class ConfigView:
                               font=("Helvetica", 9), foreground="gray")
         info_label.grid(row=1, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
     
+    def create_database_tab(self, parent):
+        """Crea la pestaña de configuración de rendimiento de la base de datos"""
+        frame = ttk.LabelFrame(parent, text="Perfil de Rendimiento de SQLite", padding=20)
+        frame.pack(fill=tk.X, padx=20, pady=20)
+        
+        # Perfil
+        ttk.Label(frame, text="Perfil:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        profile_combo = ttk.Combobox(frame, textvariable=self.var_db_profile, 
+                                    values=list(PERFORMANCE_PROFILES.keys()), 
+                                    width=15, state="readonly")
+        profile_combo.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        profile_combo.bind("<<ComboboxSelected>>", self.on_profile_selected)
+        
+        desc_label = ttk.Label(frame, textvariable=self.var_db_profile_desc, 
+                              font=("Helvetica", 9), foreground="gray")
+        desc_label.grid(row=1, column=0, columnspan=3, sticky=tk.W, padx=5, pady=5)
+        
+        # Valores de los PRAGMA
+        pragmas_frame = ttk.LabelFrame(parent, text="PRAGMA (perfil seleccionado / valor actual)", padding=20)
+        pragmas_frame.pack(fill=tk.X, padx=20, pady=(0, 20))
+        
+        for row, pragma in enumerate(PRAGMA_NAMES):
+            ttk.Label(pragmas_frame, text=f"{pragma}:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+            ttk.Label(pragmas_frame, textvariable=self.vars_pragmas[pragma]).grid(row=row, column=1, sticky=tk.W, padx=5, pady=2)
+    
+    def on_profile_selected(self, event=None):
+        """Actualiza la descripción y los valores del perfil seleccionado"""
+        profile_name = self.var_db_profile.get()
+        profile = get_profile(profile_name)
+        self.var_db_profile_desc.set(PROFILE_DESCRIPTIONS.get(profile_name, ""))
+        
+        try:
+            current = DatabaseConnection().current_pragmas()
+        except Exception:
+            current = {}
+        
+        for pragma in PRAGMA_NAMES:
+            self.vars_pragmas[pragma].set(f"{profile[pragma]} / {current.get(pragma, 'N/A')}")
+    
     def set_currency(self, symbol, name, code, decimal_places):
         """Establece una moneda predefinida"""
         self.var_currency_symbol.set(symbol)
@@ -158,6 +207,10 @@ class ConfigView:
         
         # Configuración de reportes
         self.var_encoding.set(config_manager.get_report_encoding())
+        
+        # Configuración de base de datos
+        self.var_db_profile.set(config_manager.get_database_config()['profile'])
+        self.on_profile_selected()
     
     def reset_to_defaults(self):
         """Restaura los valores por defecto"""
@@ -165,6 +218,8 @@ class ConfigView:
         self.var_theme.set("cosmo")
         self.var_stock_alert.set("10")
         self.var_encoding.set("utf-8-sig")
+        self.var_db_profile.set("balanced")
+        self.on_profile_selected()
     
     def save_config(self):
         """Guarda la configuración"""
@@ -211,6 +266,13 @@ class ConfigView:
             # Guardar configuración de reportes
             config_manager.set('Reports', 'Encoding', self.var_encoding.get())
             
+            # Guardar y aplicar el perfil de base de datos
+            profile = self.var_db_profile.get()
+            if profile != config_manager.get_database_config()['profile']:
+                config_manager.set_database_profile(profile)
+                DatabaseConnection().set_profile(profile)
+                self.on_profile_selected()
+            
             messagebox.showinfo("Éxito", "Configuración guardada correctamente.\n\nReinicie la aplicación para aplicar todos los cambios.")
             
         except Exception as e:
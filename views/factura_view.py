@@ -5,8 +5,12 @@ from controllers.cliente_controller import ClienteController
 from controllers.empleado_controller import EmpleadoController
 from controllers.venta_controller import VentaController
 from controllers.producto_controller import ProductoController
+from database import identity
+from database.models import ConflictError
+from database.busy import DatabaseBusyError
 from utils.validators import validate_required, validate_number, validate_integer
 from utils.helpers import format_currency
+from utils.money import to_cents, apply_percentage
 import datetime
 
 class FacturaView:
@@ -21,6 +25,10 @@ class FacturaView:
         # Variables para manejo de productos
         self.productos_factura = []
         self.factura_actual_id = None
+        self.version_factura = None
+        # Mapa de identidad de la factura en edición: productos y factura se leen
+        # una vez por edición aunque se consulten en varios eventos del formulario
+        self.sesion = identity.IdentityMap()
         
         self.setup_ui()
         self.cargar_datos()
@@ -62,6 +70,14 @@ class FacturaView:
         self.estado_filter.grid(row=0, column=1, padx=5, pady=5)
         self.estado_filter.bind('<<ComboboxSelected>>', self.filtrar_facturas)
         
+        # Búsqueda en observaciones
+        ttk.Label(filter_frame, text="Observaciones:").grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
+        self.observaciones_search = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.observaciones_search, width=30)
+        search_entry.grid(row=2, column=1, padx=5, pady=5)
+        search_entry.bind('<Return>', lambda e: self.buscar_facturas())
+        ttk.Button(filter_frame, text="Buscar", command=self.buscar_facturas).grid(row=2, column=2, padx=20, pady=5, sticky=tk.W)
+        
         # Botones de acción
         button_frame = ttk.Frame(filter_frame)
         button_frame.grid(row=0, column=2, padx=20, pady=5)
@@ -277,8 +293,8 @@ class FacturaView:
                         self.productos_tree.insert('', tk.END, values=(
                             detalle['producto'],
                             detalle['cantidad'],
-                            format_currency(float(detalle['precio_uni'])),
-                            format_currency(float(detalle['subtotal']))
+                            format_currency(detalle['precio_uni']),
+                            format_currency(detalle['subtotal'])
                         ))
                     
                     # Actualizar totales automáticamente
@@ -293,12 +309,8 @@ class FacturaView:
     def calcular_totales(self):
         """Calcula automáticamente impuesto y total basado en el subtotal actual"""
         try:
-            # Obtener subtotal (limpiar cualquier formato previo)
-            subtotal_str = str(self.subtotal_var.get()).replace('S/', '').replace('$', '').replace(',', '').strip()
-            if not subtotal_str or subtotal_str == '':
-                subtotal = 0.0
-            else:
-                subtotal = float(subtotal_str)
+            # Obtener subtotal en céntimos desde el texto formateado
+            subtotal = to_cents(str(self.subtotal_var.get()))
             
             # Calcular impuesto
             try:
@@ -306,7 +318,7 @@ class FacturaView:
             except (ValueError, TypeError):
                 porcentaje = 18.0  # Valor por defecto
                 
-            impuesto = subtotal * (porcentaje / 100)
+            impuesto = apply_percentage(subtotal, porcentaje)
             
             # Calcular total
             total = subtotal + impuesto
@@ -414,13 +426,14 @@ class FacturaView:
                 return
             
             # Obtener producto completo
-            producto = self.producto_controller.obtener_producto(producto_id)
+            with identity.session(self.sesion):
+                producto = self.producto_controller.obtener_producto(producto_id)
             if not producto:
                 messagebox.showerror("Error", "Producto no encontrado")
                 return
             
             # Calcular subtotal
-            precio_unitario = float(producto.precio)
+            precio_unitario = producto.precio
             subtotal = cantidad * precio_unitario
             
             # Verificar si el producto ya está en la lista
@@ -473,13 +486,12 @@ class FacturaView:
     
     def actualizar_subtotal_automatico(self):
         """Calcula automáticamente el subtotal basado en los productos agregados"""
-        total_subtotal = 0.0
+        total_subtotal = 0
         
-        # Sumar todos los subtotales de productos
+        # Sumar todos los subtotales de productos (en céntimos)
         for item in self.productos_tree.get_children():
             values = self.productos_tree.item(item, 'values')
-            subtotal_str = values[3].replace('S/', '').replace('$', '').replace(',', '')
-            total_subtotal += float(subtotal_str)
+            total_subtotal += to_cents(values[3])
         
         # Actualizar el subtotal y recalcular totales
         self.subtotal_var.set(format_currency(total_subtotal))
@@ -492,18 +504,19 @@ class FacturaView:
             for item in self.productos_tree.get_children():
                 self.productos_tree.delete(item)
             
-            # Obtener detalles de la factura
-            detalles = self.factura_controller.obtener_detalles_factura(factura_id)
+            # Obtener detalles de la factura con sus productos en una sola consulta;
+            # los productos quedan en la sesión para agregar_producto
+            with identity.session(self.sesion):
+                detalles = self.factura_controller.obtener_detalles_factura(factura_id, include=['producto'])
             
             for detalle in detalles:
-                # Obtener información del producto
-                producto = self.producto_controller.obtener_producto(detalle.id_producto)
+                producto = detalle.producto
                 if producto:
                     self.productos_tree.insert('', tk.END, values=(
                         producto.nombre,
                         detalle.cantidad,
-                        format_currency(float(detalle.precio_unitario)),
-                        format_currency(float(detalle.subtotal))
+                        format_currency(detalle.precio_unitario),
+                        format_currency(detalle.subtotal)
                     ))
         
         except Exception as e:
@@ -534,6 +547,30 @@ class FacturaView:
                 factura['estado']
             ))
     
+    def buscar_facturas(self):
+        """Busca facturas por el texto de sus observaciones"""
+        termino = self.observaciones_search.get().strip()
+        if not termino:
+            self.filtrar_facturas()
+            return
+        
+        # Limpiar treeview
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        
+        # Nombres de cliente desde el combo ("id - nombre")
+        clientes = dict(value.split(' - ', 1) for value in self.cliente_combo['values'])
+        
+        for factura in self.factura_controller.buscar_facturas(termino):
+            self.tree.insert('', tk.END, values=(
+                factura.id,
+                factura.numero_factura,
+                factura.fecha,
+                clientes.get(str(factura.id_cliente), 'N/A'),
+                format_currency(factura.total),
+                factura.estado
+            ))
+    
     def nueva_factura(self):
         """Prepara el formulario para una nueva factura"""
         self.limpiar_formulario()
@@ -550,8 +587,10 @@ class FacturaView:
         item = self.tree.item(selection[0])
         factura_id = item['values'][0]
         
-        # Obtener la factura
-        factura = self.factura_controller.obtener_factura(factura_id)
+        # Obtener la factura en una sesión nueva para esta edición
+        self.sesion = identity.IdentityMap()
+        with identity.session(self.sesion):
+            factura = self.factura_controller.obtener_factura(factura_id)
         if not factura:
             messagebox.showerror("Error", "No se pudo cargar la factura")
             return
@@ -559,12 +598,14 @@ class FacturaView:
         # Cargar datos en el formulario
         self.factura_id.set(str(factura.id))
         self.factura_actual_id = factura.id
+        # Al guardar se comprueba que nadie la haya modificado desde ahora
+        self.version_factura = factura.version
         self.numero_factura.set(factura.numero_factura)
         self.fecha_factura.set(factura.fecha)
         # Cargar valores numéricos con formato de moneda
-        self.subtotal_var.set(format_currency(float(factura.subtotal) if factura.subtotal else 0.0))
-        self.impuesto_var.set(format_currency(float(factura.impuesto) if factura.impuesto else 0.0))
-        self.total_var.set(format_currency(float(factura.total) if factura.total else 0.0))
+        self.subtotal_var.set(format_currency(factura.subtotal or 0))
+        self.impuesto_var.set(format_currency(factura.impuesto or 0))
+        self.total_var.set(format_currency(factura.total or 0))
         self.estado_var.set(factura.estado)
         self.observaciones_var.set(factura.observaciones or '')
         
@@ -620,10 +661,9 @@ class FacturaView:
             
             # Verificar que hay productos o subtotal
             productos_count = len(self.productos_tree.get_children())
-            subtotal_str = str(self.subtotal_var.get()).replace('S/', '').replace('$', '').replace(',', '').strip()
-            subtotal_value = float(subtotal_str) if subtotal_str and subtotal_str != '' else 0.0
+            subtotal_value = to_cents(str(self.subtotal_var.get()))
             
-            if productos_count == 0 and subtotal_value == 0.0:
+            if productos_count == 0 and subtotal_value == 0:
                 messagebox.showerror("Error", "Debe agregar productos o seleccionar una venta")
                 return
             
@@ -643,13 +683,10 @@ class FacturaView:
             if self.venta_var.get():
                 id_venta = int(self.venta_var.get().split(' - ')[0])
             
-            # Extraer valores numéricos
-            impuesto_text = str(self.impuesto_var.get()).replace('S/', '').replace('$', '').replace(',', '').strip()
-            total_text = str(self.total_var.get()).replace('S/', '').replace('$', '').replace(',', '').strip()
-            
+            # Extraer importes en céntimos
             subtotal = subtotal_value
-            impuesto = float(impuesto_text) if impuesto_text else 0.0
-            total = float(total_text) if total_text else 0.0
+            impuesto = to_cents(str(self.impuesto_var.get()))
+            total = to_cents(str(self.total_var.get()))
             
             # Preparar lista de productos
             productos_lista = []
@@ -665,8 +702,7 @@ class FacturaView:
                 
                 if producto_id:
                     cantidad = int(values[1])
-                    precio_str = values[2].replace('S/', '').replace('$', '').replace(',', '').strip()
-                    precio_unitario = float(precio_str)
+                    precio_unitario = to_cents(values[2])
                     productos_lista.append({
                         'id_producto': producto_id,
                         'cantidad': cantidad,
@@ -676,55 +712,49 @@ class FacturaView:
             # Determinar si es nueva o edición
             if self.factura_id.get():
                 # Editar factura existente
-                result = self.factura_controller.actualizar_factura(
+                datos = dict(
                     id_factura=int(self.factura_id.get()),
                     numero_factura=self.numero_factura.get(),
-                    subtotal=subtotal,
-                    impuesto=impuesto,
-                    total=total,
                     estado=self.estado_var.get(),
                     observaciones=self.observaciones_var.get(),
                     id_venta=id_venta,
                     id_cliente=id_cliente,
-                    id_empleado=id_empleado
+                    id_empleado=id_empleado,
+                    version=self.version_factura
                 )
-                
-                # Actualizar productos si hay
-                if productos_lista and result:
-                    factura_id = int(self.factura_id.get())
-                    # Eliminar productos existentes
-                    try:
-                        detalles_existentes = self.factura_controller.obtener_detalles_factura(factura_id)
-                        for detalle in detalles_existentes:
-                            self.factura_controller.eliminar_producto_factura(factura_id, detalle.id)
-                    except:
-                        pass  # Si no hay detalles existentes, continuar
-                    
-                    # Agregar nuevos productos
-                    for producto in productos_lista:
-                        self.factura_controller.agregar_producto_factura(
-                            factura_id, producto['id_producto'], 
-                            producto['cantidad'], producto['precio_unitario']
+                with identity.session(self.sesion):
+                    if productos_lista:
+                        # Cabecera y productos en una transacción: un conflicto no deja la edición a medias
+                        result = self.factura_controller.actualizar_factura_con_productos(
+                            productos_data=productos_lista,
+                            impuesto_porcentaje=self.impuesto_porcentaje.get(),
+                            **datos
+                        )
+                    else:
+                        result = self.factura_controller.actualizar_factura(
+                            subtotal=subtotal, impuesto=impuesto, total=total, **datos
                         )
                 
                 mensaje = "Factura actualizada correctamente"
             else:
-                # Crear nueva factura
+                # Crear nueva factura; el número mostrado es solo una vista previa,
+                # el definitivo se asigna en la transacción del INSERT
                 if productos_lista:
-                    # Crear factura con productos
-                    result = self.factura_controller.crear_factura_con_productos(
-                        numero_factura=self.numero_factura.get(),
-                        productos_data=productos_lista,
-                        impuesto_porcentaje=self.impuesto_porcentaje.get(),
-                        estado=self.estado_var.get(),
-                        observaciones=self.observaciones_var.get(),
-                        id_cliente=id_cliente,
-                        id_empleado=id_empleado
-                    )
+                    # Crear factura con productos (ya leídos en esta sesión)
+                    with identity.session(self.sesion):
+                        result = self.factura_controller.crear_factura_con_productos(
+                            numero_factura=None,
+                            productos_data=productos_lista,
+                            impuesto_porcentaje=self.impuesto_porcentaje.get(),
+                            estado=self.estado_var.get(),
+                            observaciones=self.observaciones_var.get(),
+                            id_cliente=id_cliente,
+                            id_empleado=id_empleado
+                        )
                 else:
                     # Crear factura tradicional
                     result = self.factura_controller.crear_factura(
-                        numero_factura=self.numero_factura.get(),
+                        numero_factura=None,
                         subtotal=subtotal,
                         impuesto=impuesto,
                         total=total,
@@ -735,6 +765,9 @@ class FacturaView:
                         id_empleado=id_empleado
                     )
                 mensaje = "Factura creada correctamente"
+                if result:
+                    factura = self.factura_controller.obtener_factura(result)
+                    mensaje = f"Factura {factura.numero_factura} creada correctamente"
             
             if result:
                 messagebox.showinfo("Éxito", mensaje)
@@ -744,6 +777,16 @@ class FacturaView:
             else:
                 messagebox.showerror("Error", "No se pudo guardar la factura")
         
+        except ConflictError:
+            messagebox.showwarning("Factura modificada",
+                                   "Otro usuario modificó esta factura mientras la editaba.\n"
+                                   "No se guardaron los cambios: vuelva a abrirla para editarla.")
+            self.limpiar_formulario()
+            self.cargar_facturas()
+        except DatabaseBusyError:
+            messagebox.showwarning("Base de datos ocupada",
+                                   "Otra terminal está usando la base de datos y la factura no se guardó.\n"
+                                   "Vuelva a guardar en unos segundos.")
         except ValueError as e:
             messagebox.showerror("Error", f"Error en los datos numéricos: {str(e)}")
         except Exception as e:
@@ -759,7 +802,9 @@ class FacturaView:
         self.factura_actual = None
         self.venta_seleccionada = None
         self.factura_actual_id = None
+        self.version_factura = None
         self.productos_factura = []
+        self.sesion = identity.IdentityMap()
         self.factura_id.set('')
         self.numero_factura.set('')
         self.fecha_factura.set(datetime.date.today().isoformat())
@@ -7,6 +7,8 @@ from controllers.factura_controller import FacturaController
 from controllers.cliente_controller import ClienteController
 from controllers.empleado_controller import EmpleadoController
 from database.models import DetalleVenta
+from utils.helpers import format_currency
+from utils.money import apply_percentage
 import datetime
 
 class GenerarFacturaView:
@@ -140,20 +142,7 @@ class GenerarFacturaView:
         
         # Obtener ventas con información completa
         try:
-            query = """
-            SELECT v.idVenta, v.Fecha, v.Total, v.idCliente, v.idEmpleado,
-                   c.NombreCli, e.NombreEmp,
-                   CASE WHEN f.idFactura IS NOT NULL THEN 'Sí' ELSE 'No' END as Facturada
-            FROM Venta v
-            LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-            LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-            LEFT JOIN Factura f ON v.idVenta = f.idVenta
-            ORDER BY v.Fecha DESC
-            """
-            
-            from database.connection import DatabaseConnection
-            db = DatabaseConnection()
-            ventas = db.fetch_all(query)
+            ventas = self.venta_controller.listar_ventas_facturacion()
             
             for venta in ventas:
                 self.ventas_tree.insert('', 'end', values=(
@@ -161,7 +150,7 @@ class GenerarFacturaView:
                     venta['Fecha'],
                     venta['NombreCli'] or 'Sin cliente',
                     venta['NombreEmp'] or 'Sin empleado',
-                    f"${venta['Total']:.2f}",
+                    format_currency(venta['Total']),
                     venta['Facturada']
                 ))
         except Exception as e:
@@ -174,41 +163,17 @@ class GenerarFacturaView:
             self.ventas_tree.delete(item)
         
         try:
-            conditions = []
-            params = []
-            
             # Filtro por cliente
+            id_cliente = None
             if self.cliente_var.get() and self.cliente_var.get() != "Todos":
-                cliente_id = self.cliente_var.get().split(" - ")[0]
-                conditions.append("v.idCliente = ?")
-                params.append(cliente_id)
+                id_cliente = self.cliente_var.get().split(" - ")[0]
             
             # Filtro por fecha
-            if self.fecha_desde.entry.get():
-                conditions.append("v.Fecha >= ?")
-                params.append(self.fecha_desde.entry.get())
-            
-            if self.fecha_hasta.entry.get():
-                conditions.append("v.Fecha <= ?")
-                params.append(self.fecha_hasta.entry.get())
-            
-            where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
-            
-            query = f"""
-            SELECT v.idVenta, v.Fecha, v.Total, v.idCliente, v.idEmpleado,
-                   c.NombreCli, e.NombreEmp,
-                   CASE WHEN f.idFactura IS NOT NULL THEN 'Sí' ELSE 'No' END as Facturada
-            FROM Venta v
-            LEFT JOIN Cliente c ON v.idCliente = c.idCliente
-            LEFT JOIN Empleado e ON v.idEmpleado = e.idEmpleado
-            LEFT JOIN Factura f ON v.idVenta = f.idVenta
-            {where_clause}
-            ORDER BY v.Fecha DESC
-            """
-            
-            from database.connection import DatabaseConnection
-            db = DatabaseConnection()
-            ventas = db.fetch_all(query, tuple(params))
+            ventas = self.venta_controller.listar_ventas_facturacion(
+                id_cliente=id_cliente,
+                desde=self.fecha_desde.entry.get() or None,
+                hasta=self.fecha_hasta.entry.get() or None
+            )
             
             for venta in ventas:
                 self.ventas_tree.insert('', 'end', values=(
@@ -216,7 +181,7 @@ class GenerarFacturaView:
                     venta['Fecha'],
                     venta['NombreCli'] or 'Sin cliente',
                     venta['NombreEmp'] or 'Sin empleado',
-                    f"${venta['Total']:.2f}",
+                    format_currency(venta['Total']),
                     venta['Facturada']
                 ))
         except Exception as e:
@@ -249,16 +214,16 @@ class GenerarFacturaView:
             
             # Calcular valores (con validación robusta)
             try:
-                subtotal = float(venta.total) if venta.total else 0.0
+                subtotal = int(venta.total) if venta.total else 0
             except (ValueError, TypeError):
-                subtotal = 0.0
+                subtotal = 0
                 
             try:
                 impuesto_porcentaje = float(self.impuesto_var.get())
             except (ValueError, TypeError):
                 impuesto_porcentaje = 18.0  # Valor por defecto
                 
-            impuesto = subtotal * (impuesto_porcentaje / 100)
+            impuesto = apply_percentage(subtotal, impuesto_porcentaje)
             total = subtotal + impuesto
             
             # Obtener observaciones
@@ -266,11 +231,9 @@ class GenerarFacturaView:
             if not observaciones:
                 observaciones = None
             
-            # Crear la factura
-            numero_factura = self.factura_controller.generar_numero_factura()
-            
+            # Crear la factura (el número se asigna al guardarla)
             factura_id = self.factura_controller.crear_factura(
-                numero_factura=numero_factura,
+                numero_factura=None,
                 subtotal=subtotal,
                 impuesto=impuesto,
                 total=total,
@@ -282,11 +245,12 @@ class GenerarFacturaView:
             )
             
             if factura_id:
+                numero_factura = self.factura_controller.obtener_factura(factura_id).numero_factura
                 messagebox.showinfo("Éxito", 
                                    f"Factura {numero_factura} generada exitosamente.\n"
-                                   f"Subtotal: ${subtotal:.2f}\n"
-                                   f"Impuesto ({impuesto_porcentaje}%): ${impuesto:.2f}\n"
-                                   f"Total: ${total:.2f}")
+                                   f"Subtotal: {format_currency(subtotal)}\n"
+                                   f"Impuesto ({impuesto_porcentaje}%): {format_currency(impuesto)}\n"
+                                   f"Total: {format_currency(total)}")
                 
                 # Actualizar la lista
                 self.cargar_ventas()
@@ -312,7 +276,7 @@ class GenerarFacturaView:
         
         try:
             # Obtener detalles de la venta
-            detalles = DetalleVenta.get_by_venta(venta_id)
+            detalles = DetalleVenta.get_by_venta(venta_id, include=['producto'])
             
             if not detalles:
                 messagebox.showinfo("Información", "Esta venta no tiene detalles registrados.")
@@ -336,23 +300,21 @@ class GenerarFacturaView:
             # Cargar detalles
             total_venta = 0
             for detalle in detalles:
-                # Obtener nombre del producto
-                from database.models import Producto
-                producto = Producto.get_by_id(detalle.id_producto)
+                producto = detalle.producto
                 nombre_producto = producto.nombre if producto else f"Producto #{detalle.id_producto}"
                 
                 detalle_tree.insert('', 'end', values=(
                     nombre_producto,
                     detalle.cantidad,
-                    f"${detalle.precio:.2f}",
-                    f"${detalle.subtotal:.2f}"
+                    format_currency(detalle.precio),
+                    format_currency(detalle.subtotal)
                 ))
                 total_venta += detalle.subtotal
             
             detalle_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
             
             # Mostrar total
-            total_label = ttk.Label(detalle_window, text=f"Total de la Venta: ${total_venta:.2f}", 
+            total_label = ttk.Label(detalle_window, text=f"Total de la Venta: {format_currency(total_venta)}", 
                                    font=("Helvetica", 12, "bold"))
             total_label.pack(pady=10)
             
@@ -67,6 +67,7 @@ class MainWindow:
         # Menú Reportes
         reportes_menu = tk.Menu(self.menu, tearoff=0)
         reportes_menu.add_command(label="Reportes de Ventas", command=self.show_reporte_ventas)
+        reportes_menu.add_command(label="Ventas por Día", command=self.show_reporte_diario)
         reportes_menu.add_command(label="Productos más Vendidos", command=self.show_reporte_productos)
         reportes_menu.add_command(label="Clientes Frecuentes", command=self.show_reporte_clientes)
         reportes_menu.add_command(label="Stock Bajo", command=self.show_reporte_stock)
@@ -241,6 +242,10 @@ class MainWindow:
         self.clear_content_frame()
         self.reporte_view = ReporteView(self.content_frame, 'ventas')
     
+    def show_reporte_diario(self):
+        self.clear_content_frame()
+        self.reporte_view = ReporteView(self.content_frame, 'diario')
+    
     def show_reporte_productos(self):
         self.clear_content_frame()
         self.reporte_view = ReporteView(self.content_frame, 'productos')
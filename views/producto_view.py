@@ -5,8 +5,10 @@ from ttkbootstrap.constants import *
 
 from controllers.producto_controller import ProductoController
 from controllers.categoria_controller import CategoriaController
+from database.models import ConflictError
 from utils.validators import validate_required, validate_number, validate_integer
 from utils.helpers import format_currency
+from utils.money import to_cents, cents_to_str
 
 class ProductoView:
     def __init__(self, parent):
@@ -22,6 +24,9 @@ class ProductoView:
         self.var_categoria = tk.StringVar()
         self.var_search = tk.StringVar()
         
+        # Versión de cada producto listado, para no sobrescribir cambios de otra terminal
+        self.versiones = {}
+        
         # Crear la interfaz
         self.create_widgets()
         
@@ -122,6 +127,7 @@ class ProductoView:
         productos = self.controller.get_all_productos()
         
         # Insertar en la tabla
+        self.versiones = {producto.id: producto.version for producto in productos}
         for producto in productos:
             categoria_nombre = self.controller.get_categoria_nombre(producto.id_categoria)
             self.tree.insert("", tk.END, values=(
@@ -147,6 +153,7 @@ class ProductoView:
         productos = self.controller.search_productos(search_term)
         
         # Insertar en la tabla
+        self.versiones = {producto.id: producto.version for producto in productos}
         for producto in productos:
             categoria_nombre = self.controller.get_categoria_nombre(producto.id_categoria)
             self.tree.insert("", tk.END, values=(
@@ -167,6 +174,7 @@ class ProductoView:
         productos = self.controller.get_productos_stock_bajo()
         
         # Insertar en la tabla
+        self.versiones = {producto.id: producto.version for producto in productos}
         for producto in productos:
             categoria_nombre = self.controller.get_categoria_nombre(producto.id_categoria)
             self.tree.insert("", tk.END, values=(
@@ -191,11 +199,8 @@ class ProductoView:
             self.var_id.set(values[0])
             self.var_nombre.set(values[1])
             
-            # Formatear precio (quitar símbolo de moneda)
-            precio_str = values[2]
-            if isinstance(precio_str, str):
-                precio_str = precio_str.replace("S/", "").replace("$", "").strip()
-            self.var_precio.set(precio_str)
+            # Formatear precio (sin símbolo de moneda ni separador de miles)
+            self.var_precio.set(cents_to_str(to_cents(str(values[2]))))
             
             self.var_stock.set(values[3])
             
@@ -248,9 +253,18 @@ class ProductoView:
         id_producto = self.var_id.get()
         if id_producto:
             # Actualizar
-            result = self.controller.update_producto(
-                int(id_producto), nombre, float(precio), int(stock), id_categoria
-            )
+            try:
+                result = self.controller.update_producto(
+                    int(id_producto), nombre, to_cents(precio), int(stock), id_categoria,
+                    version=self.versiones.get(int(id_producto))
+                )
+            except ConflictError:
+                messagebox.showwarning("Producto modificado",
+                                       "Otro usuario modificó este producto mientras lo editaba.\n"
+                                       "Se recargaron los datos: revise los cambios y vuelva a guardar.")
+                self.load_productos()
+                self.new_producto()
+                return
             if result:
                 messagebox.showinfo("Éxito", "Producto actualizado correctamente")
             else:
@@ -258,7 +272,7 @@ class ProductoView:
         else:
             # Crear nuevo
             result = self.controller.create_producto(
-                nombre, float(precio), int(stock), id_categoria
+                nombre, to_cents(precio), int(stock), id_categoria
             )
             if result:
                 messagebox.showinfo("Éxito", "Producto creado correctamente")
@@ -36,7 +36,7 @@ class ReporteView:
         filter_frame.pack(fill=tk.X, pady=(0, 10))
         
         # Configurar filtros según el tipo de reporte
-        if self.tipo_reporte in ['ventas', 'productos']:
+        if self.tipo_reporte in ['ventas', 'productos', 'diario']:
             # Filtro de fechas
             ttk.Label(filter_frame, text="Fecha Inicio:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
             ttk.Entry(filter_frame, textvariable=self.var_fecha_inicio, width=15).grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
@@ -69,6 +69,10 @@ class ReporteView:
             columns = ("id", "nombre", "categoria", "cantidad", "total")
             headings = {"id": "ID", "nombre": "Producto", "categoria": "Categoría", "cantidad": "Cantidad Vendida", "total": "Total Vendido"}
             widths = {"id": 50, "nombre": 200, "categoria": 150, "cantidad": 100, "total": 100}
+        elif self.tipo_reporte == 'diario':
+            columns = ("fecha", "unidades", "ingresos")
+            headings = {"fecha": "Fecha", "unidades": "Unidades", "ingresos": "Ingresos"}
+            widths = {"fecha": 100, "unidades": 100, "ingresos": 120}
         elif self.tipo_reporte == 'clientes':
             columns = ("id", "nombre", "dni", "telefono", "compras", "total")
             headings = {"id": "ID", "nombre": "Cliente", "dni": "DNI", "telefono": "Teléfono", "compras": "Total Compras", "total": "Total Gastado"}
@@ -128,6 +132,18 @@ class ReporteView:
                         format_currency(producto['total_vendido'])
                     ))
             
+            elif self.tipo_reporte == 'diario':
+                fecha_inicio = self.var_fecha_inicio.get()
+                fecha_fin = self.var_fecha_fin.get()
+                dias = self.controller.generar_reporte_ventas_diarias(fecha_inicio, fecha_fin)
+                
+                for dia in dias:
+                    self.tree.insert("", tk.END, values=(
+                        dia['fecha'],
+                        dia['unidades'],
+                        format_currency(dia['ingresos'])
+                    ))
+            
             elif self.tipo_reporte == 'clientes':
                 limite = int(self.var_limite.get())
                 clientes = self.controller.generar_reporte_clientes_frecuentes(limite)
@@ -172,6 +188,11 @@ class ReporteView:
                 limite = int(self.var_limite.get())
                 filepath = self.controller.exportar_reporte_productos(fecha_inicio, fecha_fin, limite)
             
+            elif self.tipo_reporte == 'diario':
+                fecha_inicio = self.var_fecha_inicio.get()
+                fecha_fin = self.var_fecha_fin.get()
+                filepath = self.controller.exportar_reporte_ventas_diarias(fecha_inicio, fecha_fin)
+            
             elif self.tipo_reporte == 'clientes':
                 limite = int(self.var_limite.get())
                 filepath = self.controller.exportar_reporte_clientes(limite)
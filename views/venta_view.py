@@ -1,3 +1,6 @@
+import asyncio
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttk
@@ -8,8 +11,14 @@ from controllers.venta_controller import VentaController
 from controllers.producto_controller import ProductoController
 from controllers.cliente_controller import ClienteController
 from controllers.empleado_controller import EmpleadoController
+from database import aio
+from database.busy import DatabaseBusyError
 from utils.validators import validate_required, validate_integer
 from utils.helpers import format_currency, format_date, calculate_subtotal
+from utils.money import to_cents, cents_to_str
+
+# Cada cuántos milisegundos se comprueba si llegaron los datos de los combobox
+COMBOS_POLL_MS = 50
 
 class VentaView:
     def __init__(self, parent, modo='nueva'):
@@ -35,6 +44,11 @@ class VentaView:
         # Lista de detalles de la venta
         self.detalles = []
         
+        # Opciones de los combobox, vacías hasta que termine load_combos
+        self.clientes_data = {}
+        self.empleados_data = {}
+        self.productos_data = {}
+        
         # Crear la interfaz
         self.create_widgets()
         
@@ -138,19 +152,45 @@ class VentaView:
         ttk.Button(btn_frame, text="Registrar Venta", command=self.registrar_venta, bootstyle=SUCCESS).pack(side=tk.RIGHT, padx=5)
     
     def load_combos(self):
-        """Carga los datos en los combobox"""
+        """Carga los datos en los combobox sin bloquear la interfaz"""
+        # Las consultas van en un hilo aparte que solo deja el resultado en la cola;
+        # los widgets se tocan únicamente desde el hilo de Tk, al recogerlo
+        resultado = queue.Queue()
+        threading.Thread(target=self._leer_combos_en_hilo, args=(resultado,),
+                         name='venta-combos', daemon=True).start()
+        self.parent.after(COMBOS_POLL_MS, self._recoger_combos, resultado)
+    
+    def _leer_combos_en_hilo(self, resultado):
+        try:
+            resultado.put((True, asyncio.run(self.leer_combos())))
+        except Exception as e:
+            resultado.put((False, e))
+    
+    def _recoger_combos(self, resultado):
+        # La vista pudo cerrarse mientras se cargaban los datos
+        if not self.combo_productos.winfo_exists():
+            return
+        try:
+            ok, valor = resultado.get_nowait()
+        except queue.Empty:
+            self.parent.after(COMBOS_POLL_MS, self._recoger_combos, resultado)
+            return
+        if ok:
+            self.mostrar_combos(*valor)
+        else:
+            messagebox.showerror("Error", f"No se pudieron cargar los datos: {valor}")
+    
+    def mostrar_combos(self, clientes, empleados, productos):
+        """Rellena los combobox con lo leído en load_combos"""
         # Cargar clientes
-        clientes = self.cliente_controller.get_all_clientes()
         self.clientes_data = {f"{c.id}: {c.nombre}": c.id for c in clientes}
         self.combo_clientes['values'] = list(self.clientes_data.keys())
         
         # Cargar empleados
-        empleados = self.empleado_controller.get_all_empleados()
         self.empleados_data = {f"{e.id}: {e.nombre}": e.id for e in empleados}
         self.combo_empleados['values'] = list(self.empleados_data.keys())
         
         # Cargar productos
-        productos = self.producto_controller.get_all_productos()
         self.productos_data = {f"{p.id}: {p.nombre} - {format_currency(p.precio)}": {
             'id': p.id,
             'nombre': p.nombre,
@@ -159,27 +199,28 @@ class VentaView:
         } for p in productos}
         self.combo_productos['values'] = list(self.productos_data.keys())
     
+    async def leer_combos(self):
+        """Clientes, empleados y productos, consultados en paralelo en el executor de la base de datos"""
+        return await asyncio.gather(
+            aio.wrap(self.cliente_controller).get_all_clientes(),
+            aio.wrap(self.empleado_controller).get_all_empleados(),
+            aio.wrap(self.producto_controller).get_all_productos()
+        )
+    
     def on_producto_selected(self, event):
         """Maneja el evento de selección de producto"""
         producto_key = self.var_producto.get()
         if producto_key in self.productos_data:
             producto = self.productos_data[producto_key]
-            self.var_precio.set(format_currency(producto['precio']).replace("S/", "").strip())
+            self.var_precio.set(cents_to_str(producto['precio']))
             self.calculate_subtotal()
     
     def calculate_subtotal(self, *args):
         """Calcula el subtotal del producto"""
         try:
-            precio_str = self.var_precio.get().replace(",", ".")
-            # Limpiar caracteres no numéricos excepto el punto decimal
-            import re
-            precio_limpio = re.sub(r'[^\d.]', '', precio_str)
-            if not precio_limpio:
-                precio_limpio = "0"
-            precio = float(precio_limpio)
+            precio = to_cents(self.var_precio.get())
             cantidad = int(self.var_cantidad.get())
-            subtotal = precio * cantidad
-            self.var_subtotal.set(f"{subtotal:.2f}")
+            self.var_subtotal.set(cents_to_str(calculate_subtotal(precio, cantidad)))
         except (ValueError, AttributeError):
             self.var_subtotal.set("0.00")
     
@@ -212,16 +253,13 @@ class VentaView:
         
         # Calcular subtotal
         precio_str = self.var_precio.get()
-        # Limpiar la cadena de precio para eliminar caracteres no numéricos (excepto el punto decimal)
-        import re
-        precio_limpio = re.sub(r'[^\d.]', '', precio_str.replace(",", "."))
         try:
-            precio = float(precio_limpio)
+            precio = to_cents(precio_str)
         except ValueError:
             messagebox.showerror("Error", f"Formato de precio no válido: {precio_str}")
             return
             
-        subtotal = precio * cantidad
+        subtotal = calculate_subtotal(precio, cantidad)
         
         # Agregar a la lista de detalles
         detalle = {
@@ -279,7 +317,7 @@ class VentaView:
     def actualizar_total(self):
         """Actualiza el total de la venta"""
         total = sum(detalle['subtotal'] for detalle in self.detalles)
-        self.var_total.set(f"{total:.2f}")
+        self.var_total.set(cents_to_str(total))
     
     def eliminar_producto(self):
         """Elimina un producto del detalle de la venta"""
@@ -338,7 +376,14 @@ class VentaView:
             return
         
         # Registrar venta
-        id_venta = self.controller.crear_venta(id_cliente, id_empleado, self.detalles)
+        try:
+            id_venta = self.controller.crear_venta(id_cliente, id_empleado, self.detalles)
+        except DatabaseBusyError:
+            # Se conserva la venta en pantalla para volver a registrarla
+            messagebox.showwarning("Base de datos ocupada",
+                                   "Otra terminal está usando la base de datos y la venta no se registró.\n"
+                                   "Vuelva a pulsar Registrar Venta en unos segundos.")
+            return
         
         if id_venta:
             messagebox.showinfo("Éxito", f"Venta registrada correctamente con ID: {id_venta}")